@@ -1,41 +1,88 @@
 from datetime import datetime
-from io import BytesIO
 import logging
 import os
-import pickle
+import random
 from pathlib import Path
-import re
+from typing import Optional
+import zlib
 
 from bson import ObjectId
 import nltk
 import numpy as np
-from docx import Document
-from fastapi import Depends, FastAPI, File, HTTPException, UploadFile
+from fastapi import Depends, FastAPI, File, HTTPException, Query, Request, UploadFile
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from pypdf import PdfReader
+from fastapi.responses import PlainTextResponse
 from pydantic import BaseModel
 from pymongo import ReturnDocument
 from nltk.tokenize import sent_tokenize
-from pptx import Presentation
 
+from backend import async_mongo
 from backend.mongo import (
     ensure_collections_and_indexes,
     ensure_default_admin,
     scan_logs_collection,
-    users_collection,
+    scan_sentences_collection,
 )
-from backend.security import get_current_user, normalize_role
-from features.feature_extractor import build_features_with_chunk_context, warmup_inference_stack
+from backend.inference_queue import estimate_sentences, inference_queue
+from backend.outbox import OUTBOX_SENDER_ENABLED, outbox_sender
+from backend.profiling import request_profiler
+from backend.rate_limit import client_ip
+from backend.scan_jobs import SCAN_JOBS_ENABLED, scan_job_workers
+from backend.security import AUTH_DISABLED, get_current_user, normalize_role
+from backend.memory import estimate_text_bytes, estimate_upload_bytes, memory_admission
+from backend.metrics import render_metrics
+from backend.timing import ServerTimingMiddleware, stage_timer
+from backend.uploads import MAX_UPLOAD_BYTES, UploadSizeLimitMiddleware, open_upload
+from backend.usage import record_scan_usage, usage_owner_ids
+from extraction.cache import extraction_cache, is_valid_digest
+from extraction.files import extract_text_cached
+from extraction.plugins import EXTRACTOR_PRELOAD, extractor_registry
+from features.cascade import CASCADE_AUDIT_RATE, cascade_stats, uncertain_rows
+from features.feature_extractor import (
+    BERT_EMBED_DIM,
+    STYLE_FEATURE_DIM,
+    feature_config_fingerprint,
+    fill_style_features_with_chunk_context,
+    get_chunk_bert_features_traced,
+    warmup_inference_stack,
+)
+from features.model_registry import model_registry
+from features.shadow import SHADOW_MODEL_VERSION, shadow_evaluator
 from router.admin import admin_router
 from router.auth import auth_router
+from router.jobs import jobs_router
 
 app = FastAPI(title="Turnitin-Style AI Detector")
 logger = logging.getLogger("uvicorn.error")
 CHUNK_SENTENCE_SIZE = int(os.getenv("CHUNK_SENTENCE_SIZE", "15"))
 MODEL_WARMUP = os.getenv("MODEL_WARMUP", "0").strip().lower() in {"1", "true", "yes", "on"}
 MAX_TEXT_CHARS = int(os.getenv("MAX_TEXT_CHARS", "300000"))
-MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(20 * 1024 * 1024)))
-
+# Texts past MAX_TEXT_CHARS are scored window by window with results streamed to Mongo.
+LARGE_DOCUMENT_MODE = os.getenv("LARGE_DOCUMENT_MODE", "1").strip().lower() in {"1", "true", "yes", "on"}
+LARGE_DOCUMENT_MAX_CHARS = int(os.getenv("LARGE_DOCUMENT_MAX_CHARS", "3000000"))
+LARGE_DOCUMENT_WINDOW_CHUNKS = max(int(os.getenv("LARGE_DOCUMENT_WINDOW_CHUNKS", "8")), 1)
+LARGE_DOCUMENT_PREVIEW_SENTENCES = 200
+LARGE_DOCUMENT_LOG_PREVIEW_CHARS = 2000
+# punkt (nltk 3.7) re-slices the text before every candidate break, so it is fed bounded blocks.
+SENTENCE_BLOCK_CHARS = 64 * 1024
+# mode="quick": score a stratified sample of chunks and report confidence intervals.
+QUICK_ESTIMATE_STRATA = max(int(os.getenv("QUICK_ESTIMATE_STRATA", "8")), 1)
+# At least 2: a stratum's variance is estimated from its own sampled chunks, so with one
+# chunk per stratum the interval would have zero width and never escalate.
+QUICK_ESTIMATE_CHUNKS_PER_STRATUM = max(int(os.getenv("QUICK_ESTIMATE_CHUNKS_PER_STRATUM", "2")), 2)
+QUICK_ESTIMATE_CONFIDENCE = 0.95
+QUICK_ESTIMATE_Z = 1.96
+# Optional bearer token for /metrics; unset leaves it open for an in-cluster scraper.
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "").strip()
+
+app.add_middleware(ServerTimingMiddleware)
+# Registered before CORS so that early 413 responses still carry CORS headers.
+app.add_middleware(
+    UploadSizeLimitMiddleware,
+    max_upload_bytes=MAX_UPLOAD_BYTES,
+    paths={"/predict-file", "/extract-file", "/scan-jobs"},
+)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=[
@@ -66,8 +113,16 @@ def health():
     return {"status": "running"}
 
 
+@app.get("/metrics", include_in_schema=False)
+def metrics(request: Request):
+    if METRICS_TOKEN and request.headers.get("authorization") != f"Bearer {METRICS_TOKEN}":
+        raise HTTPException(status_code=401, detail="Invalid metrics token")
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+
 app.include_router(auth_router)
 app.include_router(admin_router)
+app.include_router(jobs_router)
 
 ensure_collections_and_indexes()
 ensure_default_admin()
@@ -78,122 +133,84 @@ except LookupError:
     nltk.download("punkt", quiet=True)
 
 PROJECT_ROOT = Path(__file__).resolve().parent
-MODEL_PATH = PROJECT_ROOT / "models" / "xgb_model_.pkl"
-if not MODEL_PATH.exists():
-    raise FileNotFoundError(f"Model not found at {MODEL_PATH}")
-
-with MODEL_PATH.open("rb") as f:
-    model = pickle.load(f)
+# The builtin models/xgb_model_.pkl unless a registry version is active; see features/model_registry.py.
+model_registry.load_initial(feature_config_fingerprint(CHUNK_SENTENCE_SIZE))
 
 
 @app.on_event("startup")
 def warmup_models():
     # On small instances (e.g. 512Mi), eager warmup can OOM. Keep it opt-in.
     if MODEL_WARMUP:
-        warmup_inference_stack()
+        with model_registry.pinned():
+            warmup_inference_stack()
 
 
-class TextInput(BaseModel):
-    text: str
+@app.on_event("startup")
+def preload_extractors():
+    extractor_registry.preload(EXTRACTOR_PRELOAD)
 
 
-def normalize_extracted_text(text: str) -> str:
-    text = text.replace("\r\n", "\n").replace("\r", "\n").replace("\xa0", " ")
-    # Merge PDF-style hyphenated wraps: "exam-\nple" -> "example"
-    text = re.sub(r"([A-Za-z])-\n([A-Za-z])", r"\1\2", text)
+@app.on_event("startup")
+def start_model_registry_watcher():
+    model_registry.start()
 
-    lines = text.split("\n")
-    cleaned = []
-    blank_run = 0
 
-    for raw in lines:
-        line = re.sub(r"[ \t]+", " ", raw).strip()
-        if not line:
-            blank_run += 1
-            if blank_run <= 1:
-                cleaned.append("")
-            continue
-        blank_run = 0
-        cleaned.append(line)
+@app.on_event("shutdown")
+def stop_model_registry_watcher():
+    model_registry.stop()
 
-    return "\n".join(cleaned).strip()
 
+@app.on_event("startup")
+def start_shadow_evaluation():
+    if SHADOW_MODEL_VERSION:
+        shadow_evaluator.start(SHADOW_MODEL_VERSION, _label_from_probs, busy=lambda: inference_queue.depth > 0)
 
-def extract_docx_text(content: bytes) -> str:
-    document = Document(BytesIO(content))
-    parts = []
 
-    for p in document.paragraphs:
-        txt = p.text.strip()
-        if not txt:
-            continue
+@app.on_event("shutdown")
+def stop_shadow_evaluation():
+    shadow_evaluator.stop()
 
-        style_name = (p.style.name or "").lower() if p.style else ""
-        if style_name.startswith("heading"):
-            parts.append(txt.upper())
-            parts.append("")
-            continue
 
-        # Keep simple bullet/numbered intent visible in plain text output.
-        if style_name.startswith("list"):
-            parts.append(f"- {txt}")
-        else:
-            parts.append(txt)
+@app.on_event("startup")
+def start_outbox_sender():
+    if OUTBOX_SENDER_ENABLED:
+        outbox_sender.start()
 
-    # Include table content (previously lost).
-    for table in document.tables:
-        parts.append("")
-        for row in table.rows:
-            cells = [re.sub(r"\s+", " ", c.text).strip() for c in row.cells]
-            cells = [c for c in cells if c]
-            if cells:
-                parts.append(" | ".join(cells))
-        parts.append("")
 
-    return "\n".join(parts)
+@app.on_event("shutdown")
+def stop_outbox_sender():
+    outbox_sender.stop()
 
 
-def extract_pptx_text(content: bytes) -> str:
-    try:
-        presentation = Presentation(BytesIO(content))
-    except Exception:
-        raise HTTPException(
-            status_code=400,
-            detail="Unable to read .ppt file. Please convert it to .pptx and retry.",
-        )
+@app.on_event("startup")
+def start_scan_job_workers():
+    if SCAN_JOBS_ENABLED:
+        scan_job_workers.start(run_prediction, _scan_memory_bytes)
+
+
+@app.on_event("shutdown")
+def stop_scan_job_workers():
+    scan_job_workers.stop()
+
+
+@app.on_event("shutdown")
+def stop_extraction_workers():
+    extractor_registry.shutdown()
+
+
+@app.on_event("shutdown")
+async def close_database_clients():
+    await async_mongo.close_async_client()
 
-    lines = []
-    for slide_idx, slide in enumerate(presentation.slides, start=1):
-        lines.append(f"Slide {slide_idx}")
-        for shape in slide.shapes:
-            if not hasattr(shape, "text_frame") or shape.text_frame is None:
-                continue
-            for para in shape.text_frame.paragraphs:
-                text = "".join(run.text for run in para.runs).strip() if para.runs else (para.text or "").strip()
-                if not text:
-                    continue
-                level = getattr(para, "level", 0) or 0
-                indent = "  " * min(level, 4)
-                bullet = "- " if level >= 0 else ""
-                lines.append(f"{indent}{bullet}{text}")
-        lines.append("")
-
-    return "\n".join(lines)
-
-
-def extract_pdf_text(content: bytes) -> str:
-    reader = PdfReader(BytesIO(content))
-    pages = []
-    for idx, page in enumerate(reader.pages, start=1):
-        try:
-            page_text = page.extract_text(extraction_mode="layout") or ""
-        except TypeError:
-            page_text = page.extract_text() or ""
-        if page_text.strip():
-            pages.append(page_text.strip())
-        else:
-            pages.append(f"[Page {idx}: no readable text]")
-    return "\n\n".join(pages)
+
+class TextInput(BaseModel):
+    text: str
+    mode: Optional[str] = None
+
+
+class DigestInput(BaseModel):
+    digest: str
+    mode: Optional[str] = None
 
 
 def classify_turnitin(ai_percent, human_percent, polish_percent):
@@ -215,15 +232,15 @@ def classify_turnitin(ai_percent, human_percent, polish_percent):
     return "Human"
 
 
-def consume_user_token(current_user):
-    user_doc = users_collection.find_one_and_update(
+async def consume_user_token(current_user):
+    user_doc = await async_mongo.users_collection.find_one_and_update(
         {"_id": current_user["_id"], "tokens": {"$gt": 0}},
         {"$inc": {"tokens": -1}},
         return_document=ReturnDocument.BEFORE,
     )
 
     if not user_doc:
-        existing = users_collection.find_one({"_id": current_user["_id"]})
+        existing = await async_mongo.users_collection.find_one({"_id": current_user["_id"]})
         if not existing:
             raise HTTPException(status_code=403, detail="User Not Found")
         raise HTTPException(status_code=402, detail="TOKEN_FINISHED")
@@ -231,39 +248,144 @@ def consume_user_token(current_user):
     return user_doc.get("tokens", 0)
 
 
-def run_prediction(text: str, user_id: str, tokens_before: int):
-    text = text.strip()
-    if not text:
-        raise HTTPException(status_code=400, detail="Text is empty")
-    if len(text) > MAX_TEXT_CHARS:
-        raise HTTPException(
-            status_code=413,
-            detail=f"Text too large. Maximum allowed characters: {MAX_TEXT_CHARS}",
-        )
+def _label_from_probs(probs) -> str:
+    # Model classes are (human, ai, over-polished).
+    return classify_turnitin(float(probs[1] * 100), float(probs[0] * 100), float(probs[2] * 100))
 
-    sentences = sent_tokenize(text)
-    if not sentences:
-        raise HTTPException(status_code=400, detail="No sentences found")
 
-    original_sentence_count = len(sentences)
-    results = []
-    total_ai = 0
-    total_human = 0
+def _chunk_embedding(chunk_text: str) -> np.ndarray:
+    with stage_timer("embed") as stage:
+        features, cache_hit = get_chunk_bert_features_traced(chunk_text)
+        stage.cache = "hit" if cache_hit else "miss"
+    return features
 
-    feature_rows = []
-    sentence_order = []
 
+def _score_chunks_cascade(chunks: list[tuple[list[str], str]], light_model) -> tuple[np.ndarray, list[str]]:
+    """Light model on every sentence; BERT + full model only for chunks it is unsure about.
+
+    A chunk escalates when any of its sentences falls below CASCADE_CONFIDENCE. A small
+    sample of the remaining chunks is also run through the full model to track agreement.
+    """
+    with stage_timer("stylometry"):
+        style_rows = np.empty(
+            (sum(len(chunk_sentences) for chunk_sentences, _ in chunks), STYLE_FEATURE_DIM), dtype=np.float32
+        )
+        offset = 0
+        for chunk_sentences, chunk_text in chunks:
+            fill_style_features_with_chunk_context(
+                style_rows[offset:offset + len(chunk_sentences)], chunk_sentences, chunk_text
+            )
+            offset += len(chunk_sentences)
+    with stage_timer("predict_light"):
+        probs_batch = light_model.predict_proba(style_rows)
+    uncertain = uncertain_rows(probs_batch)
+    stages = ["light"] * len(style_rows)
+
+    full_chunks = []
+    offset = 0
+    for chunk_sentences, chunk_text in chunks:
+        rows = slice(offset, offset + len(chunk_sentences))
+        offset += len(chunk_sentences)
+        escalate = bool(uncertain[rows].any())
+        if escalate or random.random() < CASCADE_AUDIT_RATE:
+            full_chunks.append((rows, chunk_text, escalate))
+
+    escalated_chunks = 0
+    escalated_sentences = 0
+    audited = 0
+    agreements = 0
+    if full_chunks:
+        full_features = np.empty(
+            (sum(rows.stop - rows.start for rows, _, _ in full_chunks), BERT_EMBED_DIM + STYLE_FEATURE_DIM),
+            dtype=np.float32,
+        )
+        pos = 0
+        for rows, chunk_text, _escalate in full_chunks:
+            count = rows.stop - rows.start
+            full_features[pos:pos + count, :BERT_EMBED_DIM] = _chunk_embedding(chunk_text)
+            full_features[pos:pos + count, BERT_EMBED_DIM:] = style_rows[rows]
+            pos += count
+        with stage_timer("predict"):
+            full_probs = model_registry.current().model.predict_proba(full_features)
+        # Only the escalated and audited chunks, so no document verdict to compare.
+        shadow_evaluator.submit(full_features, full_probs, model_registry.current(), whole=False)
+        pos = 0
+        for rows, _chunk_text, escalate in full_chunks:
+            count = rows.stop - rows.start
+            chunk_probs = full_probs[pos:pos + count]
+            pos += count
+            if escalate:
+                probs_batch[rows] = chunk_probs
+                stages[rows] = ["full"] * count
+                escalated_chunks += 1
+                escalated_sentences += count
+                continue
+            audited += count
+            agreements += sum(
+                _label_from_probs(light) == _label_from_probs(full)
+                for light, full in zip(probs_batch[rows], chunk_probs)
+            )
+
+    cascade_stats.record(len(chunks), escalated_chunks, len(style_rows), escalated_sentences)
+    if audited:
+        cascade_stats.record_audit(audited, agreements)
+    return probs_batch, stages
+
+
+def _chunk_sentences(sentences: list[str]) -> list[tuple[list[str], str]]:
+    chunks = []
     for i in range(0, len(sentences), CHUNK_SENTENCE_SIZE):
         chunk_sentences = sentences[i:i + CHUNK_SENTENCE_SIZE]
-        chunk_text = " ".join(chunk_sentences)
+        chunks.append((chunk_sentences, " ".join(chunk_sentences)))
+    return chunks
 
-        for sent in chunk_sentences:
-            feature_rows.append(build_features_with_chunk_context(sent, chunk_text))
-            sentence_order.append(sent)
 
-    probs_batch = model.predict_proba(np.vstack(feature_rows))
+def _feature_matrix(chunks: list[tuple[list[str], str]]) -> np.ndarray:
+    """One model input row per sentence; must equal build_features_with_chunk_context row for row.
 
-    for sent, probs in zip(sentence_order, probs_batch):
+    benchmarks/parity.py checks this against frozen reference vectors.
+    """
+    # One float32 matrix sized upfront: each chunk's embedding is broadcast into its rows
+    # and the style columns are written in place, so no per-sentence rows are built.
+    features = np.empty(
+        (sum(len(chunk_sentences) for chunk_sentences, _ in chunks), BERT_EMBED_DIM + STYLE_FEATURE_DIM),
+        dtype=np.float32,
+    )
+    offset = 0
+    for chunk_sentences, chunk_text in chunks:
+        rows = slice(offset, offset + len(chunk_sentences))
+        offset += len(chunk_sentences)
+        # Split so each stage is timed on its own.
+        features[rows, :BERT_EMBED_DIM] = _chunk_embedding(chunk_text)
+        with stage_timer("stylometry"):
+            fill_style_features_with_chunk_context(features[rows, BERT_EMBED_DIM:], chunk_sentences, chunk_text)
+    return features
+
+
+def _score_sentences(sentences: list[str], whole: bool = False) -> tuple[list[dict], float, float]:
+    """Score sentences in CHUNK_SENTENCE_SIZE chunks. Returns (results, total_ai, total_human).
+
+    ``whole`` means ``sentences`` are the complete document, not a window or a sample; only
+    then does the shadow model compare document verdicts.
+    """
+    chunks = _chunk_sentences(sentences)
+
+    stages = None
+    # The light model comes with the bundle it was distilled from (see features/model_registry.py).
+    light_model = model_registry.current().light_model
+    if light_model is not None:
+        probs_batch, stages = _score_chunks_cascade(chunks, light_model)
+    else:
+        feature_matrix = _feature_matrix(chunks)
+        with stage_timer("predict"):
+            probs_batch = model_registry.current().model.predict_proba(feature_matrix)
+        shadow_evaluator.submit(feature_matrix, probs_batch, model_registry.current(), whole=whole)
+
+    sentence_order = [sent for chunk_sentences, _chunk_text in chunks for sent in chunk_sentences]
+    results = []
+    total_ai = 0
+    total_human = 0
+    for idx, (sent, probs) in enumerate(zip(sentence_order, probs_batch)):
 
         human_p = float(probs[0] * 100)
         ai_p = float(probs[1] * 100)
@@ -273,29 +395,187 @@ def run_prediction(text: str, user_id: str, tokens_before: int):
         total_human += human_p
 
         final_label = classify_turnitin(ai_p, human_p, polish_p)
-        results.append(
-            {
-                "sentence": sent,
-                "human_probability": round(human_p, 2),
-                "ai_probability": round(ai_p, 2),
-                "over_polished_probability": round(polish_p, 2),
-                "final_label": final_label,
-            }
+        result = {
+            "sentence": sent,
+            "human_probability": round(human_p, 2),
+            "ai_probability": round(ai_p, 2),
+            "over_polished_probability": round(polish_p, 2),
+            "final_label": final_label,
+        }
+        if stages is not None:
+            result["stage"] = stages[idx]
+        results.append(result)
+
+    return results, total_ai, total_human
+
+
+def _validate_text(text: str) -> str:
+    text = text.strip()
+    if not text:
+        raise HTTPException(status_code=400, detail="Text is empty")
+    limit = LARGE_DOCUMENT_MAX_CHARS if LARGE_DOCUMENT_MODE else MAX_TEXT_CHARS
+    if len(text) > limit:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Text too large. Maximum allowed characters: {limit}",
         )
+    return text
+
+
+def _record_scan(user_id: str, admin_id: Optional[str], log_doc: dict, avg_ai: float) -> None:
+    scanned_at = datetime.utcnow()
+    log_doc.update({"uid": user_id, "timestamp": scanned_at, "model_version": model_registry.current().version})
+    with stage_timer("scan_log"):
+        scan_logs_collection.insert_one(log_doc)
+        try:
+            record_scan_usage(user_id, admin_id, round(avg_ai, 2), tokens=1, timestamp=scanned_at)
+        except Exception as exc:
+            # The scan log is the source of truth; rollups can be rebuilt from it.
+            logger.warning("Usage rollup update failed for uid=%s: %r", user_id, exc)
+
+
+def _iter_sentences(text: str):
+    """Yield the sentences sent_tokenize would return, tokenizing one block at a time.
+
+    The last sentence of each block may be cut off, so the next block starts at its
+    beginning; a single sentence longer than a whole block is split at the block edge.
+    """
+    tokenizer = nltk.data.load("tokenizers/punkt/english.pickle")
+    pos = 0
+    length = len(text)
+    while pos < length:
+        end = min(pos + SENTENCE_BLOCK_CHARS, length)
+        block = text[pos:end]
+        with stage_timer("segment"):
+            spans = list(tokenizer.span_tokenize(block))
+        if end < length and len(spans) > 1:
+            for start, stop in spans[:-1]:
+                yield block[start:stop]
+            pos += spans[-1][0]
+        else:
+            for start, stop in spans:
+                yield block[start:stop]
+            pos = end
+
+
+def run_large_prediction(text: str, user_id: str, tokens_before: int, admin_id: Optional[str] = None):
+    """Score a document too long for run_prediction in windows of whole chunks.
+
+    Sentences are produced block by block (see _iter_sentences), each window is scored and
+    its per-sentence results written to scan_sentences before the next one is read, and
+    only running totals are kept. Window boundaries fall on chunk boundaries, so every
+    sentence gets the same chunk context it would get from run_prediction.
+    """
+    scan_id = ObjectId()
+    window_size = CHUNK_SENTENCE_SIZE * LARGE_DOCUMENT_WINDOW_CHUNKS
+
+    sentence_count = 0
+    total_ai = 0.0
+    total_human = 0.0
+    label_counts = {}
+    preview = []
+
+    def flush(window: list[str]) -> None:
+        nonlocal sentence_count, total_ai, total_human
+        results, window_ai, window_human = _score_sentences(window)
+        with stage_timer("sentence_store"):
+            scan_sentences_collection.insert_one(
+                {
+                    "scan_id": scan_id,
+                    "uid": user_id,
+                    "start": sentence_count,
+                    "end": sentence_count + len(results),
+                    "sentences": results,
+                }
+            )
+        for item in results:
+            label_counts[item["final_label"]] = label_counts.get(item["final_label"], 0) + 1
+        if len(preview) < LARGE_DOCUMENT_PREVIEW_SENTENCES:
+            preview.extend(results[:LARGE_DOCUMENT_PREVIEW_SENTENCES - len(preview)])
+        sentence_count += len(results)
+        total_ai += window_ai
+        total_human += window_human
+
+    try:
+        window = []
+        for sentence in _iter_sentences(text):
+            window.append(sentence)
+            if len(window) == window_size:
+                flush(window)
+                window = []
+        if window:
+            flush(window)
+    except Exception:
+        scan_sentences_collection.delete_many({"scan_id": scan_id})
+        raise
+
+    if not sentence_count:
+        raise HTTPException(status_code=400, detail="No sentences found")
+
+    avg_ai = total_ai / sentence_count
+    avg_human = total_human / sentence_count
+    final_doc_label = "AI" if avg_ai > avg_human else "Human"
+
+    _record_scan(
+        user_id,
+        admin_id,
+        {
+            "_id": scan_id,
+            # Book-length text stays out of the log; history views only show a preview.
+            "scanned_text": text[:LARGE_DOCUMENT_LOG_PREVIEW_CHARS],
+            "scanned_characters": len(text),
+            "large_document": True,
+            "sentences_count": sentence_count,
+            "result": final_doc_label,
+            "ai_percent": round(avg_ai, 2),
+            "human_percent": round(avg_human, 2),
+        },
+        avg_ai,
+    )
+
+    return {
+        "tokens_left": max(tokens_before - 1, 0),
+        "overall_human_probability": round(avg_human, 2),
+        "overall_ai_probability": round(avg_ai, 2),
+        "final_document_label": final_doc_label,
+        "sentences": preview,
+        "sentences_processed": sentence_count,
+        "sentences_received": sentence_count,
+        "label_counts": label_counts,
+        "large_document": True,
+        "scan_id": str(scan_id),
+        "sentences_url": f"/scans/{scan_id}/sentences",
+    }
+
+
+@model_registry.pinned()
+def run_prediction(text: str, user_id: str, tokens_before: int, admin_id: Optional[str] = None):
+    text = _validate_text(text)
+    if len(text) > MAX_TEXT_CHARS:
+        return run_large_prediction(text, user_id, tokens_before, admin_id)
+
+    with stage_timer("segment"):
+        sentences = sent_tokenize(text)
+    if not sentences:
+        raise HTTPException(status_code=400, detail="No sentences found")
+
+    original_sentence_count = len(sentences)
+    results, total_ai, total_human = _score_sentences(sentences, whole=True)
 
     avg_ai = total_ai / len(sentences)
     avg_human = total_human / len(sentences)
     final_doc_label = "AI" if avg_ai > avg_human else "Human"
 
-    scan_logs_collection.insert_one(
+    _record_scan(
+        user_id,
+        admin_id,
         {
-            "uid": user_id,
             "scanned_text": text,
             "result": final_doc_label,
             "ai_percent": round(avg_ai, 2),
             "human_percent": round(avg_human, 2),
-            "timestamp": datetime.utcnow(),
-        }
+        },
+        avg_ai,
     )
 
     return {
@@ -309,92 +589,248 @@ def run_prediction(text: str, user_id: str, tokens_before: int):
     }
 
 
-def extract_text_from_upload(filename: str, content: bytes) -> str:
-    ext = os.path.splitext(filename or "")[1].lower()
+def _stratified_estimate(chunk_means: dict, chunk_sizes: list[int], strata: list[list[int]]) -> tuple[float, float]:
+    """Stratified cluster-sample estimate of the per-sentence mean. Returns (mean, standard error).
+
+    ``chunk_means`` maps sampled chunk index -> mean over its sentences; strata are contiguous
+    runs of chunk indexes weighted by how many sentences they hold.
+    """
+    total_sentences = sum(chunk_sizes)
+    mean = 0.0
+    variance = 0.0
+    for stratum in strata:
+        sampled = [idx for idx in stratum if idx in chunk_means]
+        weight = sum(chunk_sizes[idx] for idx in stratum) / total_sentences
+        values = np.array([chunk_means[idx] for idx in sampled])
+        sizes = np.array([chunk_sizes[idx] for idx in sampled], dtype=np.float64)
+        mean += weight * float(np.average(values, weights=sizes))
+        # Strata sampled in full add no variance; partly sampled ones hold at least
+        # QUICK_ESTIMATE_CHUNKS_PER_STRATUM >= 2 chunks.
+        if 1 < len(sampled) < len(stratum):
+            fpc = 1 - len(sampled) / len(stratum)
+            variance += weight ** 2 * fpc * float(np.var(values, ddof=1)) / len(sampled)
+    return mean, variance ** 0.5
+
+
+def _interval(mean: float, stderr: float, lo: float = 0.0, hi: float = 100.0) -> list[float]:
+    return [round(max(mean - QUICK_ESTIMATE_Z * stderr, lo), 2), round(min(mean + QUICK_ESTIMATE_Z * stderr, hi), 2)]
+
+
+@model_registry.pinned()
+def run_quick_estimate(text: str, user_id: str, tokens_before: int, admin_id: Optional[str] = None):
+    """Estimate the document verdict from a stratified sample of chunks.
+
+    The document is cut into QUICK_ESTIMATE_STRATA contiguous strata and a few chunks are
+    scored from each, so every part of the document is represented. When the interval for
+    (AI - human) contains zero the verdict is uncertain and a full scan runs instead.
+    """
+    text = _validate_text(text)
+    sentences = list(_iter_sentences(text))
+    if not sentences:
+        raise HTTPException(status_code=400, detail="No sentences found")
 
-    if ext == ".txt":
-        try:
-            raw = content.decode("utf-8")
-        except UnicodeDecodeError:
-            raw = content.decode("latin-1", errors="ignore")
-        return normalize_extracted_text(raw)
+    chunk_bounds = [(i, min(i + CHUNK_SENTENCE_SIZE, len(sentences))) for i in range(0, len(sentences), CHUNK_SENTENCE_SIZE)]
+    if len(chunk_bounds) <= QUICK_ESTIMATE_STRATA * QUICK_ESTIMATE_CHUNKS_PER_STRATUM:
+        # Sampling would score most of the document anyway.
+        result = run_prediction(text, user_id, tokens_before, admin_id)
+        result.update({"mode": "full", "escalated": False})
+        return result
+
+    strata = [list(map(int, s)) for s in np.array_split(np.arange(len(chunk_bounds)), QUICK_ESTIMATE_STRATA)]
+    rng = random.Random(zlib.crc32(text.encode("utf-8")))
+    picked = sorted(idx for stratum in strata for idx in rng.sample(stratum, min(QUICK_ESTIMATE_CHUNKS_PER_STRATUM, len(stratum))))
+
+    # Sampled chunks are whole and in document order, so _score_sentences rebuilds the same chunks.
+    sample = [sent for idx in picked for sent in sentences[chunk_bounds[idx][0]:chunk_bounds[idx][1]]]
+    results, _total_ai, _total_human = _score_sentences(sample)
+
+    ai_means, human_means, gap_means = {}, {}, {}
+    offset = 0
+    for idx in picked:
+        size = chunk_bounds[idx][1] - chunk_bounds[idx][0]
+        chunk = results[offset:offset + size]
+        offset += size
+        ai_means[idx] = sum(r["ai_probability"] for r in chunk) / size
+        human_means[idx] = sum(r["human_probability"] for r in chunk) / size
+        gap_means[idx] = ai_means[idx] - human_means[idx]
+
+    chunk_sizes = [end - start for start, end in chunk_bounds]
+    avg_ai, ai_se = _stratified_estimate(ai_means, chunk_sizes, strata)
+    avg_human, human_se = _stratified_estimate(human_means, chunk_sizes, strata)
+    gap, gap_se = _stratified_estimate(gap_means, chunk_sizes, strata)
+    gap_interval = _interval(gap, gap_se, lo=-100.0)
+
+    estimate = {
+        "overall_ai_probability": round(avg_ai, 2),
+        "overall_human_probability": round(avg_human, 2),
+        "ai_probability_interval": _interval(avg_ai, ai_se),
+        "human_probability_interval": _interval(avg_human, human_se),
+        "ai_minus_human_interval": gap_interval,
+        "confidence": QUICK_ESTIMATE_CONFIDENCE,
+        "sample_chunks": len(picked),
+        "total_chunks": len(chunk_bounds),
+        "sample_sentences": len(sample),
+        "total_sentences": len(sentences),
+    }
 
-    if ext == ".pdf":
-        return normalize_extracted_text(extract_pdf_text(content))
+    if gap_interval[0] <= 0 <= gap_interval[1]:
+        result = run_prediction(text, user_id, tokens_before, admin_id)
+        result.update({"mode": "full", "escalated": True, "quick_estimate": estimate})
+        return result
 
-    if ext in {".docx", ".word"}:
-        return normalize_extracted_text(extract_docx_text(content))
+    final_doc_label = "AI" if avg_ai > avg_human else "Human"
+    _record_scan(
+        user_id,
+        admin_id,
+        {
+            "scanned_text": text[:LARGE_DOCUMENT_LOG_PREVIEW_CHARS] if len(text) > MAX_TEXT_CHARS else text,
+            "scanned_characters": len(text),
+            "mode": "quick",
+            "result": final_doc_label,
+            "ai_percent": round(avg_ai, 2),
+            "human_percent": round(avg_human, 2),
+        },
+        avg_ai,
+    )
 
-    if ext in {".ppt", ".pptx"}:
-        return normalize_extracted_text(extract_pptx_text(content))
+    estimate.update(
+        {
+            "tokens_left": max(tokens_before - 1, 0),
+            "final_document_label": final_doc_label,
+            "mode": "quick",
+            "escalated": False,
+            "sentences": [],
+            "sentences_processed": len(sample),
+            "sentences_received": len(sentences),
+        }
+    )
+    return estimate
 
-    if ext == ".doc":
-        raise HTTPException(
-            status_code=400,
-            detail="Legacy .doc is not supported directly. Please convert to .docx.",
-        )
 
-    raise HTTPException(
-        status_code=400,
-        detail="Unsupported file type. Use txt, pdf, docx, pptx, or ppt.",
-    )
+def _prediction_runner(mode: Optional[str]):
+    if mode in (None, "", "full"):
+        return run_prediction
+    if mode == "quick":
+        return run_quick_estimate
+    raise HTTPException(status_code=400, detail="mode must be 'full' or 'quick'")
+
+
+def _queue_key(request: Request, current_user: dict) -> str:
+    # With auth disabled every caller is the same fallback user, so share by client IP.
+    return client_ip(request) if AUTH_DISABLED else str(current_user["_id"])
+
+
+def _scan_memory_bytes(text: str) -> int:
+    chars = len(text)
+    if LARGE_DOCUMENT_MODE and chars > MAX_TEXT_CHARS:
+        # run_large_prediction holds one window of sentences at a time, not the whole text.
+        window_sentences = CHUNK_SENTENCE_SIZE * LARGE_DOCUMENT_WINDOW_CHUNKS
+        window_chars = chars * window_sentences // max(estimate_sentences(text), 1)
+        chars = min(chars, max(window_chars, SENTENCE_BLOCK_CHARS))
+    return estimate_text_bytes(chars)
+
+
+def _scan_cost(text: str, runner) -> int:
+    sentences = estimate_sentences(text)
+    if runner is run_quick_estimate:
+        # Escalations run the full scan, but most quick estimates only score the sample.
+        return min(sentences, QUICK_ESTIMATE_STRATA * QUICK_ESTIMATE_CHUNKS_PER_STRATUM * CHUNK_SENTENCE_SIZE)
+    return sentences
 
 
 @app.post("/predict")
-def predict(data: TextInput, current_user=Depends(get_current_user)):
-    user_id = str(current_user["_id"])
+async def predict(data: TextInput, request: Request, current_user=Depends(get_current_user)):
+    user_id, admin_id = usage_owner_ids(current_user)
     text = data.text.strip()
-    tokens_before = consume_user_token(current_user)
-    return run_prediction(text=text, user_id=user_id, tokens_before=tokens_before)
+    runner = _prediction_runner(data.mode)
+    # Queue and admit before charging, so a 429 or 503 never costs the user a token.
+    with request_profiler.request("predict"):
+        async with inference_queue.slot(_queue_key(request, current_user), _scan_cost(text, runner)):
+            async with memory_admission.admit(_scan_memory_bytes(text)):
+                tokens_before = await consume_user_token(current_user)
+                return await run_in_threadpool(
+                    request_profiler.profiled(runner),
+                    text=text,
+                    user_id=user_id,
+                    tokens_before=tokens_before,
+                    admin_id=admin_id,
+                )
 
 
 @app.post("/predict-file")
-async def predict_file(file: UploadFile = File(...), current_user=Depends(get_current_user)):
-    user_id = str(current_user["_id"])
-
-    content = await file.read()
-    if not content:
-        raise HTTPException(status_code=400, detail="Uploaded file is empty")
-    if len(content) > MAX_UPLOAD_BYTES:
-        raise HTTPException(
-            status_code=413,
-            detail=f"File too large. Maximum allowed size: {MAX_UPLOAD_BYTES} bytes",
-        )
-
-    extracted_text = extract_text_from_upload(file.filename or "", content).strip()
+async def predict_file(
+    request: Request,
+    file: UploadFile = File(...),
+    mode: Optional[str] = Query(None),
+    current_user=Depends(get_current_user),
+):
+    user_id, admin_id = usage_owner_ids(current_user)
+    runner = _prediction_runner(mode)
+
+    stream = open_upload(file, MAX_UPLOAD_BYTES)
+    with request_profiler.request("predict-file"):
+        async with memory_admission.admit(estimate_upload_bytes(file.size or 0), kind="extract"):
+            _digest, extracted_text = await run_in_threadpool(
+                request_profiler.profiled(extract_text_cached), file.filename or "", stream
+            )
+        if not extracted_text:
+            raise HTTPException(status_code=400, detail="No readable text found in file")
+
+        async with inference_queue.slot(_queue_key(request, current_user), _scan_cost(extracted_text, runner)):
+            async with memory_admission.admit(_scan_memory_bytes(extracted_text)):
+                tokens_before = await consume_user_token(current_user)
+                return await run_in_threadpool(
+                    request_profiler.profiled(runner),
+                    text=extracted_text,
+                    user_id=user_id,
+                    tokens_before=tokens_before,
+                    admin_id=admin_id,
+                )
+
+
+@app.post("/predict-digest")
+async def predict_digest(data: DigestInput, request: Request, current_user=Depends(get_current_user)):
+    digest = data.digest.strip().lower()
+    runner = _prediction_runner(data.mode)
+    if not is_valid_digest(digest):
+        raise HTTPException(status_code=400, detail="Invalid digest")
+
+    extracted_text = extraction_cache.get(digest)
+    if extracted_text is None:
+        raise HTTPException(status_code=404, detail="Extracted text not found or expired. Please upload the file again")
     if not extracted_text:
         raise HTTPException(status_code=400, detail="No readable text found in file")
 
-    tokens_before = consume_user_token(current_user)
-    return run_prediction(text=extracted_text, user_id=user_id, tokens_before=tokens_before)
+    user_id, admin_id = usage_owner_ids(current_user)
+    async with inference_queue.slot(_queue_key(request, current_user), _scan_cost(extracted_text, runner)):
+        async with memory_admission.admit(_scan_memory_bytes(extracted_text)):
+            tokens_before = await consume_user_token(current_user)
+            return await run_in_threadpool(
+                runner, text=extracted_text, user_id=user_id, tokens_before=tokens_before, admin_id=admin_id
+            )
 
 
 @app.post("/extract-file")
 async def extract_file(file: UploadFile = File(...), _current_user=Depends(get_current_user)):
-    content = await file.read()
-    if not content:
-        raise HTTPException(status_code=400, detail="Uploaded file is empty")
-    if len(content) > MAX_UPLOAD_BYTES:
-        raise HTTPException(
-            status_code=413,
-            detail=f"File too large. Maximum allowed size: {MAX_UPLOAD_BYTES} bytes",
-        )
-
-    extracted_text = extract_text_from_upload(file.filename or "", content).strip()
+    stream = open_upload(file, MAX_UPLOAD_BYTES)
+    async with memory_admission.admit(estimate_upload_bytes(file.size or 0), kind="extract"):
+        digest, extracted_text = await run_in_threadpool(extract_text_cached, file.filename or "", stream)
     if not extracted_text:
         raise HTTPException(status_code=400, detail="No readable text found in file")
 
     return {
         "filename": file.filename or "",
+        "digest": digest,
         "text": extracted_text,
         "characters": len(extracted_text),
     }
 
 
 @app.get("/my-history")
-def get_my_history(current_user=Depends(get_current_user)):
+async def get_my_history(current_user=Depends(get_current_user)):
     user_id = str(current_user["_id"])
-    logs = scan_logs_collection.find({"uid": user_id}).sort("timestamp", -1).limit(100)
+    cursor = async_mongo.scan_logs_collection.find({"uid": user_id}).sort("timestamp", -1).limit(100)
+    logs = await cursor.to_list(None)
 
     return [
         {
@@ -409,13 +845,52 @@ def get_my_history(current_user=Depends(get_current_user)):
     ]
 
 
+@app.get("/scans/{scan_id}/sentences")
+async def get_scan_sentences(
+    scan_id: str,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(500, ge=1, le=2000),
+    current_user=Depends(get_current_user),
+):
+    try:
+        oid = ObjectId(scan_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid scan id")
+
+    log = await async_mongo.scan_logs_collection.find_one(
+        {"_id": oid, "uid": str(current_user["_id"])},
+        {"sentences_count": 1},
+    )
+    if not log:
+        raise HTTPException(status_code=404, detail="Scan not found")
+
+    # Windows overlapping [offset, offset + limit), in order.
+    windows = await async_mongo.scan_sentences_collection.find(
+        {"scan_id": oid, "start": {"$lt": offset + limit}, "end": {"$gt": offset}},
+    ).sort("start", 1).to_list(None)
+
+    sentences = []
+    for window in windows:
+        lo = max(offset - window["start"], 0)
+        hi = min(offset + limit - window["start"], window["end"] - window["start"])
+        sentences.extend(window["sentences"][lo:hi])
+
+    return {
+        "scan_id": scan_id,
+        "offset": offset,
+        "limit": limit,
+        "total": int(log.get("sentences_count", 0) or 0),
+        "sentences": sentences,
+    }
+
+
 @app.get("/my-profile")
-def get_my_profile(current_user=Depends(get_current_user)):
+async def get_my_profile(current_user=Depends(get_current_user)):
     creator_info = None
     created_by_raw = current_user.get("created_by")
     if created_by_raw:
         try:
-            creator_doc = users_collection.find_one({"_id": ObjectId(str(created_by_raw))})
+            creator_doc = await async_mongo.users_collection.find_one({"_id": ObjectId(str(created_by_raw))})
         except Exception:
             creator_doc = None
 
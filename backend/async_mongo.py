@@ -0,0 +1,32 @@
+from bson import ObjectId
+from pymongo import AsyncMongoClient
+
+from backend.mongo import MONGO_DB_NAME, MONGO_URI, PoolMetricsListener, mongo_client_options, pool_listeners
+
+# Same collection names as backend.mongo, backed by the awaitable client. Code that
+# already runs in the threadpool (inference, scan-log writes) keeps the blocking client.
+pool_listeners["async"] = PoolMetricsListener("async")
+
+async_client = AsyncMongoClient(MONGO_URI, **mongo_client_options(pool_listeners["async"]))
+db = async_client[MONGO_DB_NAME]
+
+users_collection = db["users"]
+scan_logs_collection = db["scan_logs"]
+scan_sentences_collection = db["scan_sentences"]
+admin_requests_collection = db["admin_requests"]
+usage_rollups_collection = db["usage_rollups"]
+email_outbox_collection = db["email_outbox"]
+scan_jobs_collection = db["scan_jobs"]
+scan_job_items_collection = db["scan_job_items"]
+
+
+async def get_user_by_id(user_id: str):
+    try:
+        oid = ObjectId(user_id)
+    except Exception:
+        return None
+    return await users_collection.find_one({"_id": oid})
+
+
+async def close_async_client() -> None:
+    await async_client.close()
@@ -1,11 +1,14 @@
 import base64
+from concurrent.futures import ProcessPoolExecutor
 import hashlib
 import hmac
+import multiprocessing
 import os
 
 PBKDF2_ITERATIONS = 390000
 PBKDF2_SALT_SIZE = 16
 ALGO_NAME = "pbkdf2_sha256"
+BULK_HASH_PROCESSES = int(os.getenv("BULK_HASH_PROCESSES", "0")) or (os.cpu_count() or 1)
 
 
 def hash_password(password: str) -> str:
@@ -21,6 +24,19 @@ def hash_password(password: str) -> str:
     return f"{ALGO_NAME}${PBKDF2_ITERATIONS}${salt_b64}${digest_b64}"
 
 
+def hash_passwords(passwords: list[str]) -> list[str]:
+    """Hash many passwords in parallel, preserving input order."""
+    if len(passwords) <= 1 or BULK_HASH_PROCESSES <= 1:
+        return [hash_password(p) for p in passwords]
+
+    workers = min(BULK_HASH_PROCESSES, len(passwords))
+    # Short-lived pool: bulk provisioning is rare, so don't keep idle workers resident.
+    # "spawn" keeps children from inheriting the API's threads, Mongo sockets and model memory.
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        chunksize = max(len(passwords) // (workers * 4), 1)
+        return list(pool.map(hash_password, passwords, chunksize=chunksize))
+
+
 def verify_password(password: str, password_hash: str) -> bool:
     try:
         algo, iter_str, salt_b64, digest_b64 = password_hash.split("$", 3)
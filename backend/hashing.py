@@ -0,0 +1,109 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import os
+import threading
+import time
+
+from fastapi import HTTPException
+
+from backend.crypto import hash_password, verify_password
+
+# PBKDF2 releases the GIL, so a small dedicated thread pool gives real parallelism while
+# keeping login bursts out of the shared threadpool that serves /predict.
+PASSWORD_HASH_WORKERS = max(int(os.getenv("PASSWORD_HASH_WORKERS", "2")), 1)
+PASSWORD_HASH_MAX_QUEUE = max(int(os.getenv("PASSWORD_HASH_MAX_QUEUE", "64")), 0)
+PASSWORD_HASH_RETRY_AFTER_SECONDS = 2
+
+_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash")
+
+
+class _HashStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.queued = 0
+        self.running = 0
+        self.completed_total = 0
+        self.rejected_total = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self.run_seconds_total = 0.0
+        self.run_seconds_max = 0.0
+
+    def try_enqueue(self) -> bool:
+        with self._lock:
+            if self.queued + self.running >= PASSWORD_HASH_WORKERS + PASSWORD_HASH_MAX_QUEUE:
+                self.rejected_total += 1
+                return False
+            self.queued += 1
+            return True
+
+    def started(self, wait: float) -> None:
+        with self._lock:
+            self.queued -= 1
+            self.running += 1
+            self.wait_seconds_total += wait
+            self.wait_seconds_max = max(self.wait_seconds_max, wait)
+
+    def cancelled(self) -> None:
+        with self._lock:
+            self.queued -= 1
+
+    def finished(self, run: float) -> None:
+        with self._lock:
+            self.running -= 1
+            self.completed_total += 1
+            self.run_seconds_total += run
+            self.run_seconds_max = max(self.run_seconds_max, run)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            done = self.completed_total
+            return {
+                "workers": PASSWORD_HASH_WORKERS,
+                "max_queue": PASSWORD_HASH_MAX_QUEUE,
+                "queue_depth": self.queued,
+                "running": self.running,
+                "completed_total": done,
+                "rejected_total": self.rejected_total,
+                "avg_wait_ms": round(1000 * self.wait_seconds_total / done, 3) if done else 0.0,
+                "max_wait_ms": round(1000 * self.wait_seconds_max, 3),
+                "avg_run_ms": round(1000 * self.run_seconds_total / done, 3) if done else 0.0,
+                "max_run_ms": round(1000 * self.run_seconds_max, 3),
+            }
+
+
+_stats = _HashStats()
+
+
+def _timed_call(submitted_at: float, fn, *args):
+    started_at = time.perf_counter()
+    _stats.started(started_at - submitted_at)
+    try:
+        return fn(*args)
+    finally:
+        _stats.finished(time.perf_counter() - started_at)
+
+
+async def _run_bounded(fn, *args):
+    if not _stats.try_enqueue():
+        raise HTTPException(
+            status_code=503,
+            detail="Server is busy. Please retry shortly.",
+            headers={"Retry-After": str(PASSWORD_HASH_RETRY_AFTER_SECONDS)},
+        )
+    future = _executor.submit(_timed_call, time.perf_counter(), fn, *args)
+    # A client disconnect cancels the job before it starts; keep the queue depth honest.
+    future.add_done_callback(lambda f: _stats.cancelled() if f.cancelled() else None)
+    return await asyncio.wrap_future(future)
+
+
+async def hash_password_async(password: str) -> str:
+    return await _run_bounded(hash_password, password)
+
+
+async def verify_password_async(password: str, password_hash: str) -> bool:
+    return await _run_bounded(verify_password, password, password_hash)
+
+
+def password_hash_stats() -> dict:
+    return _stats.snapshot()
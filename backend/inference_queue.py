@@ -0,0 +1,207 @@
+import asyncio
+from collections import Counter
+from contextlib import asynccontextmanager
+import heapq
+import itertools
+import math
+import os
+import re
+import time
+
+from fastapi import HTTPException
+
+from backend.metrics import Histogram, register, scalar
+
+# Scans scored at once; the rest wait in the queue. 0 means one per CPU.
+INFERENCE_CONCURRENCY = int(os.getenv("INFERENCE_CONCURRENCY", "0")) or (os.cpu_count() or 1)
+INFERENCE_QUEUE_MAX_DEPTH = max(int(os.getenv("INFERENCE_QUEUE_MAX_DEPTH", "32")), 0)
+# Waiting scans per user (or per client IP when auth is disabled).
+INFERENCE_QUEUE_MAX_PER_USER = max(int(os.getenv("INFERENCE_QUEUE_MAX_PER_USER", "4")), 1)
+INFERENCE_QUEUE_TIMEOUT_SECONDS = max(float(os.getenv("INFERENCE_QUEUE_TIMEOUT_SECONDS", "30")), 0.0)
+RETRY_AFTER_MIN_SECONDS = 1
+RETRY_AFTER_MAX_SECONDS = 60
+# Smoothing for the running average of seconds per sentence used in Retry-After.
+RUN_RATE_SMOOTHING = 0.2
+
+QUEUE_WAIT_BUCKETS = (0.001, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+_SENTENCE_END = re.compile(r"[.!?]+(?=\s|$)")
+
+
+def estimate_sentences(text: str) -> int:
+    """Cheap stand-in for sent_tokenize's count, used only for scheduling."""
+    return max(len(_SENTENCE_END.findall(text)), 1)
+
+
+queue_wait_seconds = Histogram(
+    "inference_queue_wait_seconds",
+    "Time scans waited for an inference slot.",
+    ("outcome",),
+    QUEUE_WAIT_BUCKETS,
+)
+
+
+class _Waiter:
+    __slots__ = ("key", "cost", "future")
+
+    def __init__(self, key: str, cost: float, future: asyncio.Future):
+        self.key = key
+        self.cost = cost
+        self.future = future
+
+
+class InferenceQueue:
+    """Weighted fair queue in front of scoring.
+
+    Each scan gets a finish tag of max(virtual time, the user's last finish tag) + its
+    cost in sentences, and free slots go to the smallest tag. Short scans therefore pass
+    long ones, a user with many queued scans only delays their own later scans, and
+    virtual time advances with every dispatch so large scans are never starved.
+    Runs on the event loop; not thread-safe.
+    """
+
+    def __init__(self, slots: int, max_depth: int, max_per_user: int, timeout: float):
+        self.slots = slots
+        self.max_depth = max_depth
+        self.max_per_user = max_per_user
+        self.timeout = timeout
+        self.running = 0
+        self.depth = 0
+        self._heap = []
+        self._seq = itertools.count()
+        self._virtual_time = 0.0
+        self._last_finish: dict[str, float] = {}
+        self._queued_per_user: Counter = Counter()
+        self._seconds_per_sentence = None
+        self.admitted_total = 0
+        self.queued_total = 0
+        self.rejected_total: Counter = Counter()
+
+    def retry_after(self) -> int:
+        """Roughly how long the queued work takes to drain, in whole seconds."""
+        if not self._seconds_per_sentence:
+            return RETRY_AFTER_MIN_SECONDS
+        queued_cost = sum(w.cost for _tag, _seq, w in self._heap if not w.future.done())
+        seconds = self._seconds_per_sentence * queued_cost / self.slots
+        return int(min(max(math.ceil(seconds), RETRY_AFTER_MIN_SECONDS), RETRY_AFTER_MAX_SECONDS))
+
+    def _reject(self, reason: str, detail: str):
+        self.rejected_total[reason] += 1
+        return HTTPException(status_code=429, detail=detail, headers={"Retry-After": str(self.retry_after())})
+
+    def _tag(self, key: str, cost: float) -> float:
+        start = max(self._virtual_time, self._last_finish.get(key, 0.0))
+        finish = start + cost
+        self._last_finish[key] = finish
+        return finish
+
+    def _dispatch(self) -> None:
+        while self.running < self.slots and self._heap:
+            finish, _seq, waiter = heapq.heappop(self._heap)
+            if waiter.future.done():
+                continue
+            self.depth -= 1
+            self._queued_per_user[waiter.key] -= 1
+            if not self._queued_per_user[waiter.key]:
+                del self._queued_per_user[waiter.key]
+            self._virtual_time = max(self._virtual_time, finish - waiter.cost)
+            self.running += 1
+            waiter.future.set_result(True)
+        self._forget_idle_users()
+
+    def _forget_idle_users(self) -> None:
+        if len(self._last_finish) > 4 * (self.max_depth + self.slots):
+            self._last_finish = {
+                key: finish
+                for key, finish in self._last_finish.items()
+                if finish > self._virtual_time or key in self._queued_per_user
+            }
+
+    def _release(self, cost: float, started_at: float) -> None:
+        self.running -= 1
+        per_sentence = (time.perf_counter() - started_at) / max(cost, 1)
+        if self._seconds_per_sentence is None:
+            self._seconds_per_sentence = per_sentence
+        else:
+            self._seconds_per_sentence += RUN_RATE_SMOOTHING * (per_sentence - self._seconds_per_sentence)
+        self._dispatch()
+
+    async def _wait_for_slot(self, key: str, cost: float) -> None:
+        if self.depth >= self.max_depth:
+            raise self._reject("queue_full", "Too many scans are queued. Please retry shortly.")
+        if self._queued_per_user[key] >= self.max_per_user:
+            raise self._reject("user_limit", "You already have scans waiting. Please retry when they finish.")
+
+        waiter = _Waiter(key, cost, asyncio.get_running_loop().create_future())
+        heapq.heappush(self._heap, (self._tag(key, cost), next(self._seq), waiter))
+        self.depth += 1
+        self._queued_per_user[key] += 1
+        self.queued_total += 1
+        started_at = time.perf_counter()
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter.future), self.timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as exc:
+            if waiter.future.done() and not waiter.future.cancelled():
+                # The slot was granted as the wait ended; hand it back.
+                self.running -= 1
+                self._dispatch()
+            else:
+                waiter.future.cancel()
+                self.depth -= 1
+                self._queued_per_user[key] -= 1
+                if not self._queued_per_user[key]:
+                    del self._queued_per_user[key]
+            if isinstance(exc, asyncio.CancelledError):
+                raise
+            queue_wait_seconds.observe(time.perf_counter() - started_at, "timeout")
+            raise self._reject("timeout", "The server is busy. Please retry shortly.") from None
+        queue_wait_seconds.observe(time.perf_counter() - started_at, "admitted")
+
+    @asynccontextmanager
+    async def slot(self, key: str, cost: float):
+        """Hold an inference slot for the enclosed scoring call, or raise 429 with Retry-After."""
+        if self.running < self.slots and not self.depth:
+            # Virtual time follows uncontended work too, so idle-time usage is not held
+            # against a user once the queue fills.
+            self._virtual_time = max(self._virtual_time, self._tag(key, cost) - cost)
+            self.running += 1
+            queue_wait_seconds.observe(0.0, "admitted")
+        else:
+            await self._wait_for_slot(key, cost)
+        self.admitted_total += 1
+        started_at = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._release(cost, started_at)
+
+    def snapshot(self) -> dict:
+        return {
+            "slots": self.slots,
+            "running": self.running,
+            "queue_depth": self.depth,
+            "max_depth": self.max_depth,
+            "max_per_user": self.max_per_user,
+            "timeout_seconds": self.timeout,
+            "users_waiting": len(self._queued_per_user),
+            "admitted_total": self.admitted_total,
+            "queued_total": self.queued_total,
+            "rejected_total": dict(self.rejected_total),
+            "ms_per_sentence": round(1000 * self._seconds_per_sentence, 3) if self._seconds_per_sentence else None,
+        }
+
+    def render(self) -> list[str]:
+        lines = scalar("inference_queue_depth", "gauge", "Scans waiting for an inference slot.", self.depth)
+        lines += scalar("inference_queue_running", "gauge", "Scans being scored.", self.running)
+        lines += [
+            "# HELP inference_queue_rejected_total Scans turned away with 429.",
+            "# TYPE inference_queue_rejected_total counter",
+        ]
+        for reason in ("queue_full", "user_limit", "timeout"):
+            lines.append(f'inference_queue_rejected_total{{reason="{reason}"}} {self.rejected_total[reason]}')
+        return lines + queue_wait_seconds.render()
+
+
+inference_queue = InferenceQueue(
+    INFERENCE_CONCURRENCY, INFERENCE_QUEUE_MAX_DEPTH, INFERENCE_QUEUE_MAX_PER_USER, INFERENCE_QUEUE_TIMEOUT_SECONDS
+)
+register(inference_queue.render)
@@ -2,6 +2,8 @@ import os
 import smtplib
 from email.message import EmailMessage
 
+SMTP_TIMEOUT_SECONDS = int(os.getenv("SMTP_TIMEOUT_SECONDS", "20"))
+
 
 def _smtp_config():
     host = os.getenv("SMTP_HOST", "").strip()
@@ -13,9 +15,9 @@ def _smtp_config():
     return host, port, username, password, from_email, use_tls
 
 
-def send_admin_approval_email(to_email: str, login_email: str, login_password: str) -> None:
-    host, port, username, password, from_email, use_tls = _smtp_config()
-    if not host or not from_email:
+def build_admin_approval_message(to_email: str, login_email: str, login_password: str) -> EmailMessage:
+    _host, _port, _username, _password, from_email, _use_tls = _smtp_config()
+    if not from_email:
         raise RuntimeError("SMTP is not configured. Set SMTP_HOST and SMTP_FROM_EMAIL.")
 
     msg = EmailMessage()
@@ -29,10 +31,57 @@ def send_admin_approval_email(to_email: str, login_email: str, login_password: s
         f"Password: {login_password}\n\n"
         "Please login and change your password if needed."
     )
+    return msg
+
+
+class SmtpSender:
+    """Keeps one SMTP session open across messages and reconnects when it drops."""
+
+    def __init__(self):
+        self._server = None
+
+    def _connect(self):
+        host, port, username, password, _from_email, use_tls = _smtp_config()
+        if not host:
+            raise RuntimeError("SMTP is not configured. Set SMTP_HOST and SMTP_FROM_EMAIL.")
 
-    with smtplib.SMTP(host, port, timeout=20) as server:
-        if use_tls:
-            server.starttls()
-        if username:
-            server.login(username, password)
-        server.send_message(msg)
+        server = smtplib.SMTP(host, port, timeout=SMTP_TIMEOUT_SECONDS)
+        try:
+            if use_tls:
+                server.starttls()
+            if username:
+                server.login(username, password)
+        except Exception:
+            server.close()
+            raise
+        return server
+
+    def send(self, msg: EmailMessage) -> None:
+        if self._server is None:
+            self._server = self._connect()
+        try:
+            self._server.send_message(msg)
+        except smtplib.SMTPServerDisconnected:
+            # Idle sessions get dropped by the server; retry once on a fresh connection.
+            self._server = self._connect()
+            self._server.send_message(msg)
+        except Exception:
+            self.close()
+            raise
+
+    def close(self) -> None:
+        server, self._server = self._server, None
+        if server is None:
+            return
+        try:
+            server.quit()
+        except Exception:
+            server.close()
+
+
+def send_admin_approval_email(to_email: str, login_email: str, login_password: str) -> None:
+    sender = SmtpSender()
+    try:
+        sender.send(build_admin_approval_message(to_email, login_email, login_password))
+    finally:
+        sender.close()
@@ -0,0 +1,260 @@
+import asyncio
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+import os
+import threading
+import time
+import tracemalloc
+from typing import Optional
+
+from fastapi import HTTPException
+
+from backend.metrics import Histogram, register, scalar
+
+_MB = 1024 * 1024
+
+# "auto": a fraction of the container's cgroup memory limit; a number: MB; 0: no admission control.
+MEMORY_BUDGET_MB = os.getenv("MEMORY_BUDGET_MB", "auto").strip().lower()
+MEMORY_BUDGET_FRACTION = float(os.getenv("MEMORY_BUDGET_FRACTION", "0.85"))
+# Cost model for one scan: a fixed part (tokenizer/ONNX activations, response) plus a part
+# proportional to the text (sentence feature rows, per-sentence results). Compare with the
+# observed_to_estimated ratio in /admin/memory-stats to calibrate.
+MEMORY_REQUEST_BASE_MB = float(os.getenv("MEMORY_REQUEST_BASE_MB", "16"))
+MEMORY_BYTES_PER_CHAR = float(os.getenv("MEMORY_BYTES_PER_CHAR", "200"))
+MEMORY_BYTES_PER_UPLOAD_BYTE = float(os.getenv("MEMORY_BYTES_PER_UPLOAD_BYTE", "3"))
+# How long a request may wait for memory to free up before it gets a 503.
+MEMORY_ADMISSION_WAIT_SECONDS = max(float(os.getenv("MEMORY_ADMISSION_WAIT_SECONDS", "10")), 0.0)
+MEMORY_RETRY_AFTER_SECONDS = 5
+ADMISSION_POLL_SECONDS = 0.05
+# Stage accounting uses tracemalloc peaks instead of RSS deltas. tracemalloc slows Python
+# allocations noticeably and its peak is process-wide, so use it for single-request profiling.
+MEMORY_TRACEMALLOC = os.getenv("MEMORY_TRACEMALLOC", "0").strip().lower() in {"1", "true", "yes", "on"}
+
+MEMORY_BUCKETS = tuple(mb * _MB for mb in (1, 4, 16, 32, 64, 128, 256, 512, 1024))
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+# Per-request memory start point and peak growth, shared with threadpool workers like
+# backend.timing's per-request totals.
+_request_memory: ContextVar[Optional[dict]] = ContextVar("request_memory", default=None)
+
+if MEMORY_TRACEMALLOC and not tracemalloc.is_tracing():
+    tracemalloc.start()
+
+
+def current_rss_bytes() -> Optional[int]:
+    """Resident set size of this process, or None where /proc is unavailable."""
+    try:
+        with open("/proc/self/statm", "rb") as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def cgroup_memory_limit_bytes() -> Optional[int]:
+    for path in ("/sys/fs/cgroup/memory.max", "/sys/fs/cgroup/memory/memory.limit_in_bytes"):
+        try:
+            with open(path, encoding="ascii") as f:
+                value = f.read().strip()
+        except OSError:
+            continue
+        # cgroup v2 reports "max"; v1 reports a huge number when unlimited.
+        if value == "max" or not value.isdigit() or int(value) >= 1 << 60:
+            return None
+        return int(value)
+    return None
+
+
+def _resolve_budget() -> Optional[int]:
+    if MEMORY_BUDGET_MB == "auto":
+        limit = cgroup_memory_limit_bytes()
+        return int(limit * MEMORY_BUDGET_FRACTION) if limit else None
+    budget = float(MEMORY_BUDGET_MB or 0) * _MB
+    return int(budget) if budget > 0 else None
+
+
+def estimate_text_bytes(chars: int) -> int:
+    return int(MEMORY_REQUEST_BASE_MB * _MB + chars * MEMORY_BYTES_PER_CHAR)
+
+
+def estimate_upload_bytes(size: int) -> int:
+    return int(MEMORY_REQUEST_BASE_MB * _MB + size * MEMORY_BYTES_PER_UPLOAD_BYTE)
+
+
+def _tracing() -> bool:
+    return MEMORY_TRACEMALLOC and tracemalloc.is_tracing()
+
+
+def stage_memory_start() -> tuple:
+    if _tracing():
+        tracemalloc.reset_peak()
+        return None, tracemalloc.get_traced_memory()[0]
+    return current_rss_bytes(), None
+
+
+def stage_memory_end(start: tuple) -> Optional[int]:
+    """Memory growth over a stage (RSS delta, or tracemalloc peak); also feeds the request peak."""
+    start_rss, start_traced = start
+    request = _request_memory.get()
+    if start_traced is not None and _tracing():
+        peak = tracemalloc.get_traced_memory()[1]
+        growth = peak - start_traced
+        if request is not None and request["traced"] is not None:
+            request["peak"] = max(request["peak"], peak - request["traced"])
+    else:
+        rss = current_rss_bytes()
+        if rss is None or start_rss is None:
+            return None
+        growth = rss - start_rss
+        if request is not None and request["rss"] is not None:
+            request["peak"] = max(request["peak"], rss - request["rss"])
+    return max(growth, 0)
+
+
+request_memory_bytes = Histogram(
+    "scan_request_memory_growth_bytes",
+    "Peak memory growth of an admitted request, sampled at stage boundaries.",
+    ("kind",),
+    MEMORY_BUCKETS,
+)
+
+
+class AdmissionController:
+    """Admits work only while projected RSS stays under the budget.
+
+    The projection is the larger of the current RSS and the RSS seen when the process was
+    last idle plus every in-flight reservation, plus the new request's estimate. A request
+    is always admitted when nothing else is in flight, so one oversized document is
+    handled as before instead of being rejected forever.
+    """
+
+    def __init__(self, budget: Optional[int]):
+        self.budget = budget if current_rss_bytes() is not None else None
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.reserved = 0
+        self.idle_rss = None
+        self.admitted_total = 0
+        self.queued_total = 0
+        self.rejected_total = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self.estimated_bytes_total = 0
+        self.observed_bytes_total = 0
+
+    def _try_reserve(self, cost: int) -> bool:
+        rss = current_rss_bytes()
+        with self._lock:
+            if self.budget is not None and rss is not None and self.in_flight:
+                floor = self.idle_rss if self.idle_rss is not None else rss
+                if max(rss, floor + self.reserved) + cost > self.budget:
+                    return False
+            if not self.in_flight:
+                self.idle_rss = rss
+            self.in_flight += 1
+            self.reserved += cost
+            self.admitted_total += 1
+            return True
+
+    def _waited(self, seconds: float) -> None:
+        with self._lock:
+            self.wait_seconds_total += seconds
+            self.wait_seconds_max = max(self.wait_seconds_max, seconds)
+
+    def _queued(self) -> None:
+        with self._lock:
+            self.queued_total += 1
+
+    def _rejected(self) -> None:
+        with self._lock:
+            self.rejected_total += 1
+
+    @contextmanager
+    def _admitted(self, cost: int, kind: str):
+        traced = tracemalloc.get_traced_memory()[0] if _tracing() else None
+        request = {"rss": current_rss_bytes(), "traced": traced, "peak": 0}
+        token = _request_memory.set(request)
+        try:
+            yield
+        finally:
+            _request_memory.reset(token)
+            if request["rss"] is not None and not _tracing():
+                rss = current_rss_bytes()
+                if rss is not None:
+                    request["peak"] = max(request["peak"], rss - request["rss"])
+            request_memory_bytes.observe(request["peak"], kind)
+            with self._lock:
+                self.in_flight -= 1
+                self.reserved -= cost
+                self.estimated_bytes_total += cost
+                self.observed_bytes_total += request["peak"]
+
+    @asynccontextmanager
+    async def admit(self, cost: int, kind: str = "scan"):
+        """Wait up to MEMORY_ADMISSION_WAIT_SECONDS for room, then 503 with Retry-After."""
+        if not self._try_reserve(cost):
+            self._queued()
+            started_at = time.perf_counter()
+            while not self._try_reserve(cost):
+                if time.perf_counter() - started_at >= MEMORY_ADMISSION_WAIT_SECONDS:
+                    self._rejected()
+                    raise HTTPException(
+                        status_code=503,
+                        detail="Server is busy. Please retry shortly.",
+                        headers={"Retry-After": str(MEMORY_RETRY_AFTER_SECONDS)},
+                    )
+                await asyncio.sleep(ADMISSION_POLL_SECONDS)
+            self._waited(time.perf_counter() - started_at)
+        with self._admitted(cost, kind):
+            yield
+
+    @contextmanager
+    def admit_blocking(self, cost: int, kind: str = "job"):
+        """For background workers: waits as long as it takes instead of rejecting."""
+        if not self._try_reserve(cost):
+            self._queued()
+            started_at = time.perf_counter()
+            while not self._try_reserve(cost):
+                time.sleep(ADMISSION_POLL_SECONDS)
+            self._waited(time.perf_counter() - started_at)
+        with self._admitted(cost, kind):
+            yield
+
+    def snapshot(self) -> dict:
+        rss = current_rss_bytes()
+        with self._lock:
+            waited = self.queued_total - self.rejected_total
+            return {
+                "enabled": self.budget is not None,
+                "budget_mb": round(self.budget / _MB, 1) if self.budget else None,
+                "rss_mb": round(rss / _MB, 1) if rss is not None else None,
+                "idle_rss_mb": round(self.idle_rss / _MB, 1) if self.idle_rss else None,
+                "in_flight": self.in_flight,
+                "reserved_mb": round(self.reserved / _MB, 1),
+                "admitted_total": self.admitted_total,
+                "queued_total": self.queued_total,
+                "rejected_total": self.rejected_total,
+                "avg_wait_ms": round(1000 * self.wait_seconds_total / waited, 3) if waited > 0 else 0.0,
+                "max_wait_ms": round(1000 * self.wait_seconds_max, 3),
+                "observed_to_estimated": round(self.observed_bytes_total / self.estimated_bytes_total, 3)
+                if self.estimated_bytes_total else None,
+                "tracemalloc": _tracing(),
+            }
+
+    def render(self) -> list[str]:
+        rss = current_rss_bytes()
+        with self._lock:
+            lines = []
+            if rss is not None:
+                lines += scalar("process_resident_memory_bytes", "gauge", "Resident set size.", rss)
+            if self.budget is not None:
+                lines += scalar("memory_budget_bytes", "gauge", "RSS budget used for admission control.", self.budget)
+            lines += scalar("memory_admission_in_flight", "gauge", "Admitted requests still running.", self.in_flight)
+            lines += scalar("memory_admission_reserved_bytes", "gauge", "Estimated memory of in-flight requests.", self.reserved)
+            lines += scalar("memory_admission_admitted_total", "counter", "Requests admitted.", self.admitted_total)
+            lines += scalar("memory_admission_queued_total", "counter", "Requests that had to wait for memory.", self.queued_total)
+            lines += scalar("memory_admission_rejected_total", "counter", "Requests rejected with 503.", self.rejected_total)
+        return lines + request_memory_bytes.render()
+
+
+memory_admission = AdmissionController(_resolve_budget())
+register(memory_admission.render)
@@ -0,0 +1,65 @@
+import threading
+from typing import Callable
+
+
+class Histogram:
+    """Cumulative Prometheus-style histogram keyed by label values."""
+
+    def __init__(self, name: str, help_text: str, labelnames: tuple[str, ...], buckets: tuple[float, ...]):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = labelnames
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._series: dict[tuple, list] = {}
+
+    def observe(self, value: float, *labelvalues: str) -> None:
+        with self._lock:
+            series = self._series.get(labelvalues)
+            if series is None:
+                series = self._series[labelvalues] = [[0] * len(self.buckets), 0.0, 0]
+            counts = series[0]
+            for idx, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[idx] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = {labels: (list(counts), total, count) for labels, (counts, total, count) in self._series.items()}
+
+        for labelvalues, (counts, total, count) in sorted(series.items()):
+            labels = [f'{name}="{value}"' for name, value in zip(self.labelnames, labelvalues) if value]
+            for bound, bucket_count in zip(self.buckets, counts):
+                lines.append(f"{self.name}_bucket{{{_label_str(labels, bound)}}} {bucket_count}")
+            lines.append(f"{self.name}_bucket{{{_label_str(labels, '+Inf')}}} {count}")
+            suffix = f"{{{','.join(labels)}}}" if labels else ""
+            lines.append(f"{self.name}_sum{suffix} {total:.6f}")
+            lines.append(f"{self.name}_count{suffix} {count}")
+        return lines
+
+
+def _label_str(labels: list[str], le) -> str:
+    return ",".join(labels + [f'le="{le}"'])
+
+
+def scalar(name: str, kind: str, help_text: str, value) -> list[str]:
+    """A single unlabelled gauge or counter."""
+    return [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}", f"{name} {value}"]
+
+
+_renderers: list[Callable[[], list[str]]] = []
+
+
+def register(render: Callable[[], list[str]]) -> None:
+    """Add a source of exposition lines to /metrics."""
+    _renderers.append(render)
+
+
+def render_metrics() -> str:
+    lines = []
+    for render in _renderers:
+        lines.extend(render())
+    return "\n".join(lines) + "\n"
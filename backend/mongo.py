@@ -1,9 +1,12 @@
 from datetime import datetime
 import os
 from pathlib import Path
+import threading
 
 from bson import ObjectId
+from gridfs import GridFSBucket
 from pymongo import ASCENDING, DESCENDING, MongoClient
+from pymongo.monitoring import ConnectionPoolListener
 
 from backend.crypto import hash_password
 
@@ -33,20 +36,125 @@ if not MONGO_URI:
     )
 
 MONGO_DB_NAME = os.getenv("MONGO_DB_NAME", "ai_checker")
-
-client = MongoClient(MONGO_URI, serverSelectionTimeoutMS=10000)
+MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", "50"))
+MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", "0"))
+MONGO_WAIT_QUEUE_TIMEOUT_MS = int(os.getenv("MONGO_WAIT_QUEUE_TIMEOUT_MS", "5000"))
+MONGO_READ_PREFERENCE = os.getenv("MONGO_READ_PREFERENCE", "primary").strip() or "primary"
+
+
+class PoolMetricsListener(ConnectionPoolListener):
+    """Tracks connection checkouts for one client so pool pressure is observable."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self.open_connections = 0
+        self.checked_out = 0
+        self.checkouts_total = 0
+        self.checkout_failures_total = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "open_connections": self.open_connections,
+                "checked_out": self.checked_out,
+                "checkouts_total": self.checkouts_total,
+                "checkout_failures_total": self.checkout_failures_total,
+                "avg_wait_ms": round(1000 * self.wait_seconds_total / self.checkouts_total, 3)
+                if self.checkouts_total else 0.0,
+                "max_wait_ms": round(1000 * self.wait_seconds_max, 3),
+            }
+
+    def connection_checked_out(self, event):
+        wait = float(getattr(event, "duration", 0.0) or 0.0)
+        with self._lock:
+            self.checked_out += 1
+            self.checkouts_total += 1
+            self.wait_seconds_total += wait
+            self.wait_seconds_max = max(self.wait_seconds_max, wait)
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self.checked_out = max(self.checked_out - 1, 0)
+
+    def connection_check_out_failed(self, event):
+        with self._lock:
+            self.checkout_failures_total += 1
+
+    def connection_created(self, event):
+        with self._lock:
+            self.open_connections += 1
+
+    def connection_closed(self, event):
+        with self._lock:
+            self.open_connections = max(self.open_connections - 1, 0)
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_ready(self, event):
+        pass
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+
+def mongo_client_options(listener: PoolMetricsListener) -> dict:
+    """Pool settings shared by the sync and async clients."""
+    return {
+        "serverSelectionTimeoutMS": 10000,
+        "maxPoolSize": MONGO_MAX_POOL_SIZE,
+        "minPoolSize": MONGO_MIN_POOL_SIZE,
+        "waitQueueTimeoutMS": MONGO_WAIT_QUEUE_TIMEOUT_MS,
+        "readPreference": MONGO_READ_PREFERENCE,
+        "event_listeners": [listener],
+    }
+
+
+pool_listeners = {"sync": PoolMetricsListener("sync")}
+
+client = MongoClient(MONGO_URI, **mongo_client_options(pool_listeners["sync"]))
 db = client[MONGO_DB_NAME]
 
 users_collection = db["users"]
 scan_logs_collection = db["scan_logs"]
+scan_sentences_collection = db["scan_sentences"]
 admin_requests_collection = db["admin_requests"]
+usage_rollups_collection = db["usage_rollups"]
+email_outbox_collection = db["email_outbox"]
+scan_jobs_collection = db["scan_jobs"]
+scan_job_items_collection = db["scan_job_items"]
+# Zip archives of batch jobs, kept until their last entry has been extracted and scored.
+scan_job_archives = GridFSBucket(db, bucket_name="scan_job_archives")
 
 
 def ensure_collections_and_indexes() -> None:
     users_collection.create_index([("email", ASCENDING)], unique=True)
     scan_logs_collection.create_index([("uid", ASCENDING), ("timestamp", DESCENDING)])
+    scan_sentences_collection.create_index([("scan_id", ASCENDING), ("start", ASCENDING)])
+    scan_sentences_collection.create_index([("uid", ASCENDING)])
     admin_requests_collection.create_index([("email", ASCENDING), ("status", ASCENDING)])
     admin_requests_collection.create_index([("status", ASCENDING), ("requested_at", DESCENDING)])
+    usage_rollups_collection.create_index(
+        [("scope", ASCENDING), ("owner_id", ASCENDING), ("day", ASCENDING)],
+        unique=True,
+    )
+    email_outbox_collection.create_index([("status", ASCENDING), ("next_attempt_at", ASCENDING)])
+    email_outbox_collection.create_index([("created_at", DESCENDING)])
+    scan_jobs_collection.create_index([("uid", ASCENDING), ("created_at", DESCENDING)])
+    scan_job_items_collection.create_index([("job_id", ASCENDING), ("index", ASCENDING)], unique=True)
+    scan_job_items_collection.create_index([("status", ASCENDING), ("queued_at", ASCENDING)])
 
 
 def ensure_default_admin() -> None:
@@ -82,3 +190,7 @@ def get_user_by_id(user_id: str):
     except Exception:
         return None
     return users_collection.find_one({"_id": oid})
+
+
+def pool_metrics_snapshot() -> dict:
+    return {name: listener.snapshot() for name, listener in pool_listeners.items()}
@@ -0,0 +1,192 @@
+from datetime import datetime, timedelta
+import logging
+import os
+import threading
+import time
+from typing import Optional
+
+from bson import ObjectId
+from pymongo import ASCENDING, ReturnDocument
+
+from backend.mailer import SmtpSender, build_admin_approval_message
+from backend.mongo import admin_requests_collection, email_outbox_collection
+
+logger = logging.getLogger("uvicorn.error")
+
+OUTBOX_SENDER_ENABLED = os.getenv("OUTBOX_SENDER_ENABLED", "1").strip().lower() in {"1", "true", "yes", "on"}
+OUTBOX_POLL_SECONDS = float(os.getenv("OUTBOX_POLL_SECONDS", "5"))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "6"))
+OUTBOX_BACKOFF_BASE_SECONDS = float(os.getenv("OUTBOX_BACKOFF_BASE_SECONDS", "30"))
+OUTBOX_BACKOFF_MAX_SECONDS = 3600
+# A claimed message whose sender died is picked up again once its lease runs out.
+OUTBOX_LEASE_SECONDS = 120
+# Close the reused SMTP session after this long without traffic.
+OUTBOX_SMTP_IDLE_SECONDS = 60
+
+KIND_ADMIN_APPROVAL = "admin_approval"
+
+
+def admin_approval_outbox_doc(request_id: ObjectId, to_email: str, login_email: str, login_password: str) -> dict:
+    now = datetime.utcnow()
+    return {
+        "kind": KIND_ADMIN_APPROVAL,
+        "request_id": request_id,
+        "to_email": to_email,
+        "payload": {"login_email": login_email, "login_password": login_password},
+        "status": "pending",
+        "attempts": 0,
+        "next_attempt_at": now,
+        "created_at": now,
+        "last_error": None,
+    }
+
+
+def _build_message(doc: dict):
+    payload = doc.get("payload") or {}
+    if doc.get("kind") == KIND_ADMIN_APPROVAL:
+        return build_admin_approval_message(
+            to_email=doc["to_email"],
+            login_email=payload.get("login_email", ""),
+            login_password=payload.get("login_password", ""),
+        )
+    raise ValueError(f"Unknown outbox message kind: {doc.get('kind')!r}")
+
+
+def _claim_next(now: datetime) -> Optional[dict]:
+    return email_outbox_collection.find_one_and_update(
+        {
+            "$or": [
+                {"status": "pending", "next_attempt_at": {"$lte": now}},
+                {"status": "sending", "lease_expires_at": {"$lte": now}},
+            ]
+        },
+        {
+            "$set": {"status": "sending", "lease_expires_at": now + timedelta(seconds=OUTBOX_LEASE_SECONDS)},
+            "$inc": {"attempts": 1},
+        },
+        sort=[("next_attempt_at", ASCENDING)],
+        return_document=ReturnDocument.AFTER,
+    )
+
+
+def _update_request_status(doc: dict, fields: dict) -> None:
+    if doc.get("request_id") and doc.get("kind") == KIND_ADMIN_APPROVAL:
+        admin_requests_collection.update_one({"_id": doc["request_id"]}, {"$set": fields})
+
+
+def _mark_sent(doc: dict) -> None:
+    now = datetime.utcnow()
+    email_outbox_collection.update_one(
+        {"_id": doc["_id"]},
+        {
+            "$set": {"status": "sent", "sent_at": now, "last_error": None},
+            # Credentials only need to live until delivery.
+            "$unset": {"payload.login_password": "", "lease_expires_at": ""},
+        },
+    )
+    _update_request_status(
+        doc,
+        {"approval_email_status": "sent", "approval_email_sent": True, "approval_email_error": None},
+    )
+
+
+def _mark_failed(doc: dict, exc: Exception) -> None:
+    now = datetime.utcnow()
+    attempts = int(doc.get("attempts", 1) or 1)
+    error = str(exc) or exc.__class__.__name__
+
+    if attempts >= OUTBOX_MAX_ATTEMPTS:
+        email_outbox_collection.update_one(
+            {"_id": doc["_id"]},
+            {
+                "$set": {"status": "failed", "failed_at": now, "last_error": error},
+                "$unset": {"payload.login_password": "", "lease_expires_at": ""},
+            },
+        )
+        _update_request_status(
+            doc,
+            {"approval_email_status": "failed", "approval_email_sent": False, "approval_email_error": error},
+        )
+        return
+
+    backoff = min(OUTBOX_BACKOFF_BASE_SECONDS * (2 ** (attempts - 1)), OUTBOX_BACKOFF_MAX_SECONDS)
+    email_outbox_collection.update_one(
+        {"_id": doc["_id"]},
+        {
+            "$set": {
+                "status": "pending",
+                "next_attempt_at": now + timedelta(seconds=backoff),
+                "last_error": error,
+            },
+            "$unset": {"lease_expires_at": ""},
+        },
+    )
+    _update_request_status(doc, {"approval_email_status": "retrying", "approval_email_error": error})
+
+
+def process_outbox_once(sender: Optional[SmtpSender] = None, limit: int = 50) -> int:
+    """Send every due outbox message (up to ``limit``). Returns how many were attempted."""
+    own_sender = sender is None
+    sender = sender or SmtpSender()
+    processed = 0
+    try:
+        while processed < limit:
+            doc = _claim_next(datetime.utcnow())
+            if not doc:
+                break
+            processed += 1
+            try:
+                sender.send(_build_message(doc))
+            except Exception as exc:
+                logger.warning("Outbox delivery failed for %s (attempt %s): %r", doc["_id"], doc.get("attempts"), exc)
+                _mark_failed(doc, exc)
+            else:
+                _mark_sent(doc)
+    finally:
+        if own_sender:
+            sender.close()
+    return processed
+
+
+class OutboxSender:
+    """Background thread that drains the email outbox over a reused SMTP session."""
+
+    def __init__(self):
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._thread = None
+        self._smtp = SmtpSender()
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="email-outbox", daemon=True)
+        self._thread.start()
+
+    def wake(self) -> None:
+        self._wake.set()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout)
+        self._smtp.close()
+
+    def _run(self) -> None:
+        last_activity = time.monotonic()
+        while not self._stop.is_set():
+            try:
+                if process_outbox_once(self._smtp):
+                    last_activity = time.monotonic()
+                elif time.monotonic() - last_activity > OUTBOX_SMTP_IDLE_SECONDS:
+                    self._smtp.close()
+            except Exception as exc:
+                logger.warning("Outbox sender loop error: %r", exc)
+                self._smtp.close()
+            self._wake.wait(OUTBOX_POLL_SECONDS)
+            self._wake.clear()
+
+
+outbox_sender = OutboxSender()
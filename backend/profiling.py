@@ -0,0 +1,218 @@
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+import functools
+import itertools
+import logging
+import os
+from pathlib import Path
+import re
+import secrets
+import sys
+import threading
+import time
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+# Profile one in every N scan requests; 0 disables sampling by count.
+PROFILE_SAMPLE_EVERY = max(int(os.getenv("PROFILE_SAMPLE_EVERY", "0")), 0)
+# Keep the profile of any scan slower than this; 0 disables. When set, every scan is
+# sampled (cheaply, at PROFILE_INTERVAL_MS) and only slow ones are written.
+PROFILE_SLOW_MS = max(float(os.getenv("PROFILE_SLOW_MS", "0")), 0.0)
+PROFILE_INTERVAL_MS = max(float(os.getenv("PROFILE_INTERVAL_MS", "10")), 1.0)
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles").strip() or "profiles"
+PROFILE_MAX_FILES = max(int(os.getenv("PROFILE_MAX_FILES", "100")), 1)
+
+DUMP_SUFFIX = ".folded"
+_DUMP_NAME = re.compile(r"^(?P<ts>\d{8}T\d{6})-(?P<endpoint>[a-z-]+)-(?P<ms>\d+)ms-(?P<samples>\d+)s-[0-9a-f]+\.folded$")
+
+_current_profile: ContextVar[Optional["_Profile"]] = ContextVar("current_profile", default=None)
+
+
+class _Profile:
+    def __init__(self, endpoint: str, sampled: bool):
+        self.endpoint = endpoint
+        self.sampled = sampled
+        self.threads: set[int] = set()
+        self.stacks: Counter = Counter()
+        self.started_at = time.perf_counter()
+
+
+def _short_path(filename: str) -> str:
+    marker = "site-packages" + os.sep
+    if marker in filename:
+        return filename.split(marker, 1)[1]
+    try:
+        return str(Path(filename).resolve().relative_to(PROJECT_ROOT))
+    except ValueError:
+        return Path(filename).name
+
+
+@functools.lru_cache(maxsize=8192)
+def _frame_label(code) -> str:
+    return f"{code.co_name} ({_short_path(code.co_filename)}:{code.co_firstlineno})"
+
+
+def _collapse(frame) -> str:
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame.f_code))
+        frame = frame.f_back
+    return ";".join(reversed(labels))
+
+
+class RequestProfiler:
+    """Statistical profiler for the worker threads serving selected scan requests.
+
+    A background thread reads the stacks of registered threads every PROFILE_INTERVAL_MS
+    and counts them in collapsed-stack form (one ``frame;frame;frame count`` line per
+    distinct stack), which flamegraph.pl and speedscope open directly. Only threads
+    running a ``profiled`` callable for a selected request are sampled, so concurrent
+    requests do not mix. Work in other processes (the PDF page pool) is not captured.
+    """
+
+    def __init__(self):
+        self.enabled = PROFILE_SAMPLE_EVERY > 0 or PROFILE_SLOW_MS > 0
+        self.directory = Path(PROFILE_DIR)
+        if not self.directory.is_absolute():
+            self.directory = PROJECT_ROOT / self.directory
+        self._counter = itertools.count(1)
+        self._lock = threading.Lock()
+        self._active: set[_Profile] = set()
+        self._wake = threading.Event()
+        self._thread = None
+        self.written_total = 0
+
+    def _ensure_sampler(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        interval = PROFILE_INTERVAL_MS / 1000
+        while True:
+            # Sampling under the lock means a finished request's counts are final once it
+            # has left _active.
+            with self._lock:
+                idle = not self._active
+                if not idle:
+                    frames = sys._current_frames()
+                    for profile in self._active:
+                        for ident in list(profile.threads):
+                            frame = frames.get(ident)
+                            if frame is not None:
+                                profile.stacks[_collapse(frame)] += 1
+                    del frames
+            if idle:
+                self._wake.wait()
+                self._wake.clear()
+            else:
+                time.sleep(interval)
+
+    @contextmanager
+    def request(self, endpoint: str):
+        """Profile the enclosed request if it is selected; write the dump when it finishes."""
+        if not self.enabled:
+            yield
+            return
+        sampled = PROFILE_SAMPLE_EVERY > 0 and next(self._counter) % PROFILE_SAMPLE_EVERY == 0
+        if not sampled and PROFILE_SLOW_MS <= 0:
+            yield
+            return
+
+        profile = _Profile(endpoint, sampled)
+        token = _current_profile.set(profile)
+        with self._lock:
+            self._active.add(profile)
+        self._ensure_sampler()
+        self._wake.set()
+        try:
+            yield
+        finally:
+            _current_profile.reset(token)
+            with self._lock:
+                self._active.discard(profile)
+            elapsed_ms = (time.perf_counter() - profile.started_at) * 1000
+            if profile.stacks and (profile.sampled or (PROFILE_SLOW_MS > 0 and elapsed_ms >= PROFILE_SLOW_MS)):
+                try:
+                    self._write(profile, elapsed_ms)
+                except OSError as exc:
+                    logger.warning("Could not write profile: %r", exc)
+
+    def profiled(self, fn: Callable) -> Callable:
+        """Wrap a callable headed for the threadpool so its thread is sampled for this request."""
+        profile = _current_profile.get()
+        if profile is None:
+            return fn
+
+        @functools.wraps(fn)
+        def run(*args, **kwargs):
+            ident = threading.get_ident()
+            profile.threads.add(ident)
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                profile.threads.discard(ident)
+
+        return run
+
+    def _write(self, profile: _Profile, elapsed_ms: float) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        samples = sum(profile.stacks.values())
+        name = (
+            f"{datetime.utcnow():%Y%m%dT%H%M%S}-{profile.endpoint}-{int(elapsed_ms)}ms-{samples}s-"
+            f"{secrets.token_hex(3)}{DUMP_SUFFIX}"
+        )
+        lines = [f"{stack} {count}" for stack, count in profile.stacks.most_common()]
+        (self.directory / name).write_text("\n".join(lines) + "\n", encoding="utf-8")
+        with self._lock:
+            self.written_total += 1
+
+        # Timestamped names sort oldest first.
+        dumps = sorted(self.directory.glob(f"*{DUMP_SUFFIX}"))
+        for old in dumps[: max(len(dumps) - PROFILE_MAX_FILES, 0)]:
+            old.unlink(missing_ok=True)
+
+    def list_dumps(self) -> list[dict]:
+        dumps = []
+        if not self.directory.exists():
+            return dumps
+        for path in sorted(self.directory.glob(f"*{DUMP_SUFFIX}"), reverse=True):
+            match = _DUMP_NAME.match(path.name)
+            if not match:
+                continue
+            dumps.append(
+                {
+                    "name": path.name,
+                    "endpoint": match["endpoint"],
+                    "duration_ms": int(match["ms"]),
+                    "samples": int(match["samples"]),
+                    "created_at": datetime.strptime(match["ts"], "%Y%m%dT%H%M%S").isoformat(),
+                    "bytes": path.stat().st_size,
+                }
+            )
+        return dumps
+
+    def dump_path(self, name: str) -> Optional[Path]:
+        """Path of a dump by its listed name; None for unknown or malformed names."""
+        if not _DUMP_NAME.match(name):
+            return None
+        path = self.directory / name
+        return path if path.is_file() else None
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "sample_every": PROFILE_SAMPLE_EVERY,
+                "slow_ms": PROFILE_SLOW_MS,
+                "interval_ms": PROFILE_INTERVAL_MS,
+                "active": len(self._active),
+                "written_total": self.written_total,
+            }
+
+
+request_profiler = RequestProfiler()
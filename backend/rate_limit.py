@@ -0,0 +1,117 @@
+from collections import deque
+import ipaddress
+import math
+import os
+import threading
+import time
+
+from fastapi import HTTPException, Request
+
+LOGIN_WINDOW_SECONDS = int(os.getenv("LOGIN_WINDOW_SECONDS", "300"))
+LOGIN_ATTEMPTS_PER_EMAIL = int(os.getenv("LOGIN_ATTEMPTS_PER_EMAIL", "10"))
+# A whole classroom can sit behind one NAT address, so the per-IP budget is generous.
+LOGIN_ATTEMPTS_PER_IP = int(os.getenv("LOGIN_ATTEMPTS_PER_IP", "300"))
+_MAX_TRACKED_KEYS = 50000
+# Proxies allowed to name the caller in X-Forwarded-For / X-Real-IP: comma-separated IPs or
+# CIDRs, or "*" for any peer. Empty (default) ignores those headers; any client can forge them.
+TRUSTED_PROXIES = os.getenv("TRUSTED_PROXIES", "").strip()
+
+
+def _parse_trusted_proxies(value: str) -> list:
+    networks = []
+    for part in value.split(","):
+        part = part.strip()
+        if part and part != "*":
+            networks.append(ipaddress.ip_network(part, strict=False))
+    return networks
+
+
+_TRUST_ALL_PROXIES = "*" in [p.strip() for p in TRUSTED_PROXIES.split(",")]
+_TRUSTED_NETWORKS = _parse_trusted_proxies(TRUSTED_PROXIES)
+
+
+class SlidingWindowLimiter:
+    """In-process sliding-window attempt counter (per worker, not shared across instances)."""
+
+    def __init__(self, limit: int, window_seconds: int):
+        self.limit = limit
+        self.window_seconds = window_seconds
+        self._lock = threading.Lock()
+        self._hits: dict[str, deque] = {}
+
+    def _prune(self, hits: deque, now: float) -> None:
+        cutoff = now - self.window_seconds
+        while hits and hits[0] <= cutoff:
+            hits.popleft()
+
+    def hit(self, key: str) -> float:
+        """Record an attempt. Returns 0 if allowed, else seconds until the next slot frees up."""
+        if self.limit <= 0 or not key:
+            return 0.0
+
+        now = time.monotonic()
+        with self._lock:
+            hits = self._hits.get(key)
+            if hits is None:
+                if len(self._hits) >= _MAX_TRACKED_KEYS:
+                    self._evict_idle(now)
+                hits = self._hits[key] = deque()
+            self._prune(hits, now)
+            if len(hits) >= self.limit:
+                return max(hits[0] + self.window_seconds - now, 0.0) or 1.0
+            hits.append(now)
+            return 0.0
+
+    def reset(self, key: str) -> None:
+        with self._lock:
+            self._hits.pop(key, None)
+
+    def _evict_idle(self, now: float) -> None:
+        for key in list(self._hits):
+            hits = self._hits[key]
+            self._prune(hits, now)
+            if not hits:
+                del self._hits[key]
+
+    def tracked_keys(self) -> int:
+        with self._lock:
+            return len(self._hits)
+
+
+login_email_limiter = SlidingWindowLimiter(LOGIN_ATTEMPTS_PER_EMAIL, LOGIN_WINDOW_SECONDS)
+login_ip_limiter = SlidingWindowLimiter(LOGIN_ATTEMPTS_PER_IP, LOGIN_WINDOW_SECONDS)
+
+
+def _in_trusted_networks(host: str) -> bool:
+    try:
+        address = ipaddress.ip_address(host)
+    except ValueError:
+        return False
+    return any(address in network for network in _TRUSTED_NETWORKS)
+
+
+def client_ip(request: Request) -> str:
+    peer = request.client.host if request.client else ""
+    if not peer or not (_TRUST_ALL_PROXIES or _in_trusted_networks(peer)):
+        return peer
+    # Walk X-Forwarded-For from the right: each trusted proxy appended the address it saw,
+    # so the first entry outside TRUSTED_PROXIES is the caller. Anything left of it is
+    # client-supplied. With "*" only the peer is trusted, so that is the last entry.
+    forwarded = [p.strip() for p in (request.headers.get("x-forwarded-for") or "").split(",") if p.strip()]
+    for hop in reversed(forwarded):
+        if not _in_trusted_networks(hop):
+            return hop
+    if forwarded:
+        return forwarded[0]
+    # Nginx (DEPLOY.md) overwrites X-Real-IP with the address it saw.
+    return (request.headers.get("x-real-ip") or "").strip() or peer
+
+
+def enforce_login_attempt_limits(email: str, ip: str) -> None:
+    retry_after = max(login_ip_limiter.hit(ip), login_email_limiter.hit(email))
+    if retry_after > 0:
+        raise HTTPException(
+            status_code=429,
+            detail="Too many login attempts. Please try again later.",
+            headers={"Retry-After": str(math.ceil(retry_after))},
+        )
@@ -0,0 +1,406 @@
+from datetime import datetime, timedelta
+import io
+import logging
+import os
+import threading
+from typing import BinaryIO, Callable, Optional
+import zipfile
+
+from bson import ObjectId
+from fastapi import HTTPException
+from gridfs.errors import NoFile
+from pymongo import ASCENDING, ReturnDocument
+
+from backend.memory import estimate_upload_bytes, memory_admission
+from backend.mongo import scan_job_archives, scan_job_items_collection, scan_jobs_collection, users_collection
+from backend.uploads import MAX_UPLOAD_BYTES
+from extraction.files import extract_text_cached
+
+logger = logging.getLogger("uvicorn.error")
+
+SCAN_JOBS_ENABLED = os.getenv("SCAN_JOBS_ENABLED", "1").strip().lower() in {"1", "true", "yes", "on"}
+SCAN_JOB_WORKERS = max(int(os.getenv("SCAN_JOB_WORKERS", "1")), 1)
+SCAN_JOB_POLL_SECONDS = float(os.getenv("SCAN_JOB_POLL_SECONDS", "2"))
+SCAN_JOB_MAX_ITEMS = int(os.getenv("SCAN_JOB_MAX_ITEMS", "50"))
+# A claimed item whose worker died is picked up again once its lease runs out. A live worker
+# renews the lease while it waits for memory or scores, however long that takes.
+SCAN_JOB_LEASE_SECONDS = 600
+SCAN_JOB_LEASE_RENEW_SECONDS = SCAN_JOB_LEASE_SECONDS / 4
+
+JOB_FINAL_STATUSES = {"completed", "cancelled"}
+ITEM_FINAL_STATUSES = {"done", "failed", "cancelled"}
+
+
+def new_job_docs(
+    user_id: str,
+    admin_id: Optional[str],
+    source: str,
+    items: list[dict],
+    archive_id: Optional[ObjectId] = None,
+) -> tuple[dict, list[dict]]:
+    """Build a job document and its item documents.
+
+    ``items`` are ``{"name", "text"}``, ``{"name", "entry"}`` for a file in the zip stored
+    as ``archive_id`` (extracted by the worker), or ``{"name", "error"}`` for entries
+    rejected at submission; those are stored as already failed and never charged.
+    """
+    now = datetime.utcnow()
+    job_id = ObjectId()
+    item_docs = []
+    for index, item in enumerate(items):
+        error = item.get("error")
+        doc = {
+            "job_id": job_id,
+            "index": index,
+            "name": item.get("name") or f"item-{index + 1}",
+            "status": "failed" if error else "queued",
+            "queued_at": now,
+            "charged": False,
+            "result": None,
+            "error": error,
+        }
+        if not error and "entry" in item:
+            doc["archive_id"] = archive_id
+            doc["entry"] = item["entry"]
+        elif not error:
+            doc["text"] = item["text"]
+            doc["characters"] = len(item["text"])
+        item_docs.append(doc)
+
+    failed = sum(1 for doc in item_docs if doc["status"] == "failed")
+    job = {
+        "_id": job_id,
+        "uid": user_id,
+        "admin_id": admin_id,
+        "source": source,
+        "archive_id": archive_id,
+        "status": "completed" if failed == len(item_docs) else "queued",
+        "total": len(item_docs),
+        "completed": 0,
+        "failed": failed,
+        "cancelled": 0,
+        "created_at": now,
+        "started_at": None,
+        "finished_at": now if failed == len(item_docs) else None,
+    }
+    return job, item_docs
+
+
+def store_job_archive(stream: BinaryIO) -> ObjectId:
+    """Copy an uploaded zip into GridFS for the workers to read entries from."""
+    stream.seek(0)
+    return scan_job_archives.upload_from_stream("scan-job.zip", stream)
+
+
+def _drop_job_archive(job: dict) -> None:
+    if not job.get("archive_id"):
+        return
+    try:
+        scan_job_archives.delete(job["archive_id"])
+    except NoFile:
+        pass
+
+
+def _extract_entry(item: dict) -> str:
+    """Text of a zip item, read from the stored archive under memory admission.
+
+    Raises HTTPException for files that are too large or cannot be extracted.
+    """
+    with scan_job_archives.open_download_stream(item["archive_id"]) as stored, zipfile.ZipFile(stored) as archive:
+        info = archive.getinfo(item["entry"])
+        with memory_admission.admit_blocking(estimate_upload_bytes(info.file_size), kind="extract"):
+            with archive.open(info) as fh:
+                # Declared sizes were checked at submission; the read is capped in case they lie.
+                data = fh.read(MAX_UPLOAD_BYTES + 1)
+            if len(data) > MAX_UPLOAD_BYTES:
+                raise HTTPException(status_code=413, detail="File too large")
+            _digest, text = extract_text_cached(item["name"], io.BytesIO(data))
+    return text
+
+
+def _claim_next(now: datetime) -> Optional[dict]:
+    return scan_job_items_collection.find_one_and_update(
+        {
+            "$or": [
+                {"status": "queued"},
+                {"status": "running", "lease_expires_at": {"$lte": now}},
+            ]
+        },
+        {
+            "$set": {
+                "status": "running",
+                "started_at": now,
+                "lease_expires_at": now + timedelta(seconds=SCAN_JOB_LEASE_SECONDS),
+                # Each claim gets its own token; writes for the item only land while it still matches.
+                "claim": ObjectId(),
+            }
+        },
+        sort=[("queued_at", ASCENDING), ("index", ASCENDING)],
+        return_document=ReturnDocument.AFTER,
+    )
+
+
+class _LeaseLost(Exception):
+    """The item was reclaimed by another worker; this one must stop writing to it."""
+
+
+def _held(item: dict) -> dict:
+    return {"_id": item["_id"], "status": "running", "claim": item["claim"]}
+
+
+class _ItemLease:
+    """Renews a claimed item's lease in the background until the worker is done with it."""
+
+    def __init__(self, item: dict):
+        self.item = item
+        self.lost = threading.Event()
+        self._done = threading.Event()
+        self._thread = threading.Thread(target=self._renew, name=f"scan-lease-{item['_id']}", daemon=True)
+
+    def __enter__(self) -> "_ItemLease":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._done.set()
+        self._thread.join()
+
+    def check(self) -> None:
+        if self.lost.is_set():
+            raise _LeaseLost()
+
+    def _renew(self) -> None:
+        while not self._done.wait(SCAN_JOB_LEASE_RENEW_SECONDS):
+            try:
+                renewed = scan_job_items_collection.update_one(
+                    _held(self.item),
+                    {"$set": {"lease_expires_at": datetime.utcnow() + timedelta(seconds=SCAN_JOB_LEASE_SECONDS)}},
+                ).matched_count
+            except Exception as exc:
+                # Retried on the next tick; the lease has several renewals of slack.
+                logger.warning("Scan job lease renewal failed for item %s: %r", self.item["_id"], exc)
+                continue
+            if not renewed:
+                self.lost.set()
+                return
+
+
+def _charge_token(item: dict, user_id: str) -> Optional[int]:
+    """Take one token for ``item``; returns the balance before charging, or None if out of tokens.
+
+    Raises ``_LeaseLost`` (after refunding) if the item was reclaimed while charging.
+    """
+    if item.get("charged"):
+        # Reclaimed after a lease expiry; the token was already taken, so the current balance
+        # is what is left after this item.
+        user_doc = users_collection.find_one({"_id": ObjectId(user_id)}, {"tokens": 1})
+        return int((user_doc or {}).get("tokens", 0)) + 1
+
+    user_doc = users_collection.find_one_and_update(
+        {"_id": ObjectId(user_id), "tokens": {"$gt": 0}},
+        {"$inc": {"tokens": -1}},
+        return_document=ReturnDocument.BEFORE,
+    )
+    if not user_doc:
+        return None
+
+    marked = scan_job_items_collection.update_one(_held(item), {"$set": {"charged": True}}).matched_count
+    if not marked:
+        users_collection.update_one({"_id": ObjectId(user_id)}, {"$inc": {"tokens": 1}})
+        raise _LeaseLost()
+    return user_doc.get("tokens", 0)
+
+
+def _refund_token(item: dict, user_id: str) -> None:
+    # Clearing the flag first means only the claim holder refunds, and only once.
+    cleared = scan_job_items_collection.update_one(
+        {**_held(item), "charged": True},
+        {"$set": {"charged": False}},
+    ).modified_count
+    if cleared:
+        users_collection.update_one({"_id": ObjectId(user_id)}, {"$inc": {"tokens": 1}})
+
+
+def _finish_item(item: dict, status: str, result: Optional[dict] = None, error: Optional[str] = None) -> None:
+    finished = scan_job_items_collection.update_one(
+        _held(item),
+        {
+            "$set": {"status": status, "result": result, "error": error, "finished_at": datetime.utcnow()},
+            # The text is on the scan log once scored; the job only keeps the result.
+            "$unset": {"text": "", "lease_expires_at": "", "claim": ""},
+        },
+    ).matched_count
+    if not finished:
+        # Another worker reclaimed the item and will count it.
+        logger.warning("Scan job item %s was reclaimed; dropping this worker's %s result", item["_id"], status)
+        return
+    counter = "completed" if status == "done" else status
+    job = scan_jobs_collection.find_one_and_update(
+        {"_id": item["job_id"]},
+        {"$inc": {counter: 1}},
+        return_document=ReturnDocument.AFTER,
+    )
+    if job and job["completed"] + job["failed"] + job["cancelled"] >= job["total"]:
+        scan_jobs_collection.update_one(
+            {"_id": job["_id"], "status": {"$nin": list(JOB_FINAL_STATUSES)}},
+            {"$set": {"status": "completed", "finished_at": datetime.utcnow()}},
+        )
+        _drop_job_archive(job)
+
+
+def process_item(item: dict, predict: Callable[..., dict], memory_bytes: Callable[[str], int]) -> None:
+    with _ItemLease(item) as lease:
+        try:
+            _process_claimed(item, lease, predict, memory_bytes)
+        except _LeaseLost:
+            logger.warning("Scan job item %s lost its lease to another worker; stopping", item["_id"])
+
+
+def _process_claimed(
+    item: dict,
+    lease: _ItemLease,
+    predict: Callable[..., dict],
+    memory_bytes: Callable[[str], int],
+) -> None:
+    job = scan_jobs_collection.find_one({"_id": item["job_id"]})
+    if not job:
+        scan_job_items_collection.delete_one({"_id": item["_id"]})
+        return
+
+    if job["status"] == "queued":
+        scan_jobs_collection.update_one(
+            {"_id": job["_id"], "status": "queued"},
+            {"$set": {"status": "running", "started_at": datetime.utcnow()}},
+        )
+
+    text = item.get("text") or ""
+    if item.get("entry"):
+        # Extracted before charging, so unreadable files never cost a token.
+        try:
+            text = _extract_entry(item).strip()
+        except HTTPException as exc:
+            _finish_item(item, "failed", error=str(exc.detail))
+            return
+        except Exception as exc:
+            logger.warning("Scan job item %s could not be read: %r", item["_id"], exc)
+            _finish_item(item, "failed", error="Unable to read file")
+            return
+        if not text:
+            _finish_item(item, "failed", error="No readable text found in file")
+            return
+        scan_job_items_collection.update_one(_held(item), {"$set": {"characters": len(text)}})
+
+    lease.check()
+    tokens_before = _charge_token(item, job["uid"])
+    if tokens_before is None:
+        _finish_item(item, "failed", error="TOKEN_FINISHED")
+        return
+
+    try:
+        # Background items wait for memory instead of being rejected like HTTP requests.
+        with memory_admission.admit_blocking(memory_bytes(text)):
+            lease.check()
+            result = predict(
+                text=text,
+                user_id=job["uid"],
+                tokens_before=tokens_before,
+                admin_id=job.get("admin_id"),
+            )
+    except _LeaseLost:
+        # The token stays with the item; the worker that reclaimed it sees ``charged``.
+        raise
+    except HTTPException as exc:
+        _refund_token(item, job["uid"])
+        _finish_item(item, "failed", error=str(exc.detail))
+    except Exception as exc:
+        logger.warning("Scan job item %s failed: %r", item["_id"], exc)
+        _refund_token(item, job["uid"])
+        _finish_item(item, "failed", error="Scan failed")
+    else:
+        _finish_item(item, "done", result=result)
+
+
+def cancel_job_items(job_id: ObjectId) -> int:
+    """Cancel every item not yet claimed by a worker. Returns how many were cancelled."""
+    now = datetime.utcnow()
+    cancelled = scan_job_items_collection.update_many(
+        {"job_id": job_id, "status": "queued"},
+        {"$set": {"status": "cancelled", "finished_at": now}, "$unset": {"text": ""}},
+    ).modified_count
+    job = scan_jobs_collection.find_one_and_update(
+        {"_id": job_id, "status": {"$nin": list(JOB_FINAL_STATUSES)}},
+        {"$inc": {"cancelled": cancelled}, "$set": {"status": "cancelled", "finished_at": now}},
+        return_document=ReturnDocument.AFTER,
+    )
+    # Items still running keep the archive until they finish (see _finish_item).
+    if job and job["completed"] + job["failed"] + job["cancelled"] >= job["total"]:
+        _drop_job_archive(job)
+    return cancelled
+
+
+class ScanJobWorkers:
+    """Background threads that score queued batch-job items one at a time."""
+
+    def __init__(self, workers: int):
+        self.workers = workers
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._threads = []
+        self._predict = None
+        self._memory_bytes = None
+        self._lock = threading.Lock()
+        self.items_processed = 0
+        self.busy = 0
+
+    def start(self, predict: Callable[..., dict], memory_bytes: Callable[[str], int]) -> None:
+        """``memory_bytes`` is the admission estimate for scoring one item's text."""
+        if any(t.is_alive() for t in self._threads):
+            return
+        self._predict = predict
+        self._memory_bytes = memory_bytes
+        self._stop.clear()
+        self._threads = [
+            threading.Thread(target=self._run, name=f"scan-jobs-{idx}", daemon=True) for idx in range(self.workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def wake(self) -> None:
+        self._wake.set()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        self._wake.set()
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"workers": self.workers, "busy": self.busy, "items_processed": self.items_processed}
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                item = _claim_next(datetime.utcnow())
+            except Exception as exc:
+                logger.warning("Scan job claim failed: %r", exc)
+                item = None
+
+            if item is None:
+                self._wake.wait(SCAN_JOB_POLL_SECONDS)
+                self._wake.clear()
+                continue
+
+            with self._lock:
+                self.busy += 1
+            try:
+                process_item(item, self._predict, self._memory_bytes)
+            except Exception as exc:
+                logger.warning("Scan job worker error on item %s: %r", item.get("_id"), exc)
+            finally:
+                with self._lock:
+                    self.busy -= 1
+                    self.items_processed += 1
+
+
+scan_job_workers = ScanJobWorkers(SCAN_JOB_WORKERS)
@@ -5,7 +5,7 @@ from typing import Optional
 from fastapi import Depends, HTTPException, Request
 from jose import JWTError, jwt
 
-from backend.mongo import get_user_by_id, users_collection
+from backend.async_mongo import get_user_by_id, users_collection
 
 JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY", "change-this-secret-key")
 JWT_ALGORITHM = "HS256"
@@ -32,30 +32,30 @@ def normalize_role(role: Optional[str]) -> str:
     return str(role).strip().lower().replace("-", "_").replace(" ", "_")
 
 
-def _get_fallback_user():
-    super_admin_user = users_collection.find_one({"role": "super_admin"})
+async def _get_fallback_user():
+    super_admin_user = await users_collection.find_one({"role": "super_admin"})
     if super_admin_user:
         return super_admin_user
 
-    admin_user = users_collection.find_one({"role": "admin"})
+    admin_user = await users_collection.find_one({"role": "admin"})
     if admin_user:
         return admin_user
 
-    any_user = users_collection.find_one({})
+    any_user = await users_collection.find_one({})
     if any_user:
         return any_user
 
     raise HTTPException(status_code=503, detail="No users available")
 
 
-def get_current_user(
+async def get_current_user(
     request: Request,
 ):
     if request.method == "OPTIONS":
         return None
 
     if AUTH_DISABLED:
-        return _get_fallback_user()
+        return await _get_fallback_user()
 
     authorization: Optional[str] = request.headers.get("authorization")
 
@@ -68,7 +68,7 @@ def get_current_user(
         raise HTTPException(status_code=401, detail="Invalid Token")
 
     user_id = payload.get("sub")
-    user = get_user_by_id(user_id)
+    user = await get_user_by_id(user_id)
     if not user:
         raise HTTPException(status_code=401, detail="User Not Found")
 
@@ -84,7 +84,7 @@ def is_super_admin(user: Optional[dict]) -> bool:
     return bool(user) and normalize_role(user.get("role")) == "super_admin"
 
 
-def require_admin_user(current_user=Depends(get_current_user)):
+async def require_admin_user(current_user=Depends(get_current_user)):
     if AUTH_DISABLED:
         return current_user
 
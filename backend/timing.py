@@ -0,0 +1,94 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+import time
+from typing import Optional
+
+from backend.memory import MEMORY_BUCKETS, stage_memory_end, stage_memory_start
+from backend.metrics import Histogram, register
+
+# Seconds; spans a cached-embedding lookup up to a multi-minute large-document scan.
+STAGE_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+# Per-request totals, {timing name: [seconds, calls]}. The dict is shared with worker threads:
+# run_in_threadpool copies the context, and the copy still points at the same dict.
+_request_timings: ContextVar[Optional[dict]] = ContextVar("request_timings", default=None)
+
+
+stage_seconds = Histogram(
+    "scan_stage_seconds",
+    "Time spent in each scan pipeline stage.",
+    ("stage", "cache"),
+    STAGE_BUCKETS,
+)
+stage_memory_bytes = Histogram(
+    "scan_stage_memory_growth_bytes",
+    "Memory growth over each scan pipeline stage (RSS delta, or tracemalloc peak when enabled).",
+    ("stage",),
+    MEMORY_BUCKETS,
+)
+register(lambda: stage_seconds.render() + stage_memory_bytes.render())
+
+
+def record_stage(stage: str, seconds: float, cache: Optional[str] = None) -> None:
+    stage_seconds.observe(seconds, stage, cache or "")
+    timings = _request_timings.get()
+    if timings is not None:
+        key = f"{stage}-{cache}" if cache else stage
+        entry = timings.setdefault(key, [0.0, 0])
+        entry[0] += seconds
+        entry[1] += 1
+
+
+class _Stage:
+    __slots__ = ("cache",)
+
+    def __init__(self):
+        self.cache = None
+
+
+@contextmanager
+def stage_timer(stage: str):
+    """Times and memory-accounts the block; set ``.cache`` on the yielded object to label hits."""
+    current = _Stage()
+    memory_start = stage_memory_start()
+    started_at = time.perf_counter()
+    try:
+        yield current
+    finally:
+        record_stage(stage, time.perf_counter() - started_at, cache=current.cache)
+        growth = stage_memory_end(memory_start)
+        if growth is not None:
+            stage_memory_bytes.observe(growth, stage)
+
+
+def server_timing_header(timings: dict, total_seconds: float) -> str:
+    parts = [f'{name};dur={seconds * 1000:.1f};desc="{calls}x"' for name, (seconds, calls) in timings.items()]
+    parts.append(f"total;dur={total_seconds * 1000:.1f}")
+    return ", ".join(parts)
+
+
+class ServerTimingMiddleware:
+    """Collects stage timings for each request and reports them in a Server-Timing header."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings = {}
+        token = _request_timings.set(timings)
+        started_at = time.perf_counter()
+
+        async def timed_send(message):
+            if message["type"] == "http.response.start":
+                header = server_timing_header(timings, time.perf_counter() - started_at)
+                message["headers"] = list(message.get("headers") or []) + [(b"server-timing", header.encode("latin-1"))]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, timed_send)
+        finally:
+            _request_timings.reset(token)
@@ -0,0 +1,74 @@
+import os
+from typing import BinaryIO
+
+from fastapi import HTTPException, UploadFile
+from fastapi.responses import JSONResponse
+
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(20 * 1024 * 1024)))
+# Room for multipart boundaries and part headers on top of the file bytes themselves.
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+
+
+def _too_large_detail(max_upload_bytes: int) -> str:
+    return f"File too large. Maximum allowed size: {max_upload_bytes} bytes"
+
+
+class UploadSizeLimitMiddleware:
+    """Rejects oversized upload bodies before they are parsed.
+
+    Requests that declare Content-Length are answered with 413 without reading the body.
+    Chunked bodies are counted as they stream in and aborted as soon as they pass the
+    limit, so an oversized upload never gets fully spooled.
+    """
+
+    def __init__(self, app, max_upload_bytes: int, paths: set[str]):
+        self.app = app
+        self.max_upload_bytes = max_upload_bytes
+        self.max_body_bytes = max_upload_bytes + MULTIPART_OVERHEAD_BYTES
+        self.paths = paths
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope.get("method") != "POST" or scope.get("path") not in self.paths:
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope.get("headers") or [])
+        try:
+            declared = int(headers.get(b"content-length", b"0") or 0)
+        except ValueError:
+            declared = 0
+        if declared > self.max_body_bytes:
+            response = JSONResponse({"detail": _too_large_detail(self.max_upload_bytes)}, status_code=413)
+            await response(scope, receive, send)
+            return
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_body_bytes:
+                    raise HTTPException(status_code=413, detail=_too_large_detail(self.max_upload_bytes))
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+
+def open_upload(file: UploadFile, max_upload_bytes: int) -> BinaryIO:
+    """Validate an upload's size and return its spooled file handle, rewound.
+
+    The handle is Starlette's SpooledTemporaryFile (rolled to disk past 1MB), so parsers
+    read from it directly instead of from a full in-memory copy of the upload.
+    """
+    stream = file.file
+    stream.seek(0, os.SEEK_END)
+    size = stream.tell()
+    stream.seek(0)
+
+    if size == 0:
+        raise HTTPException(status_code=400, detail="Uploaded file is empty")
+    if size > max_upload_bytes:
+        raise HTTPException(status_code=413, detail=_too_large_detail(max_upload_bytes))
+    return stream
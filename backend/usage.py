@@ -0,0 +1,97 @@
+from datetime import datetime, timedelta
+from typing import Optional
+
+from pymongo import UpdateOne
+
+from backend import async_mongo
+from backend.mongo import usage_rollups_collection
+from backend.security import normalize_role
+
+# Rollup documents are keyed by (scope, owner_id, day). "day" is an ISO date for the
+# daily buckets and TOTAL_DAY for the running lifetime totals, so a dashboard read is
+# a single indexed find_one instead of a scan over scan_logs.
+USER_SCOPE = "user"
+ADMIN_SCOPE = "admin"
+TOTAL_DAY = "total"
+MAX_STATS_DAYS = 366
+
+
+def usage_owner_ids(user: dict) -> tuple[str, Optional[str]]:
+    """Return (user_id, admin_id) that a scan by this account is attributed to."""
+    user_id = str(user["_id"])
+    if normalize_role(user.get("role")) == "admin":
+        return user_id, user_id
+
+    created_by = user.get("created_by")
+    return user_id, (str(created_by) if created_by else None)
+
+
+def _rollup_update(scope: str, owner_id: str, day: str, ai_percent: float, tokens: int, now: datetime):
+    return UpdateOne(
+        {"scope": scope, "owner_id": owner_id, "day": day},
+        {
+            "$inc": {"scans": 1, "ai_percent_sum": float(ai_percent), "tokens_used": int(tokens)},
+            "$set": {"updated_at": now},
+        },
+        upsert=True,
+    )
+
+
+def record_scan_usage(
+    user_id: str,
+    admin_id: Optional[str],
+    ai_percent: float,
+    tokens: int = 1,
+    timestamp: Optional[datetime] = None,
+) -> None:
+    now = timestamp or datetime.utcnow()
+    day = now.strftime("%Y-%m-%d")
+
+    owners = [(USER_SCOPE, user_id)]
+    if admin_id:
+        owners.append((ADMIN_SCOPE, admin_id))
+
+    ops = []
+    for scope, owner_id in owners:
+        ops.append(_rollup_update(scope, owner_id, day, ai_percent, tokens, now))
+        ops.append(_rollup_update(scope, owner_id, TOTAL_DAY, ai_percent, tokens, now))
+
+    usage_rollups_collection.bulk_write(ops, ordered=False)
+
+
+def _format_bucket(doc: Optional[dict]) -> dict:
+    doc = doc or {}
+    scans = int(doc.get("scans", 0) or 0)
+    ai_sum = float(doc.get("ai_percent_sum", 0.0) or 0.0)
+    return {
+        "scans": scans,
+        "avg_ai_percent": round(ai_sum / scans, 2) if scans else 0.0,
+        "tokens_used": int(doc.get("tokens_used", 0) or 0),
+    }
+
+
+async def get_usage_stats(scope: str, owner_id: str, days: int = 30) -> dict:
+    rollups = async_mongo.usage_rollups_collection
+    days = min(max(int(days), 0), MAX_STATS_DAYS)
+    total_doc = await rollups.find_one({"scope": scope, "owner_id": owner_id, "day": TOTAL_DAY})
+
+    daily = []
+    if days:
+        today = datetime.utcnow().date()
+        start = (today - timedelta(days=days - 1)).isoformat()
+        cursor = rollups.find(
+            {"scope": scope, "owner_id": owner_id, "day": {"$gte": start, "$lte": today.isoformat()}}
+        ).sort("day", 1)
+        daily = [{"day": d["day"], **_format_bucket(d)} async for d in cursor]
+
+    return {
+        "scope": scope,
+        "owner_id": owner_id,
+        "total": _format_bucket(total_doc),
+        "daily": daily,
+    }
+
+
+async def delete_usage(scope: str, owner_ids: list[str]) -> None:
+    if owner_ids:
+        await async_mongo.usage_rollups_collection.delete_many({"scope": scope, "owner_id": {"$in": owner_ids}})
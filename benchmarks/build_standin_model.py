@@ -0,0 +1,151 @@
+"""Regenerate the stand-in BERT assets in benchmarks/assets/.
+
+The stand-in is a 2-layer, single-head encoder with hidden size 64: same inputs and
+outputs as the exported bert-base graph and the same quadratic attention cost in
+sequence length, but small enough to commit. Its vocabulary is built from the bundled
+corpus plus single-letter word pieces, so every word tokenizes without [UNK].
+
+Only needed when the corpus or the graph layout changes; requires ``pip install onnx``.
+"""
+import json
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+import numpy as np
+
+BENCH_ROOT = Path(__file__).resolve().parent
+PROJECT_ROOT = BENCH_ROOT.parent
+ASSETS = BENCH_ROOT / "assets"
+CORPUS = BENCH_ROOT / "corpus"
+
+HIDDEN = 64
+FFN = 128
+LAYERS = 2
+MAX_POSITIONS = 512
+SPECIAL_TOKENS = ["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]"]
+
+
+def build_vocab() -> list[str]:
+    words = set()
+    for path in sorted(CORPUS.glob("*.txt")):
+        words.update(re.findall(r"[a-z]+", path.read_text(encoding="utf-8").lower()))
+    chars = [chr(c) for c in range(ord("a"), ord("z") + 1)] + list("0123456789")
+    punctuation = list("!\"#$%&'()*+,-./:;<=>?@[\\]^_`{|}~")
+    pieces = [f"##{c}" for c in chars]
+    return SPECIAL_TOKENS + punctuation + chars + pieces + sorted(words - set(chars))
+
+
+def build_graph(vocab_size: int):
+    from onnx import TensorProto, helper, numpy_helper
+
+    rng = np.random.default_rng(7)
+    inits = []
+    nodes = []
+
+    def weight(name, *shape, scale=None):
+        scale = scale or 1.0 / np.sqrt(shape[0])
+        inits.append(numpy_helper.from_array((rng.standard_normal(shape) * scale).astype(np.float32), name))
+        return name
+
+    def const(name, value, dtype=np.int64):
+        inits.append(numpy_helper.from_array(np.array(value, dtype=dtype), name))
+        return name
+
+    def node(op, inputs, output, **attrs):
+        nodes.append(helper.make_node(op, inputs, [output], name=output, **attrs))
+        return output
+
+    const("zero", [0])
+    const("one", [1])
+    const("scale", 1.0 / np.sqrt(HIDDEN), np.float32)
+    const("neg_large", -10000.0, np.float32)
+    const("ones_f", 1.0, np.float32)
+    ln_scale = const("ln_scale", np.ones(HIDDEN), np.float32)
+    ln_bias = const("ln_bias", np.zeros(HIDDEN), np.float32)
+
+    # Embeddings: word + position + token type.
+    word = node("Gather", [weight("word_emb", vocab_size, HIDDEN, scale=0.5), "input_ids"], "word")
+    seq_len = node("Gather", [node("Shape", ["input_ids"], "ids_shape"), "one"], "seq_len")
+    pos = node("Slice", [weight("pos_emb", MAX_POSITIONS, HIDDEN, scale=0.1), "zero", seq_len, "zero"], "pos")
+    tok_type = node("Gather", [weight("type_emb", 2, HIDDEN, scale=0.1), "token_type_ids"], "tok_type")
+    hidden = node("Add", [node("Add", [word, pos], "word_pos"), tok_type], "emb_sum")
+    hidden = node("LayerNormalization", [hidden, ln_scale, ln_bias], "emb_ln", axis=-1)
+
+    # Additive attention mask, (batch, 1, seq): 0 for tokens, -10000 for padding.
+    mask = node("Cast", ["attention_mask"], "mask_f", to=TensorProto.FLOAT)
+    mask = node("Unsqueeze", [mask, "one"], "mask_3d")
+    mask_bias = node("Mul", [node("Sub", ["ones_f", mask], "mask_inv"), "neg_large"], "mask_bias")
+
+    for layer in range(LAYERS):
+        p = f"l{layer}_"
+        q = node("MatMul", [hidden, weight(p + "wq", HIDDEN, HIDDEN)], p + "q")
+        k = node("MatMul", [hidden, weight(p + "wk", HIDDEN, HIDDEN)], p + "k")
+        v = node("MatMul", [hidden, weight(p + "wv", HIDDEN, HIDDEN)], p + "v")
+        kt = node("Transpose", [k], p + "kt", perm=[0, 2, 1])
+        scores = node("Mul", [node("MatMul", [q, kt], p + "qk"), "scale"], p + "scores")
+        probs = node("Softmax", [node("Add", [scores, mask_bias], p + "masked")], p + "probs", axis=-1)
+        ctx = node("MatMul", [node("MatMul", [probs, v], p + "ctx"), weight(p + "wo", HIDDEN, HIDDEN)], p + "attn_out")
+        hidden = node("LayerNormalization", [node("Add", [hidden, ctx], p + "res1"), ln_scale, ln_bias], p + "ln1", axis=-1)
+        ffn = node("Relu", [node("MatMul", [hidden, weight(p + "w1", HIDDEN, FFN)], p + "ffn_in")], p + "ffn_act")
+        ffn = node("MatMul", [ffn, weight(p + "w2", FFN, HIDDEN)], p + "ffn_out")
+        hidden = node("LayerNormalization", [node("Add", [hidden, ffn], p + "res2"), ln_scale, ln_bias], p + "ln2", axis=-1)
+
+    nodes.append(helper.make_node("Identity", [hidden], ["last_hidden_state"], name="last_hidden_state"))
+    cls = node("Gather", ["last_hidden_state", const("cls_index", 0)], "cls", axis=1)
+    nodes.append(
+        helper.make_node("Tanh", [node("MatMul", [cls, weight("pooler_w", HIDDEN, HIDDEN)], "pooler_in")], ["pooler_output"])
+    )
+
+    inputs = [
+        helper.make_tensor_value_info(name, TensorProto.INT64, ["batch", "sequence"])
+        for name in ("input_ids", "attention_mask", "token_type_ids")
+    ]
+    outputs = [
+        helper.make_tensor_value_info("last_hidden_state", TensorProto.FLOAT, ["batch", "sequence", HIDDEN]),
+        helper.make_tensor_value_info("pooler_output", TensorProto.FLOAT, ["batch", HIDDEN]),
+    ]
+    graph = helper.make_graph(nodes, "standin_bert", inputs, outputs, inits)
+    model = helper.make_model(graph, opset_imports=[helper.make_opsetid("", 17)], producer_name="ai-checker-bench")
+    model.ir_version = 8
+    return model
+
+
+def main() -> int:
+    try:
+        import onnx
+    except ImportError:
+        print("The onnx package is required to rebuild the stand-in: pip install onnx", file=sys.stderr)
+        return 2
+
+    ASSETS.mkdir(parents=True, exist_ok=True)
+    vocab = build_vocab()
+    (ASSETS / "vocab.txt").write_text("\n".join(vocab) + "\n", encoding="utf-8")
+    (ASSETS / "tokenizer_config.json").write_text(
+        json.dumps({"tokenizer_class": "BertTokenizer", "do_lower_case": True, "model_max_length": MAX_POSITIONS}, indent=2)
+        + "\n",
+        encoding="utf-8",
+    )
+
+    model = build_graph(len(vocab))
+    onnx.checker.check_model(model)
+    full_path = ASSETS / "standin_bert.onnx"
+    onnx.save_model(model, str(full_path))
+    print(f"Wrote {full_path} ({full_path.stat().st_size:,} bytes, vocab {len(vocab)})")
+
+    # The CLS-only variant comes from the same tool used on the real model.
+    return subprocess.call(
+        [
+            sys.executable,
+            str(PROJECT_ROOT / "scripts" / "prune_onnx_cls.py"),
+            "--input",
+            str(full_path),
+            "--output",
+            str(ASSETS / "standin_bert_cls.onnx"),
+        ]
+    )
+
+
+if __name__ == "__main__":
+    sys.exit(main())
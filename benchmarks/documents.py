@@ -0,0 +1,135 @@
+from io import BytesIO
+from pathlib import Path
+import random
+
+CORPUS_DIR = Path(__file__).resolve().parent / "corpus"
+PDF_CHARS_PER_LINE = 90
+PDF_LINES_PER_PAGE = 50
+PPTX_CHARS_PER_SLIDE = 1200
+
+
+def corpus_paragraphs() -> list[str]:
+    paragraphs = []
+    for path in sorted(CORPUS_DIR.glob("*.txt")):
+        paragraphs.extend(p.strip() for p in path.read_text(encoding="utf-8").split("\n\n") if p.strip())
+    return paragraphs
+
+
+def first_sentence() -> str:
+    text = corpus_paragraphs()[0]
+    return text[: text.index(". ") + 1]
+
+
+def corpus_text(chars: int, seed: int = 7) -> str:
+    """At least ``chars`` characters of corpus paragraphs in a seeded order, cut at a sentence end."""
+    rng = random.Random(seed)
+    paragraphs = corpus_paragraphs()
+    parts = []
+    size = 0
+    while size < chars:
+        order = paragraphs[:]
+        rng.shuffle(order)
+        for paragraph in order:
+            parts.append(paragraph)
+            size += len(paragraph) + 2
+            if size >= chars:
+                break
+
+    text = "\n\n".join(parts)
+    cut = text.rfind(". ", 0, chars)
+    return text[: cut + 1] if cut > 0 else text[:chars]
+
+
+def _wrap(text: str, width: int) -> list[str]:
+    lines = []
+    for paragraph in text.split("\n\n"):
+        line = ""
+        for word in paragraph.split():
+            if line and len(line) + 1 + len(word) > width:
+                lines.append(line)
+                line = word
+            else:
+                line = f"{line} {word}" if line else word
+        lines.append(line)
+        lines.append("")
+    return lines
+
+
+def _pdf_escape(line: str) -> str:
+    return line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def build_pdf(text: str) -> bytes:
+    """A plain single-font PDF with the text laid out in fixed-width lines."""
+    lines = _wrap(text, PDF_CHARS_PER_LINE)
+    pages = [lines[i:i + PDF_LINES_PER_PAGE] for i in range(0, len(lines), PDF_LINES_PER_PAGE)] or [[]]
+
+    # Objects: 1 catalog, 2 page tree, 3 font, then a (page, content) pair per page.
+    objects = {3: b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"}
+    kids = []
+    for idx, page_lines in enumerate(pages):
+        page_id, content_id = 4 + 2 * idx, 5 + 2 * idx
+        kids.append(f"{page_id} 0 R")
+        ops = ["BT", "/F1 10 Tf", "12 TL", "50 760 Td"]
+        ops.extend(f"({_pdf_escape(line)}) Tj T*" for line in page_lines)
+        ops.append("ET")
+        stream = "\n".join(ops).encode("latin-1", "replace")
+        objects[content_id] = b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream)
+        objects[page_id] = (
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {content_id} 0 R >>"
+        ).encode()
+    objects[1] = b"<< /Type /Catalog /Pages 2 0 R >>"
+    objects[2] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(pages)} >>".encode()
+
+    out = BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = {}
+    for obj_id in sorted(objects):
+        offsets[obj_id] = out.tell()
+        out.write(b"%d 0 obj\n%s\nendobj\n" % (obj_id, objects[obj_id]))
+    xref_at = out.tell()
+    out.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+    for obj_id in sorted(objects):
+        out.write(b"%010d 00000 n \n" % offsets[obj_id])
+    out.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref_at))
+    return out.getvalue()
+
+
+def build_docx(text: str) -> bytes:
+    from docx import Document
+
+    document = Document()
+    for paragraph in text.split("\n\n"):
+        document.add_paragraph(paragraph)
+    out = BytesIO()
+    document.save(out)
+    return out.getvalue()
+
+
+def build_pptx(text: str) -> bytes:
+    from pptx import Presentation
+    from pptx.util import Inches
+
+    presentation = Presentation()
+    layout = presentation.slide_layouts[6]
+    slide_text = ""
+    chunks = []
+    for paragraph in text.split("\n\n"):
+        if slide_text and len(slide_text) + len(paragraph) > PPTX_CHARS_PER_SLIDE:
+            chunks.append(slide_text)
+            slide_text = ""
+        slide_text = f"{slide_text}\n{paragraph}" if slide_text else paragraph
+    chunks.append(slide_text)
+
+    for chunk in chunks:
+        slide = presentation.slides.add_slide(layout)
+        frame = slide.shapes.add_textbox(Inches(0.5), Inches(0.5), Inches(9), Inches(6.5)).text_frame
+        frame.word_wrap = True
+        paragraphs = chunk.split("\n")
+        frame.text = paragraphs[0]
+        for paragraph in paragraphs[1:]:
+            frame.add_paragraph().text = paragraph
+    out = BytesIO()
+    presentation.save(out)
+    return out.getvalue()
@@ -0,0 +1,454 @@
+"""HTTP load generator for the API.
+
+By default it starts ``benchmarks/loadserver.py`` (the app on the in-memory Mongo
+stand-in and stand-in BERT) in a separate process, so the client threads do not share
+a GIL with the server. ``--url`` targets a running deployment instead; its accounts must
+match ``--email-pattern``/``--password``.
+
+Each concurrency level is a closed loop: every virtual user logs in once, then sends
+requests back to back, picking the endpoint from ``--mix``. ``--trace`` records every
+request as one JSON line; ``--replay`` sends a recorded trace again open-loop, at the
+recorded offsets divided by ``--speed``.
+"""
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from functools import lru_cache
+import http.client
+import json
+import math
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+from urllib.parse import urlsplit
+
+BENCH_ROOT = Path(__file__).resolve().parent
+PROJECT_ROOT = BENCH_ROOT.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from benchmarks import documents  # noqa: E402
+from benchmarks.loadserver import LOAD_USER_EMAIL, LOAD_USER_PASSWORD  # noqa: E402
+from benchmarks.run import _git_commit  # noqa: E402
+
+RESULTS_DIR = BENCH_ROOT / "results"
+SCHEMA_VERSION = 1
+ENDPOINTS = ("predict", "predict-file", "login", "history")
+FILE_FORMATS = ("txt", "pdf", "docx", "pptx")
+FILE_BUILDERS = {
+    "txt": lambda text: text.encode("utf-8"),
+    "pdf": documents.build_pdf,
+    "docx": documents.build_docx,
+    "pptx": documents.build_pptx,
+}
+SERVER_START_TIMEOUT_SECONDS = 180
+REQUEST_TIMEOUT_SECONDS = 300
+
+
+def parse_mix(value: str) -> dict[str, float]:
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in ENDPOINTS:
+            raise argparse.ArgumentTypeError(f"unknown endpoint {name!r}; expected one of {', '.join(ENDPOINTS)}")
+        mix[name] = float(weight or 1)
+    if not any(mix.values()):
+        raise argparse.ArgumentTypeError("mix needs at least one positive weight")
+    return mix
+
+
+@lru_cache(maxsize=256)
+def _text(chars: int, seed: int) -> str:
+    return documents.corpus_text(chars, seed)
+
+
+@lru_cache(maxsize=64)
+def _file_bytes(fmt: str, chars: int, seed: int) -> bytes:
+    return FILE_BUILDERS[fmt](_text(chars, seed))
+
+
+def _multipart(filename: str, data: bytes) -> tuple[bytes, str]:
+    boundary = f"loadgen{random.getrandbits(64):016x}"
+    head = (
+        f"--{boundary}\r\n"
+        f'Content-Disposition: form-data; name="file"; filename="{filename}"\r\n'
+        "Content-Type: application/octet-stream\r\n\r\n"
+    ).encode()
+    return head + data + f"\r\n--{boundary}--\r\n".encode(), f"multipart/form-data; boundary={boundary}"
+
+
+def _parse_server_timing(header: str) -> dict[str, float]:
+    stages = {}
+    for entry in (header or "").split(","):
+        name, _, params = entry.strip().partition(";")
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "dur" and name:
+                stages[name] = stages.get(name, 0.0) + float(value)
+    return stages
+
+
+class Client:
+    """One keep-alive connection plus the bearer token per virtual user; not thread-safe."""
+
+    def __init__(self, base_url: str, email_pattern: str, password: str, users: int, tokens: dict = None):
+        parts = urlsplit(base_url)
+        self.host = parts.hostname
+        self.port = parts.port or (443 if parts.scheme == "https" else 80)
+        self.https = parts.scheme == "https"
+        self.email_pattern = email_pattern
+        self.password = password
+        self.users = users
+        self.tokens = {} if tokens is None else tokens
+        self.conn = None
+
+    def _connect(self):
+        cls = http.client.HTTPSConnection if self.https else http.client.HTTPConnection
+        self.conn = cls(self.host, self.port, timeout=REQUEST_TIMEOUT_SECONDS)
+
+    def _request(self, method: str, path: str, body: bytes = None, headers: dict = None):
+        if self.conn is None:
+            self._connect()
+        try:
+            self.conn.request(method, path, body=body, headers=headers or {})
+            response = self.conn.getresponse()
+            return response.status, response.read(), response.getheader("server-timing", "")
+        except (OSError, http.client.HTTPException):
+            self.conn.close()
+            self.conn = None
+            raise
+
+    def _login(self, vu: int):
+        email = self.email_pattern.format(index=vu % self.users)
+        body = json.dumps({"email": email, "password": self.password}).encode()
+        status, payload, timing = self._request("POST", "/auth/login", body, {"Content-Type": "application/json"})
+        if status == 200:
+            self.tokens[vu] = json.loads(payload)["access_token"]
+        return status, payload, timing
+
+    def ensure_login(self, vu: int) -> None:
+        if vu not in self.tokens:
+            status, payload, _timing = self._login(vu)
+            if status != 200:
+                raise RuntimeError(f"Login for virtual user {vu} failed with {status}: {payload[:200]!r}")
+
+    def send(self, spec: dict):
+        """Returns (status, server-timing stages); status 0 means the request never completed."""
+        endpoint, vu = spec["endpoint"], spec["vu"]
+        try:
+            if endpoint == "login":
+                status, _payload, timing = self._login(vu)
+            else:
+                self.ensure_login(vu)
+                auth = {"Authorization": f"Bearer {self.tokens[vu]}"}
+                if endpoint == "predict":
+                    body = json.dumps({"text": _text(spec["chars"], spec["seed"])}).encode()
+                    status, _payload, timing = self._request(
+                        "POST", "/predict", body, {**auth, "Content-Type": "application/json"}
+                    )
+                elif endpoint == "predict-file":
+                    data = _file_bytes(spec["format"], spec["chars"], spec["seed"])
+                    body, content_type = _multipart(f"upload.{spec['format']}", data)
+                    status, _payload, timing = self._request(
+                        "POST", "/predict-file", body, {**auth, "Content-Type": content_type}
+                    )
+                else:
+                    status, _payload, timing = self._request("GET", "/my-history", headers=auth)
+        except (OSError, http.client.HTTPException, RuntimeError):
+            return 0, {}
+        if status == 401:
+            self.tokens.pop(vu, None)
+        return status, _parse_server_timing(timing)
+
+
+class Recorder:
+    def __init__(self, trace_path: str = None):
+        self.samples = []
+        self._lock = threading.Lock()
+        self._trace = open(trace_path, "w", encoding="utf-8") if trace_path else None
+        self.started_at = time.perf_counter()
+
+    def write_header(self, meta: dict) -> None:
+        if self._trace:
+            self._trace.write(json.dumps({"schema": SCHEMA_VERSION, "kind": "loadgen-trace", **meta}) + "\n")
+
+    def add(self, level: str, spec: dict, sent_at: float, status: int, stages: dict, lag: float = 0.0) -> None:
+        elapsed = time.perf_counter() - sent_at
+        sample = {
+            "level": level,
+            "endpoint": spec["endpoint"],
+            "status": status,
+            "ms": elapsed * 1000,
+            "stages": stages,
+            "lag_ms": lag * 1000,
+        }
+        with self._lock:
+            self.samples.append(sample)
+            if self._trace:
+                line = {"t": round(sent_at - self.started_at, 6), "level": level, "spec": spec, "status": status, "ms": round(elapsed * 1000, 3)}
+                self._trace.write(json.dumps(line) + "\n")
+
+    def close(self) -> None:
+        if self._trace:
+            self._trace.close()
+
+
+def _percentile(sorted_values: list[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    rank = max(math.ceil(pct / 100 * len(sorted_values)) - 1, 0)
+    return sorted_values[rank]
+
+
+def summarize(samples: list[dict], duration: float) -> dict:
+    latencies = sorted(s["ms"] for s in samples)
+    errors = sum(1 for s in samples if s["status"] == 0 or s["status"] >= 400)
+    statuses = {}
+    stage_totals = {}
+    for s in samples:
+        statuses[str(s["status"])] = statuses.get(str(s["status"]), 0) + 1
+        for stage, ms in s["stages"].items():
+            stage_totals[stage] = stage_totals.get(stage, 0.0) + ms
+    summary = {
+        "requests": len(samples),
+        "errors": errors,
+        "error_rate": round(errors / len(samples), 4) if samples else 0.0,
+        "throughput_rps": round(len(samples) / duration, 3) if duration else 0.0,
+        "p50_ms": round(_percentile(latencies, 50), 2),
+        "p95_ms": round(_percentile(latencies, 95), 2),
+        "p99_ms": round(_percentile(latencies, 99), 2),
+        "max_ms": round(latencies[-1], 2) if latencies else 0.0,
+        "statuses": statuses,
+        # Mean server-side time per request by Server-Timing stage.
+        "server_stage_ms": {k: round(v / len(samples), 2) for k, v in sorted(stage_totals.items())},
+    }
+    lags = [s["lag_ms"] for s in samples if s["lag_ms"]]
+    if lags:
+        summary["max_start_lag_ms"] = round(max(lags), 2)
+    return summary
+
+
+def summarize_level(samples: list[dict], duration: float) -> dict:
+    by_endpoint = {}
+    for sample in samples:
+        by_endpoint.setdefault(sample["endpoint"], []).append(sample)
+    report = {name: summarize(items, duration) for name, items in sorted(by_endpoint.items())}
+    report["all"] = summarize(samples, duration)
+    return report
+
+
+class SpecFactory:
+    """Draws request specs for one virtual user; seeds make every payload reproducible."""
+
+    def __init__(self, args, vu: int):
+        self.args = args
+        self.vu = vu
+        self.rng = random.Random(args.seed * 1_000_003 + vu)
+        self.names = list(args.mix)
+        self.weights = [args.mix[name] for name in self.names]
+        self.count = 0
+
+    def next(self) -> dict:
+        self.count += 1
+        endpoint = self.rng.choices(self.names, self.weights)[0]
+        spec = {"endpoint": endpoint, "vu": self.vu}
+        if endpoint in {"predict", "predict-file"}:
+            spec["chars"] = self.rng.choice(self.args.chars)
+            # Distinct seeds keep the chunk and extraction caches cold, as with real uploads.
+            spec["seed"] = self.rng.randrange(self.args.variants) if self.args.variants else self.vu * 1_000_000 + self.count
+        if endpoint == "predict-file":
+            spec["format"] = self.rng.choice(self.args.formats)
+        return spec
+
+
+def run_level(args, base_url: str, concurrency: int, duration: float, recorder: Recorder, level: str) -> float:
+    deadline = time.perf_counter() + duration
+
+    def virtual_user(vu: int):
+        client = Client(base_url, args.email_pattern, args.password, args.users)
+        factory = SpecFactory(args, vu)
+        try:
+            client.ensure_login(vu)
+        except (OSError, http.client.HTTPException, RuntimeError) as exc:
+            print(f"  virtual user {vu}: {exc}", file=sys.stderr)
+            return
+        while time.perf_counter() < deadline:
+            spec = factory.next()
+            sent_at = time.perf_counter()
+            status, stages = client.send(spec)
+            if recorder:
+                recorder.add(level, spec, sent_at, status, stages)
+
+    started_at = time.perf_counter()
+    threads = [threading.Thread(target=virtual_user, args=(vu,), daemon=True) for vu in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - started_at
+
+
+def replay(args, base_url: str, recorder: Recorder) -> float:
+    entries = []
+    with open(args.replay, encoding="utf-8") as f:
+        for line in f:
+            entry = json.loads(line)
+            if "spec" in entry:
+                entries.append(entry)
+    entries.sort(key=lambda e: e["t"])
+    if not entries:
+        raise SystemExit(f"No requests in {args.replay}")
+
+    # Log every virtual user in up front and share the tokens, so replay threads do not
+    # each log in again and trip the per-email login limit.
+    tokens = {}
+    setup = Client(base_url, args.email_pattern, args.password, args.users, tokens)
+    for vu in sorted({e["spec"]["vu"] for e in entries}):
+        setup.ensure_login(vu)
+    local = threading.local()
+
+    def send(entry: dict, due: float):
+        client = getattr(local, "client", None)
+        if client is None:
+            client = local.client = Client(base_url, args.email_pattern, args.password, args.users, tokens)
+        sent_at = time.perf_counter()
+        status, stages = client.send(entry["spec"])
+        recorder.add("replay", entry["spec"], sent_at, status, stages, lag=max(sent_at - due, 0.0))
+
+    origin = entries[0]["t"]
+    workers = args.replay_workers
+    started_at = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="replay") as pool:
+        for entry in entries:
+            due = started_at + (entry["t"] - origin) / args.speed
+            delay = due - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            pool.submit(send, entry, due)
+    return time.perf_counter() - started_at
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(args) -> tuple[subprocess.Popen, str]:
+    port = _free_port()
+    command = [
+        sys.executable,
+        str(BENCH_ROOT / "loadserver.py"),
+        "--port",
+        str(port),
+        "--workers",
+        str(args.server_workers),
+        "--users",
+        str(args.users),
+        "--bert-graph",
+        args.bert_graph,
+    ]
+    server = subprocess.Popen(command, cwd=PROJECT_ROOT)
+    deadline = time.monotonic() + SERVER_START_TIMEOUT_SECONDS
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise SystemExit(f"Load server exited with code {server.returncode}")
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=2)
+            conn.request("GET", "/")
+            if conn.getresponse().status == 200:
+                return server, f"http://127.0.0.1:{port}"
+        except OSError:
+            time.sleep(0.5)
+    server.terminate()
+    raise SystemExit("Load server did not become ready in time")
+
+
+def print_level(level: str, report: dict) -> None:
+    print(f"\n{level}")
+    print(f"{'endpoint':<14} {'reqs':>7} {'rps':>8} {'err%':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for name, row in report.items():
+        print(
+            f"{name:<14} {row['requests']:>7} {row['throughput_rps']:>8.2f} {row['error_rate'] * 100:>6.1f} "
+            f"{row['p50_ms']:>9.1f} {row['p95_ms']:>9.1f} {row['p99_ms']:>9.1f}"
+        )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Replay a traffic mix against the API and report latency percentiles.")
+    parser.add_argument("--url", help="Target a running server instead of starting the stand-in server")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix("predict=6,predict-file=2,login=1,history=1"))
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds per concurrency level")
+    parser.add_argument("--warmup", type=float, default=5.0, help="Unrecorded seconds before the first level")
+    parser.add_argument("--chars", type=int, nargs="+", default=[2_000], help="Text sizes to draw from")
+    parser.add_argument("--formats", nargs="+", choices=FILE_FORMATS, default=["pdf", "docx", "txt"])
+    parser.add_argument("--variants", type=int, default=0, help="Reuse this many texts per size (0: every text distinct)")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--users", type=int, default=32, help="Accounts shared round-robin by virtual users")
+    parser.add_argument("--email-pattern", default=LOAD_USER_EMAIL)
+    parser.add_argument("--password", default=LOAD_USER_PASSWORD)
+    parser.add_argument("--server-workers", type=int, default=1)
+    parser.add_argument("--bert-graph", choices=("full", "cls"), default="full")
+    parser.add_argument("--trace", help="Write every request to this JSONL file")
+    parser.add_argument("--replay", metavar="TRACE", help="Replay a recorded trace instead of the closed-loop levels")
+    parser.add_argument("--speed", type=float, default=1.0, help="Replay rate multiplier")
+    parser.add_argument("--replay-workers", type=int, default=64)
+    parser.add_argument("--output", help="Report JSON path (default: benchmarks/results/load-<timestamp>.json)")
+    args = parser.parse_args()
+
+    server = None
+    base_url = args.url.rstrip("/") if args.url else None
+    if not base_url:
+        server, base_url = start_server(args)
+    print(f"Target {base_url}")
+
+    started = datetime.now(timezone.utc)
+    recorder = Recorder(args.trace)
+    recorder.write_header({"started_at": started.isoformat(), "mix": args.mix, "chars": args.chars})
+    levels = {}
+    try:
+        if args.replay:
+            duration = replay(args, base_url, recorder)
+            levels["replay"] = summarize_level(recorder.samples, duration)
+            print_level(f"replay of {args.replay} at {args.speed}x", levels["replay"])
+        else:
+            if args.warmup > 0:
+                run_level(args, base_url, args.concurrency[0], args.warmup, None, "warmup")
+            for concurrency in args.concurrency:
+                level = f"c{concurrency}"
+                first = len(recorder.samples)
+                duration = run_level(args, base_url, concurrency, args.duration, recorder, level)
+                levels[level] = summarize_level(recorder.samples[first:], duration)
+                print_level(f"concurrency {concurrency} ({duration:.1f}s)", levels[level])
+    finally:
+        recorder.close()
+        if server:
+            server.terminate()
+            server.wait(timeout=30)
+
+    report = {
+        "schema": SCHEMA_VERSION,
+        "meta": {
+            "started_at": started.isoformat(),
+            "commit": _git_commit(),
+            "target": args.url or "stand-in",
+            "cpu_count": os.cpu_count(),
+            "args": {k: v for k, v in vars(args).items() if k not in {"output", "password"}},
+        },
+        "levels": levels,
+    }
+    output = Path(args.output) if args.output else RESULTS_DIR / f"load-{started:%Y%m%dT%H%M%SZ}-{report['meta']['commit']}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+    print(f"\nSaved {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,86 @@
+"""Serve the app on the in-memory Mongo stand-in for load tests.
+
+Each uvicorn worker builds its own store and seeds the same accounts with fixed ids, so
+a token issued by one worker is accepted by the others. Scan history is per worker.
+"""
+import argparse
+import os
+import sys
+from pathlib import Path
+
+from bson import ObjectId
+
+BENCH_ROOT = Path(__file__).resolve().parent
+PROJECT_ROOT = BENCH_ROOT.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from benchmarks.standins import configure_environment, install_in_memory_mongo  # noqa: E402
+
+LOAD_USER_EMAIL = "load-{index}@bench.local"
+LOAD_USER_PASSWORD = "load-test-password"
+LOAD_USER_TOKENS = 10**9
+
+
+def load_user_email(index: int) -> str:
+    return LOAD_USER_EMAIL.format(index=index)
+
+
+def seed_users(users_collection, count: int) -> None:
+    from backend.crypto import hash_password
+
+    # One PBKDF2 hash for every account; login still pays the full verify cost per request.
+    password_hash = hash_password(LOAD_USER_PASSWORD)
+    for index in range(count):
+        users_collection.insert_one(
+            {
+                "_id": ObjectId(f"{index + 1:024x}"),
+                "email": load_user_email(index),
+                "password_hash": password_hash,
+                "role": "user",
+                "tokens": LOAD_USER_TOKENS,
+            }
+        )
+
+
+def create_app():
+    """uvicorn factory: configure stand-ins, seed accounts, then import the app."""
+    configure_environment(os.getenv("LOAD_BERT_GRAPH", "full"))
+    os.environ["AUTH_DISABLED"] = "false"
+    # Every virtual user logs in from the same address; per-email limits still apply.
+    os.environ.setdefault("LOGIN_ATTEMPTS_PER_IP", "0")
+    collections = install_in_memory_mongo()
+    seed_users(collections["users_collection"], int(os.getenv("LOAD_USERS", "32")))
+
+    import app
+
+    return app.app
+
+
+def main() -> int:
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Run the API against the in-memory Mongo stand-in.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--users", type=int, default=32, help="Seeded accounts load-<n>@bench.local")
+    parser.add_argument("--bert-graph", choices=("full", "cls"), default="full")
+    args = parser.parse_args()
+
+    # Workers are separate processes; they read their settings from the environment.
+    os.environ["LOAD_USERS"] = str(args.users)
+    os.environ["LOAD_BERT_GRAPH"] = args.bert_graph
+    os.chdir(PROJECT_ROOT)
+    uvicorn.run(
+        "benchmarks.loadserver:create_app",
+        factory=True,
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        log_level="warning",
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,297 @@
+"""Golden parity check for the 782-column feature vectors and model probabilities.
+
+``--freeze`` stores, per configuration, the sentence split, the serving feature matrix
+(app._feature_matrix), the model probabilities and the document-level
+extract_features vectors for the bundled corpus plus a few edge cases. ``--check``
+rebuilds them with the current code and compares every column against its tolerance,
+naming the columns that drifted. It also checks that the serving rows equal
+build_features_with_chunk_context, the reference the model was trained with.
+
+Every configuration runs in its own process because the backend is picked from the
+environment at import time. Goldens depend on the NLTK data and library versions, so
+they are not committed: freeze on a commit you trust, then check the change in the
+same environment.
+"""
+import argparse
+import hashlib
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import numpy as np
+
+BENCH_ROOT = Path(__file__).resolve().parent
+PROJECT_ROOT = BENCH_ROOT.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from benchmarks import documents  # noqa: E402
+from benchmarks.standins import ASSETS, configure_environment, install_in_memory_mongo  # noqa: E402
+
+GOLDEN_DIR = BENCH_ROOT / "golden"
+SCHEMA_VERSION = 1
+
+# name -> (stand-in BERT graph or None for the real model, env overrides, golden it is checked against)
+CONFIGS = {
+    "bert-disabled": ("full", {"BERT_DISABLED": "1"}, "bert-disabled"),
+    "onnx-standin": ("full", {}, "onnx-standin"),
+    # The CLS-only graph with bound outputs must reproduce the full graph's vectors.
+    "onnx-standin-cls": ("cls", {}, "onnx-standin"),
+    "onnx": (None, {}, "onnx"),
+}
+
+EDGE_CASES = {
+    "edge_single_sentence": "This sentence stands alone.",
+    "edge_no_stopwords": "Quarterly revenue increased. Margins compressed. Guidance unchanged.",
+    "edge_numbers_punctuation": "In 2023, 47% of respondents (n=1,204) said \"yes\"; 12% said no... Others? Unsure!",
+    "edge_unicode": "The café's naïve façade — oddly — charmed everyone. Ünïcödé text still scores.",
+    "edge_repetition": " ".join(["The same words repeat the same way."] * 20),
+}
+
+# (atol, rtol): a value passes when |current - golden| <= atol + rtol * |golden|.
+BERT_TOLERANCE = (1e-4, 1e-4)
+STYLE_TOLERANCES = {
+    "num_words": (0.0, 0.0),
+    "num_sentences": (0.0, 0.0),
+    "readability": (1e-3, 0.0),
+    "perplexity": (1e-2, 1e-4),
+}
+DEFAULT_STYLE_TOLERANCE = (1e-6, 1e-5)
+PROBABILITY_TOLERANCE = (1e-5, 0.0)
+
+NLTK_RESOURCES = (
+    "tokenizers/punkt/english.pickle",
+    "corpora/stopwords/english",
+    "taggers/averaged_perceptron_tagger/averaged_perceptron_tagger.pickle",
+)
+
+
+# Captured before any configuration is applied, so the real-model run sees the caller's settings.
+ORIGINAL_ENV = dict(os.environ)
+
+
+def _configure(name: str) -> None:
+    graph, overrides, _golden = CONFIGS[name]
+    configure_environment(graph or "full")
+    if graph is None:
+        # The deployed model: paths and tokenizer from the environment or the app defaults.
+        for key in ("BERT_TOKENIZER_NAME", "BERT_ONNX_PATH", "BERT_ONNX_CLS_PATH", "HF_HUB_OFFLINE"):
+            os.environ.pop(key, None)
+            if key in ORIGINAL_ENV:
+                os.environ[key] = ORIGINAL_ENV[key]
+    os.environ.update(overrides)
+
+
+def corpus() -> dict[str, str]:
+    texts = {path.stem: path.read_text(encoding="utf-8").strip() for path in sorted(documents.CORPUS_DIR.glob("*.txt"))}
+    texts.update(EDGE_CASES)
+    return texts
+
+
+def _fingerprint() -> dict:
+    import nltk
+
+    versions = {}
+    for module in ("numpy", "nltk", "textstat", "onnxruntime", "xgboost", "transformers"):
+        try:
+            versions[module] = __import__(module).__version__
+        except Exception:
+            versions[module] = None
+
+    data = {}
+    for resource in NLTK_RESOURCES:
+        try:
+            with nltk.data.find(resource).open() as fh:
+                data[resource] = hashlib.sha256(fh.read()).hexdigest()[:16]
+        except (LookupError, OSError):
+            data[resource] = None
+    return {"versions": versions, "nltk_data": data}
+
+
+def compute(name: str) -> dict:
+    """Run the current pipeline over the corpus; returns the arrays a golden file holds."""
+    install_in_memory_mongo()
+    import app
+    from features import feature_extractor as fe
+
+    if CONFIGS[name][0] is None and not fe._resolve_project_path(fe.BERT_ONNX_PATH).exists():
+        raise FileNotFoundError(fe.BERT_ONNX_PATH)
+
+    sentences, doc_index, rows, reference_rows, doc_vectors = [], [], [], [], []
+    texts = corpus()
+    for idx, text in enumerate(texts.values()):
+        doc_sentences = app.sent_tokenize(app._validate_text(text))
+        chunks = app._chunk_sentences(doc_sentences)
+        rows.append(app._feature_matrix(chunks))
+        for chunk_sentences, chunk_text in chunks:
+            reference_rows.extend(fe.build_features_with_chunk_context(s, chunk_text) for s in chunk_sentences)
+        sentences.extend(doc_sentences)
+        doc_index.extend([idx] * len(doc_sentences))
+        doc_vectors.append(fe.extract_features(text))
+
+    features = np.vstack(rows)
+    return {
+        "doc_names": np.array(list(texts)),
+        "doc_index": np.array(doc_index, dtype=np.int32),
+        "sentences": np.array(sentences),
+        "features": features,
+        "reference_features": np.vstack(reference_rows),
+        "probabilities": app.model_registry.current().model.predict_proba(features),
+        "doc_features": np.vstack(doc_vectors),
+        "meta": np.array(json.dumps({"schema": SCHEMA_VERSION, "config": name, **_fingerprint()})),
+    }
+
+
+def column_names() -> list[str]:
+    from features.feature_extractor import BERT_EMBED_DIM, STYLE_FEATURE_NAMES
+
+    return [f"bert_{i}" for i in range(BERT_EMBED_DIM)] + list(STYLE_FEATURE_NAMES)
+
+
+def _tolerances(names: list[str]) -> tuple[np.ndarray, np.ndarray]:
+    atol = np.empty(len(names))
+    rtol = np.empty(len(names))
+    for col, name in enumerate(names):
+        if name.startswith("bert_"):
+            atol[col], rtol[col] = BERT_TOLERANCE
+        else:
+            atol[col], rtol[col] = STYLE_TOLERANCES.get(name, DEFAULT_STYLE_TOLERANCE)
+    return atol, rtol
+
+
+def compare_columns(current: np.ndarray, golden: np.ndarray, names: list[str], sentences) -> list[dict]:
+    """One entry per column with any value outside tolerance, worst first."""
+    atol, rtol = _tolerances(names)
+    diff = np.abs(current.astype(np.float64) - golden.astype(np.float64))
+    limit = atol + rtol * np.abs(golden.astype(np.float64))
+    over = diff > limit
+    drifted = []
+    for col in np.flatnonzero(over.any(axis=0)):
+        row = int(np.argmax(diff[:, col] - limit[:, col]))
+        drifted.append(
+            {
+                "column": names[col],
+                "index": int(col),
+                "rows": int(over[:, col].sum()),
+                "max_abs_diff": float(diff[:, col].max()),
+                "tolerance": f"{atol[col]:g} + {rtol[col]:g}*|golden|",
+                "worst": {"golden": float(golden[row, col]), "current": float(current[row, col]), "sentence": str(sentences[row])[:80]},
+            }
+        )
+    drifted.sort(key=lambda d: d["max_abs_diff"], reverse=True)
+    return drifted
+
+
+def _report_columns(title: str, drifted: list[dict], limit: int) -> None:
+    print(f"  {title}: {len(drifted)} column(s) drifted")
+    for entry in drifted[:limit]:
+        worst = entry["worst"]
+        print(
+            f"    {entry['column']:<16} rows={entry['rows']:<4} max|diff|={entry['max_abs_diff']:.3e} "
+            f"tol={entry['tolerance']:<22} golden={worst['golden']:.6g} current={worst['current']:.6g} "
+            f"\"{worst['sentence']}\""
+        )
+    if len(drifted) > limit:
+        print(f"    ... {len(drifted) - limit} more")
+
+
+def check(name: str, current: dict, golden_path: Path, limit: int) -> bool:
+    golden = np.load(golden_path, allow_pickle=False)
+    golden_meta = json.loads(str(golden["meta"]))
+    current_meta = json.loads(str(current["meta"]))
+    ok = True
+
+    for key in ("versions", "nltk_data"):
+        changed = {k: (golden_meta[key].get(k), v) for k, v in current_meta[key].items() if golden_meta[key].get(k) != v}
+        if changed:
+            print(f"  note: {key} differ from the golden environment: {changed}")
+
+    names = column_names()
+    same_split = list(golden["sentences"]) == list(current["sentences"])
+    if not same_split:
+        ok = False
+        print(f"  sentence split changed: {len(golden['sentences'])} golden vs {len(current['sentences'])} current sentences")
+    else:
+        drifted = compare_columns(current["features"], golden["features"], names, golden["sentences"])
+        _report_columns("serving features vs golden", drifted, limit)
+        prob_diff = float(np.abs(current["probabilities"] - golden["probabilities"]).max())
+        prob_ok = prob_diff <= PROBABILITY_TOLERANCE[0]
+        flips = int((current["probabilities"].argmax(axis=1) != golden["probabilities"].argmax(axis=1)).sum())
+        print(f"  probabilities: max|diff|={prob_diff:.3e} (tol {PROBABILITY_TOLERANCE[0]:g}), top-class flips={flips}")
+        ok = ok and not drifted and prob_ok
+
+    training = compare_columns(current["features"], current["reference_features"], names, current["sentences"])
+    _report_columns("serving features vs build_features_with_chunk_context", training, limit)
+
+    docs = compare_columns(current["doc_features"], golden["doc_features"], names, golden["doc_names"])
+    _report_columns("extract_features (document level) vs golden", docs, limit)
+    return ok and not training and not docs
+
+
+def _sanity(name: str, current: dict) -> None:
+    from features.feature_extractor import BERT_EMBED_DIM
+
+    bert = current["features"][:, :BERT_EMBED_DIM]
+    if CONFIGS[name][1].get("BERT_DISABLED") != "1" and not bert.any():
+        # get_bert_embedding falls back to zeros on errors; a zero golden would hide that.
+        raise RuntimeError("every BERT column is zero: the ONNX path failed and fell back to zeros")
+
+
+def run_one(name: str, freeze: bool, limit: int) -> int:
+    _configure(name)
+    try:
+        current = compute(name)
+    except FileNotFoundError as exc:
+        print(f"[{name}] skipped: no model at {exc}")
+        return 0
+    _sanity(name, current)
+
+    golden_path = GOLDEN_DIR / f"{CONFIGS[name][2]}.npz"
+    if freeze:
+        if CONFIGS[name][2] != name:
+            print(f"[{name}] not frozen: checked against {golden_path.name}")
+            return 0
+        GOLDEN_DIR.mkdir(parents=True, exist_ok=True)
+        np.savez_compressed(golden_path, **current)
+        print(f"[{name}] froze {len(current['sentences'])} sentences from {len(current['doc_names'])} documents -> {golden_path}")
+        return 0
+
+    if not golden_path.exists():
+        print(f"[{name}] no golden at {golden_path}; run with --freeze first")
+        return 1
+    print(f"[{name}] {len(current['sentences'])} sentences vs {golden_path.name}")
+    ok = check(name, current, golden_path, limit)
+    print(f"[{name}] {'OK' if ok else 'DRIFT'}")
+    return 0 if ok else 1
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Freeze or check golden feature vectors and probabilities.")
+    mode = parser.add_mutually_exclusive_group(required=True)
+    mode.add_argument("--freeze", action="store_true", help="Write goldens from the current code")
+    mode.add_argument("--check", action="store_true", help="Compare the current code against the goldens")
+    parser.add_argument("--configs", nargs="+", choices=list(CONFIGS), default=list(CONFIGS))
+    parser.add_argument("--show", type=int, default=10, help="Drifted columns to list per comparison")
+    parser.add_argument("--in-process", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.in_process:
+        return run_one(args.configs[0], args.freeze, args.show)
+
+    if not (ASSETS / "standin_bert.onnx").exists():
+        print("Stand-in BERT assets are missing; run benchmarks/build_standin_model.py", file=sys.stderr)
+        return 2
+    failed = []
+    for name in args.configs:
+        command = [sys.executable, __file__, "--freeze" if args.freeze else "--check", "--configs", name, "--show", str(args.show), "--in-process"]
+        if subprocess.call(command, cwd=PROJECT_ROOT) != 0:
+            failed.append(name)
+    if failed:
+        print(f"\nFailed: {', '.join(failed)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,229 @@
+import argparse
+from datetime import datetime, timezone
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+BENCH_ROOT = Path(__file__).resolve().parent
+PROJECT_ROOT = BENCH_ROOT.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from benchmarks import documents  # noqa: E402
+from benchmarks.standins import configure_environment, install_in_memory_mongo  # noqa: E402
+
+RESULTS_DIR = BENCH_ROOT / "results"
+SCHEMA_VERSION = 1
+GROUPS = ("stylometry", "bert", "features", "predict", "extract")
+# Stop repeating a case once this much time has been spent on it.
+CASE_BUDGET_SECONDS = 20.0
+
+
+def _sizes(max_chars: int, quick: bool) -> list[tuple[str, int]]:
+    sizes = [("sentence", 0), ("1k", 1_000), ("10k", 10_000)]
+    if not quick:
+        sizes += [("100k", 100_000), ("max", max_chars)]
+    return sizes
+
+
+def _text(chars: int, seed: int) -> str:
+    return documents.first_sentence() if chars == 0 else documents.corpus_text(chars, seed)
+
+
+def measure(fn, repeat: int, setup=None) -> dict:
+    """One warm-up call, then up to ``repeat`` timed calls within CASE_BUDGET_SECONDS."""
+    if setup:
+        setup()
+    fn()
+
+    samples = []
+    spent = 0.0
+    while len(samples) < repeat and (not samples or spent < CASE_BUDGET_SECONDS):
+        if setup:
+            setup()
+        started_at = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - started_at
+        samples.append(elapsed)
+        spent += elapsed
+
+    return {
+        "median_ms": round(statistics.median(samples) * 1000, 3),
+        "min_ms": round(min(samples) * 1000, 3),
+        "max_ms": round(max(samples) * 1000, 3),
+        "runs": len(samples),
+    }
+
+
+def run_suite(args) -> dict:
+    configure_environment(args.bert_graph)
+    collections = install_in_memory_mongo()
+
+    # Imported only now: both read the environment and Mongo collections at import time.
+    import app
+    from extraction.docx_text import extract_docx_text
+    from extraction.pdf import extract_pdf_text, shutdown_pdf_pool
+    from extraction.pptx_text import extract_pptx_text
+    from extraction.text import extract_plain_text
+    from features import feature_extractor as fe
+
+    def clear_caches():
+        fe._get_chunk_bert_features_cached.cache_clear()
+        fe._get_chunk_perplexity_cached.cache_clear()
+        for collection in collections.values():
+            collection.clear()
+
+    sizes = _sizes(app.MAX_TEXT_CHARS, args.quick)
+    results = {}
+
+    def record(group: str, size: str, chars: int, stats: dict, **extra) -> None:
+        key = f"{group}/{size}"
+        results[key] = {"group": group, "size": size, "chars": chars, **stats, **extra}
+        print(f"{key:<28} {chars:>9} chars {stats['median_ms']:>11.3f} ms median ({stats['runs']} runs)")
+
+    if "stylometry" in args.groups:
+        for size, chars in sizes[:4]:
+            text = _text(chars, args.seed)
+            record("stylometry", size, len(text), measure(lambda: fe.stylometric_analysis_no_perplexity(text), args.repeat))
+
+    if "bert" in args.groups:
+        for size, chars in sizes[:4]:
+            text = _text(chars, args.seed)
+            record("bert", size, len(text), measure(lambda: fe.get_bert_embedding(text), args.repeat))
+
+    if "features" in args.groups:
+        sentences = app.sent_tokenize(_text(10_000, args.seed))[: app.CHUNK_SENTENCE_SIZE]
+        chunk_text = " ".join(sentences)
+
+        def chunk_rows():
+            for sentence in sentences:
+                fe.build_features_with_chunk_context(sentence, chunk_text)
+
+        # Cold: the chunk embedding is computed; warm: it comes from the chunk cache.
+        record("features", "chunk_cold", len(chunk_text), measure(chunk_rows, args.repeat, setup=clear_caches), sentences=len(sentences))
+        record("features", "chunk_warm", len(chunk_text), measure(chunk_rows, args.repeat), sentences=len(sentences))
+
+    if "predict" in args.groups:
+        for size, chars in sizes:
+            text = _text(chars, args.seed)
+            outcome = {}
+
+            def predict():
+                outcome.update(app.run_prediction(text, user_id="000000000000000000000000", tokens_before=10))
+
+            stats = measure(predict, args.repeat, setup=clear_caches)
+            record("predict", size, len(text), stats, sentences=outcome.get("sentences_processed"))
+
+    if "extract" in args.groups:
+        formats = (
+            ("txt", lambda text: text.encode("utf-8"), extract_plain_text),
+            ("pdf", documents.build_pdf, extract_pdf_text),
+            ("docx", documents.build_docx, extract_docx_text),
+            ("pptx", documents.build_pptx, extract_pptx_text),
+        )
+        try:
+            for name, build, extract in formats:
+                for size, chars in sizes[1:]:
+                    data = build(_text(chars, args.seed))
+                    stats = measure(lambda: extract(io.BytesIO(data)), args.repeat)
+                    record(f"extract_{name}", size, chars, stats, file_bytes=len(data))
+        finally:
+            shutdown_pdf_pool()
+
+    return results
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=PROJECT_ROOT, text=True).strip()
+    except Exception:
+        return "unknown"
+
+
+def _versions() -> dict:
+    versions = {"python": platform.python_version()}
+    for name in ("numpy", "onnxruntime", "xgboost", "nltk", "transformers", "pypdf"):
+        try:
+            versions[name] = __import__(name).__version__
+        except Exception:
+            versions[name] = None
+    return versions
+
+
+def compare(current: dict, baseline: dict, threshold: float, min_ms: float) -> list[str]:
+    """Print per-case ratios against ``baseline``; returns the keys slower than ``threshold``.
+
+    Cases faster than ``min_ms`` in both runs are listed but never flagged: at that scale
+    timer and scheduler noise outweighs real changes.
+    """
+    regressions = []
+    print(f"\n{'case':<28} {'baseline ms':>12} {'current ms':>12} {'ratio':>7}")
+    for key, now in current["results"].items():
+        before = baseline["results"].get(key)
+        if not before or not before["median_ms"]:
+            continue
+        ratio = now["median_ms"] / before["median_ms"]
+        flag = ""
+        if max(now["median_ms"], before["median_ms"]) < min_ms:
+            flag = "  (below --min-ms)"
+        elif ratio > 1 + threshold:
+            flag = "  REGRESSION"
+            regressions.append(key)
+        elif ratio < 1 - threshold:
+            flag = "  faster"
+        print(f"{key:<28} {before['median_ms']:>12.2f} {now['median_ms']:>12.2f} {ratio:>7.2f}{flag}")
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Offline benchmarks for the scoring pipeline.")
+    parser.add_argument("--groups", nargs="+", choices=GROUPS, default=list(GROUPS))
+    parser.add_argument("--quick", action="store_true", help="Only sizes up to 10k characters")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--bert-graph", choices=("full", "cls"), default="full")
+    parser.add_argument("--output", help="Result JSON path (default: benchmarks/results/<timestamp>.json)")
+    parser.add_argument("--compare", metavar="BASELINE", help="Earlier result JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.15, help="Median slowdown that counts as a regression")
+    parser.add_argument("--min-ms", type=float, default=2.0, help="Ignore regressions in cases faster than this")
+    args = parser.parse_args()
+
+    started = datetime.now(timezone.utc)
+    results = run_suite(args)
+    report = {
+        "schema": SCHEMA_VERSION,
+        "meta": {
+            "started_at": started.isoformat(),
+            "commit": _git_commit(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "versions": _versions(),
+            "args": {k: v for k, v in vars(args).items() if k not in {"output", "compare"}},
+            "pdf_extract_workers": os.getenv("PDF_EXTRACT_WORKERS", "2"),
+        },
+        "results": results,
+    }
+
+    output = Path(args.output) if args.output else RESULTS_DIR / f"{started:%Y%m%dT%H%M%SZ}-{report['meta']['commit']}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+    print(f"\nSaved {output}")
+
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text(encoding="utf-8"))
+        if baseline["meta"].get("cpu_count") != report["meta"]["cpu_count"]:
+            print("Note: baseline ran on a machine with a different CPU count")
+        regressions = compare(report, baseline, args.threshold, args.min_ms)
+        if regressions:
+            print(f"\n{len(regressions)} case(s) slower than the baseline by more than {args.threshold:.0%}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
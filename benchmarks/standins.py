@@ -0,0 +1,384 @@
+import copy
+import os
+from pathlib import Path
+import threading
+
+from bson import ObjectId
+
+BENCH_ROOT = Path(__file__).resolve().parent
+ASSETS = BENCH_ROOT / "assets"
+
+
+def configure_environment(bert_graph: str = "full") -> dict:
+    """Point the app at the bundled stand-ins. Must run before app/feature modules are imported.
+
+    ``bert_graph`` is ``full`` (last_hidden_state graph) or ``cls`` (the CLS-only variant
+    with bound output buffers).
+    """
+    cls_path = ASSETS / "standin_bert_cls.onnx" if bert_graph == "cls" else ASSETS / "no_cls_graph.onnx"
+    settings = {
+        # bson can parse it; the client never connects because every collection is replaced.
+        "MONGO_URI": "mongodb://127.0.0.1:1/?serverSelectionTimeoutMS=1",
+        "BERT_DISABLED": "0",
+        "BERT_BACKEND": "onnx",
+        "BERT_TOKENIZER_NAME": str(ASSETS),
+        "BERT_ONNX_PATH": str(ASSETS / "standin_bert.onnx"),
+        "BERT_ONNX_CLS_PATH": str(cls_path),
+        "ONNX_DATA_REQUIRED": "0",
+        "ONNX_RUNTIME_DOWNLOAD": "0",
+        "ENABLE_PERPLEXITY": "0",
+        "MODEL_WARMUP": "0",
+        "CASCADE_ENABLED": "0",
+        "OUTBOX_SENDER_ENABLED": "0",
+        "SCAN_JOBS_ENABLED": "0",
+        "EXTRACTION_CACHE_DIR": "",
+        "DEFAULT_ADMIN_EMAIL": "",
+        "DEFAULT_ADMIN_PASSWORD": "",
+        "HF_HUB_OFFLINE": "1",
+    }
+    os.environ.update(settings)
+    return settings
+
+
+class _Result:
+    def __init__(self, inserted_id=None, inserted_ids=None, matched: int = 0, upserted_id=None):
+        self.inserted_id = inserted_id
+        self.inserted_ids = inserted_ids
+        self.matched_count = matched
+        self.modified_count = matched
+        self.deleted_count = matched
+        self.upserted_id = upserted_id
+
+
+def _get(doc, path: str):
+    value = doc
+    for part in path.split("."):
+        if not isinstance(value, dict) or part not in value:
+            return _MISSING
+        value = value[part]
+    return value
+
+
+_MISSING = object()
+_TYPE_NAMES = {"string": str, "int": int, "double": float, "bool": bool, "object": dict, "array": list}
+
+
+def _compare(value, op: str, arg) -> bool:
+    if op == "$exists":
+        return (value is not _MISSING) == bool(arg)
+    if value is _MISSING:
+        value = None
+    if op == "$ne":
+        return value != arg
+    if op == "$in":
+        return value in arg
+    if op == "$nin":
+        return value not in arg
+    if op == "$type":
+        return isinstance(value, _TYPE_NAMES.get(arg, object))
+    if value is None or arg is None:
+        return False
+    try:
+        return {"$gt": value > arg, "$gte": value >= arg, "$lt": value < arg, "$lte": value <= arg}[op]
+    except TypeError:
+        return False
+
+
+def matches(doc: dict, query: dict) -> bool:
+    for key, cond in (query or {}).items():
+        if key == "$or":
+            if not any(matches(doc, sub) for sub in cond):
+                return False
+        elif key == "$and":
+            if not all(matches(doc, sub) for sub in cond):
+                return False
+        else:
+            value = _get(doc, key)
+            if isinstance(cond, dict) and cond and all(k.startswith("$") for k in cond):
+                if not all(_compare(value, op, arg) for op, arg in cond.items()):
+                    return False
+            elif value is _MISSING:
+                if cond is not None:
+                    return False
+            elif value != cond and not (isinstance(value, list) and cond in value):
+                return False
+    return True
+
+
+def _set(doc: dict, path: str, value) -> None:
+    *parents, leaf = path.split(".")
+    for part in parents:
+        doc = doc.setdefault(part, {})
+    doc[leaf] = value
+
+
+def _unset(doc: dict, path: str) -> None:
+    *parents, leaf = path.split(".")
+    for part in parents:
+        doc = doc.get(part)
+        if not isinstance(doc, dict):
+            return
+    doc.pop(leaf, None)
+
+
+def apply_update(doc: dict, update: dict, inserting: bool = False) -> None:
+    for op, fields in update.items():
+        for path, value in fields.items():
+            current = _get(doc, path)
+            if op == "$set" or (op == "$setOnInsert" and inserting):
+                _set(doc, path, copy.deepcopy(value))
+            elif op == "$inc":
+                _set(doc, path, (0 if current is _MISSING else current) + value)
+            elif op == "$unset":
+                _unset(doc, path)
+            elif op == "$max" and (current is _MISSING or value > current):
+                _set(doc, path, value)
+            elif op == "$min" and (current is _MISSING or value < current):
+                _set(doc, path, value)
+
+
+def project(doc: dict, projection) -> dict:
+    doc = copy.deepcopy(doc)
+    if not projection:
+        return doc
+    include = {k for k, v in projection.items() if v and k != "_id"}
+    if include:
+        kept = {k: doc[k] for k in include if k in doc}
+        if projection.get("_id", 1):
+            kept["_id"] = doc.get("_id")
+        return kept
+    for path, flag in projection.items():
+        if not flag:
+            _unset(doc, path)
+    return doc
+
+
+def _sort_key(fields: list[tuple[str, int]]):
+    def key(doc):
+        parts = []
+        for path, _direction in fields:
+            value = _get(doc, path)
+            parts.append((value is _MISSING or value is None, value if value is not _MISSING else None))
+        return parts
+    return key
+
+
+def _normalize_sort(key_or_list, direction=None) -> list[tuple[str, int]]:
+    if isinstance(key_or_list, str):
+        return [(key_or_list, direction or 1)]
+    return list(key_or_list)
+
+
+def _sorted(docs: list[dict], fields: list[tuple[str, int]]) -> list[dict]:
+    # Stable multi-key sort: apply keys from last to first.
+    for path, direction in reversed(fields):
+        docs = sorted(docs, key=_sort_key([(path, direction)]), reverse=direction < 0)
+    return docs
+
+
+class InMemoryCursor:
+    def __init__(self, collection: "InMemoryCollection", query: dict, projection=None):
+        self._collection = collection
+        self._query = query
+        self._projection = projection
+        self._sort = []
+        self._skip = 0
+        self._limit = 0
+
+    def sort(self, key_or_list, direction=None) -> "InMemoryCursor":
+        self._sort = _normalize_sort(key_or_list, direction)
+        return self
+
+    def skip(self, count: int) -> "InMemoryCursor":
+        self._skip = count
+        return self
+
+    def limit(self, count: int) -> "InMemoryCursor":
+        self._limit = count
+        return self
+
+    def _results(self) -> list[dict]:
+        docs = self._collection._matching(self._query)
+        if self._sort:
+            docs = _sorted(docs, self._sort)
+        docs = docs[self._skip:]
+        if self._limit:
+            docs = docs[: self._limit]
+        return [project(doc, self._projection) for doc in docs]
+
+    def __iter__(self):
+        return iter(self._results())
+
+    def to_list(self, length=None) -> list[dict]:
+        docs = self._results()
+        return docs[:length] if length else docs
+
+
+class InMemoryCollection:
+    """Single-process stand-in for a pymongo collection.
+
+    Covers the query and update operators the app uses (equality, comparison, $in/$nin,
+    $exists, $or; $set/$inc/$unset/$setOnInsert/$max/$min), projections, sorting, upserts
+    and bulk UpdateOne/InsertOne writes. No indexes: lookups scan, which is fine at
+    load-test sizes but means database cost is not what is being measured.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.docs = []
+        self._lock = threading.RLock()
+
+    def _matching(self, query: dict) -> list[dict]:
+        with self._lock:
+            return [doc for doc in self.docs if matches(doc, query)]
+
+    def create_index(self, *_args, **_kwargs) -> str:
+        return "stand-in"
+
+    def insert_one(self, doc: dict) -> _Result:
+        doc.setdefault("_id", ObjectId())
+        with self._lock:
+            self.docs.append(copy.deepcopy(doc))
+        return _Result(inserted_id=doc["_id"])
+
+    def insert_many(self, docs: list[dict], **_kwargs) -> _Result:
+        return _Result(inserted_ids=[self.insert_one(doc).inserted_id for doc in docs])
+
+    def find(self, query: dict = None, projection=None, **_kwargs) -> InMemoryCursor:
+        return InMemoryCursor(self, query or {}, projection)
+
+    def find_one(self, query: dict = None, projection=None, **_kwargs):
+        docs = self._matching(query or {})
+        return project(docs[0], projection) if docs else None
+
+    def count_documents(self, query: dict, **_kwargs) -> int:
+        return len(self._matching(query))
+
+    def find_one_and_update(self, query, update, projection=None, sort=None, upsert=False, return_document=False, **_kwargs):
+        with self._lock:
+            docs = self._matching(query)
+            if sort:
+                docs = _sorted(docs, _normalize_sort(sort))
+            if not docs:
+                if not upsert:
+                    return None
+                doc = {k: v for k, v in query.items() if not k.startswith("$") and not isinstance(v, dict)}
+                apply_update(doc, update, inserting=True)
+                doc.setdefault("_id", ObjectId())
+                self.docs.append(doc)
+                return project(doc, projection) if return_document else None
+            doc = docs[0]
+            before = project(doc, projection)
+            apply_update(doc, update)
+            # ReturnDocument.AFTER is True, BEFORE is False.
+            return project(doc, projection) if return_document else before
+
+    def update_one(self, query, update, upsert=False, **_kwargs) -> _Result:
+        with self._lock:
+            docs = self._matching(query)
+            if docs:
+                apply_update(docs[0], update)
+                return _Result(matched=1)
+            if upsert:
+                doc = {k: v for k, v in query.items() if not k.startswith("$") and not isinstance(v, dict)}
+                apply_update(doc, update, inserting=True)
+                doc.setdefault("_id", ObjectId())
+                self.docs.append(doc)
+                return _Result(upserted_id=doc["_id"])
+            return _Result()
+
+    def update_many(self, query, update, **_kwargs) -> _Result:
+        with self._lock:
+            docs = self._matching(query)
+            for doc in docs:
+                apply_update(doc, update)
+            return _Result(matched=len(docs))
+
+    def delete_one(self, query, **_kwargs) -> _Result:
+        with self._lock:
+            for idx, doc in enumerate(self.docs):
+                if matches(doc, query):
+                    del self.docs[idx]
+                    return _Result(matched=1)
+            return _Result()
+
+    def delete_many(self, query, **_kwargs) -> _Result:
+        with self._lock:
+            before = len(self.docs)
+            self.docs = [doc for doc in self.docs if not matches(doc, query)]
+            return _Result(matched=before - len(self.docs))
+
+    def bulk_write(self, ops: list, **_kwargs) -> _Result:
+        for op in ops:
+            if hasattr(op, "_filter"):
+                self.update_one(op._filter, op._doc, upsert=bool(getattr(op, "_upsert", False)))
+            else:
+                self.insert_one(op._doc)
+        return _Result(matched=len(ops))
+
+    def clear(self) -> None:
+        with self._lock:
+            self.docs.clear()
+
+
+class AsyncInMemoryCursor:
+    def __init__(self, cursor: InMemoryCursor):
+        self._cursor = cursor
+
+    def sort(self, key_or_list, direction=None) -> "AsyncInMemoryCursor":
+        self._cursor.sort(key_or_list, direction)
+        return self
+
+    def skip(self, count: int) -> "AsyncInMemoryCursor":
+        self._cursor.skip(count)
+        return self
+
+    def limit(self, count: int) -> "AsyncInMemoryCursor":
+        self._cursor.limit(count)
+        return self
+
+    async def to_list(self, length=None) -> list[dict]:
+        return self._cursor.to_list(length)
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for doc in self._cursor:
+            yield doc
+
+
+class AsyncInMemoryCollection:
+    """Awaitable view of an InMemoryCollection, matching AsyncMongoClient's collection API."""
+
+    def __init__(self, collection: InMemoryCollection):
+        self.sync = collection
+
+    def find(self, *args, **kwargs) -> AsyncInMemoryCursor:
+        return AsyncInMemoryCursor(self.sync.find(*args, **kwargs))
+
+    def __getattr__(self, name):
+        method = getattr(self.sync, name)
+
+        async def call(*args, **kwargs):
+            return method(*args, **kwargs)
+
+        return call
+
+
+def install_in_memory_mongo() -> dict:
+    """Replace every collection on backend.mongo and backend.async_mongo before other modules import them.
+
+    Both modules share one store per collection, as they share one database in production.
+    """
+    import backend.async_mongo as async_mongo
+    import backend.mongo as mongo
+
+    collections = {}
+    for attr in dir(mongo):
+        if attr.endswith("_collection"):
+            collections[attr] = InMemoryCollection(attr[: -len("_collection")])
+            setattr(mongo, attr, collections[attr])
+            if hasattr(async_mongo, attr):
+                setattr(async_mongo, attr, AsyncInMemoryCollection(collections[attr]))
+    return collections
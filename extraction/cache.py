@@ -0,0 +1,187 @@
+from collections import OrderedDict
+from contextvars import ContextVar
+import hashlib
+import os
+from pathlib import Path
+import re
+import sys
+import threading
+from typing import BinaryIO, Callable, Optional
+
+# Bump whenever extractor or normalizer output changes, so stale cached text is never served.
+EXTRACTOR_VERSION = "2"
+
+EXTRACTION_CACHE_MAX_BYTES = int(os.getenv("EXTRACTION_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+EXTRACTION_CACHE_DIR = os.getenv("EXTRACTION_CACHE_DIR", "").strip()
+EXTRACTION_CACHE_DISK_MAX_BYTES = int(os.getenv("EXTRACTION_CACHE_DISK_MAX_BYTES", str(512 * 1024 * 1024)))
+
+_DIGEST_RE = re.compile(r"^[0-9a-f]{64}$")
+_HASH_CHUNK_BYTES = 1024 * 1024
+# Raised by an extractor whose output is partial (e.g. a PDF page ran out of its time budget).
+# Partial text is returned to the caller but never cached, so the next upload parses it again.
+_partial_result: ContextVar[bool] = ContextVar("extraction_partial_result", default=False)
+
+
+def mark_partial_result() -> None:
+    _partial_result.set(True)
+
+
+def file_digest(stream: BinaryIO) -> str:
+    """SHA-256 of a seekable binary stream, read in chunks and rewound afterwards."""
+    stream.seek(0)
+    digest = hashlib.sha256()
+    while True:
+        chunk = stream.read(_HASH_CHUNK_BYTES)
+        if not chunk:
+            break
+        digest.update(chunk)
+    stream.seek(0)
+    return digest.hexdigest()
+
+
+def is_valid_digest(value: str) -> bool:
+    return bool(_DIGEST_RE.match(value or ""))
+
+
+class ExtractionCache:
+    """Byte-bounded LRU of normalized extraction output, optionally persisted to disk."""
+
+    def __init__(self, max_bytes: int, disk_dir: str = "", disk_max_bytes: int = 0):
+        self.max_bytes = max_bytes
+        self.disk_dir = Path(disk_dir) if disk_dir else None
+        self.disk_max_bytes = disk_max_bytes
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, tuple[str, str]] = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.partial_skips = 0
+        if self.disk_dir:
+            self.disk_dir.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def _key(digest: str) -> str:
+        return f"v{EXTRACTOR_VERSION}-{digest}"
+
+    @staticmethod
+    def _entry_size(text: str) -> int:
+        return sys.getsizeof(text)
+
+    def _disk_path(self, key: str, ext: str) -> Path:
+        return self.disk_dir / f"{key}{ext or '.bin'}.txt"
+
+    def _store_memory(self, key: str, ext: str, text: str) -> None:
+        size = self._entry_size(text)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= self._entry_size(previous[1])
+            self._entries[key] = (ext, text)
+            self._bytes += size
+            while self._bytes > self.max_bytes and self._entries:
+                _old_key, (_old_ext, old_text) = self._entries.popitem(last=False)
+                self._bytes -= self._entry_size(old_text)
+
+    def _load_disk(self, key: str, ext: Optional[str]) -> Optional[tuple[str, str]]:
+        if not self.disk_dir:
+            return None
+        candidates = [self._disk_path(key, ext)] if ext is not None else sorted(self.disk_dir.glob(f"{key}.*.txt"))
+        for path in candidates:
+            try:
+                text = path.read_text(encoding="utf-8")
+            except OSError:
+                continue
+            found_ext = path.name[len(key):-len(".txt")]
+            return (found_ext if found_ext != ".bin" else ""), text
+        return None
+
+    def _store_disk(self, key: str, ext: str, text: str) -> None:
+        if not self.disk_dir:
+            return
+        path = self._disk_path(key, ext)
+        tmp = path.with_suffix(path.suffix + ".tmp")
+        try:
+            tmp.write_text(text, encoding="utf-8")
+            tmp.replace(path)
+            self._prune_disk()
+        except OSError:
+            pass
+
+    def _prune_disk(self) -> None:
+        if self.disk_max_bytes <= 0:
+            return
+        files = sorted(self.disk_dir.glob("*.txt"), key=lambda p: p.stat().st_mtime)
+        total = sum(p.stat().st_size for p in files)
+        for path in files:
+            if total <= self.disk_max_bytes:
+                break
+            total -= path.stat().st_size
+            path.unlink(missing_ok=True)
+
+    def get(self, digest: str, ext: Optional[str] = None) -> Optional[str]:
+        """Cached text for ``digest``; when ``ext`` is given it must match the cached format."""
+        key = self._key(digest)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (ext is None or entry[0] == ext):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+
+        loaded = self._load_disk(key, ext)
+        if loaded is not None:
+            with self._lock:
+                self.disk_hits += 1
+            self._store_memory(key, *loaded)
+            return loaded[1]
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def get_or_extract(self, digest: str, ext: str, extract: Callable[[], str]) -> str:
+        cached = self.get(digest, ext)
+        if cached is not None:
+            return cached
+
+        token = _partial_result.set(False)
+        try:
+            text = extract()
+            partial = _partial_result.get()
+        finally:
+            _partial_result.reset(token)
+        if partial:
+            with self._lock:
+                self.partial_skips += 1
+            return text
+
+        key = self._key(digest)
+        self._store_memory(key, ext, text)
+        self._store_disk(key, ext, text)
+        return text
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "extractor_version": EXTRACTOR_VERSION,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "partial_skips": self.partial_skips,
+                "hit_rate": round((self.hits + self.disk_hits) / lookups, 4) if lookups else 0.0,
+                "disk_enabled": bool(self.disk_dir),
+            }
+
+
+extraction_cache = ExtractionCache(
+    EXTRACTION_CACHE_MAX_BYTES,
+    disk_dir=EXTRACTION_CACHE_DIR,
+    disk_max_bytes=EXTRACTION_CACHE_DISK_MAX_BYTES,
+)
@@ -0,0 +1,38 @@
+import re
+from typing import BinaryIO
+
+from docx import Document
+
+
+def extract_docx_text(stream: BinaryIO) -> str:
+    document = Document(stream)
+    parts = []
+
+    for p in document.paragraphs:
+        txt = p.text.strip()
+        if not txt:
+            continue
+
+        style_name = (p.style.name or "").lower() if p.style else ""
+        if style_name.startswith("heading"):
+            parts.append(txt.upper())
+            parts.append("")
+            continue
+
+        # Keep simple bullet/numbered intent visible in plain text output.
+        if style_name.startswith("list"):
+            parts.append(f"- {txt}")
+        else:
+            parts.append(txt)
+
+    # Include table content (previously lost).
+    for table in document.tables:
+        parts.append("")
+        for row in table.rows:
+            cells = [re.sub(r"\s+", " ", c.text).strip() for c in row.cells]
+            cells = [c for c in cells if c]
+            if cells:
+                parts.append(" | ".join(cells))
+        parts.append("")
+
+    return "\n".join(parts)
@@ -0,0 +1,34 @@
+from io import BytesIO
+import os
+from typing import BinaryIO, Union
+
+from backend.timing import stage_timer
+from extraction.cache import extraction_cache, file_digest
+from extraction.normalize import normalize_extracted_text
+from extraction.plugins import extractor_registry
+
+
+def _as_stream(source: Union[bytes, BinaryIO]) -> BinaryIO:
+    return BytesIO(source) if isinstance(source, (bytes, bytearray)) else source
+
+
+def extract_text_from_upload(filename: str, source: Union[bytes, BinaryIO]) -> str:
+    # Parser libraries are imported by the registry on first use of each format.
+    ext = os.path.splitext(filename or "")[1].lower()
+    extract = extractor_registry.get(ext)
+    with stage_timer("extract"):
+        raw_text = extract(_as_stream(source))
+    with stage_timer("normalize"):
+        return normalize_extracted_text(raw_text)
+
+
+def extract_text_cached(filename: str, stream: BinaryIO) -> tuple[str, str]:
+    """Extract an upload through the digest-keyed cache. Returns ``(digest, text)``.
+
+    Hashing the spooled file is a single sequential read, far cheaper than parsing it again
+    when the same document is re-uploaded (e.g. extract, then scan).
+    """
+    digest = file_digest(stream)
+    ext = os.path.splitext(filename or "")[1].lower()
+    text = extraction_cache.get_or_extract(digest, ext, lambda: extract_text_from_upload(filename, stream).strip())
+    return digest, text
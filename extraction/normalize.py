@@ -0,0 +1,59 @@
+import re
+from typing import Iterator
+
+_LINE_BREAK_RE = re.compile(r"\r\n|\r|\n")
+_SPACE_RUN_RE = re.compile(r"[ \t\xa0]+")
+
+
+def _is_ascii_letter(ch: str) -> bool:
+    return ch.isascii() and ch.isalpha()
+
+
+def _ends_with_hyphen_wrap(raw: str) -> bool:
+    return len(raw) >= 2 and raw[-1] == "-" and _is_ascii_letter(raw[-2])
+
+
+def _logical_lines(text: str) -> Iterator[str]:
+    # Merge PDF-style hyphenated wraps while walking the lines: "exam-\nple" -> "example".
+    carry = None
+    for raw in _LINE_BREAK_RE.split(text):
+        if carry is not None:
+            if raw and _is_ascii_letter(raw[0]):
+                raw = carry[:-1] + raw
+            else:
+                yield carry
+            carry = None
+        if _ends_with_hyphen_wrap(raw):
+            carry = raw
+            continue
+        yield raw
+    if carry is not None:
+        yield carry
+
+
+def iter_normalized_lines(text: str) -> Iterator[str]:
+    """Yield cleaned lines of ``text`` in a single pass.
+
+    Line endings are unified, hyphen wraps merged, runs of spaces/tabs/NBSP collapsed and
+    edges stripped. Runs of blank lines become one empty line, and there are no leading or
+    trailing blank lines, so ``"\\n".join(...)`` is the normalized text.
+    """
+    emitted = False
+    pending_blank = False
+    for raw in _logical_lines(text):
+        # Most lines have nothing to collapse; skip the regex for them.
+        if "  " in raw or "\t" in raw or "\xa0" in raw:
+            raw = _SPACE_RUN_RE.sub(" ", raw)
+        line = raw.strip()
+        if not line:
+            pending_blank = emitted
+            continue
+        if pending_blank:
+            yield ""
+            pending_blank = False
+        emitted = True
+        yield line
+
+
+def normalize_extracted_text(text: str) -> str:
+    return "\n".join(iter_normalized_lines(text))
@@ -0,0 +1,272 @@
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager, nullcontext
+import logging
+import math
+import multiprocessing
+import os
+import shutil
+import signal
+import tempfile
+import threading
+import time
+from typing import BinaryIO, Optional
+
+from pypdf import PdfReader
+
+from extraction.cache import mark_partial_result
+
+logger = logging.getLogger("uvicorn.error")
+
+# Persistent spawn workers every PDF is parsed in; 0 parses each PDF in a one-off child process.
+PDF_EXTRACT_WORKERS = max(int(os.getenv("PDF_EXTRACT_WORKERS", "2")), 0)
+# Below this many pages a PDF is one task for one worker; splitting would cost more than it saves.
+PDF_PARALLEL_MIN_PAGES = max(int(os.getenv("PDF_PARALLEL_MIN_PAGES", "16")), 1)
+PDF_MAX_PAGES = int(os.getenv("PDF_MAX_PAGES", "1000"))
+PDF_PAGE_BUDGET_SECONDS = float(os.getenv("PDF_PAGE_BUDGET_SECONDS", "2.0"))
+# A one-off child gets this long to start, plus the worst case of every page's budget, before
+# it is killed and its remaining pages are reported as timed out.
+PDF_CHILD_STARTUP_SECONDS = 10.0
+
+
+class _PageBudgetExceeded(Exception):
+    pass
+
+
+def _raise_budget_exceeded(_signum, _frame):
+    raise _PageBudgetExceeded()
+
+
+@contextmanager
+def _alarm_budget(seconds: float):
+    previous = signal.signal(signal.SIGALRM, _raise_budget_exceeded)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+def _time_budget(seconds: float):
+    # SIGALRM only interrupts the main thread, so pages are always parsed on the main thread
+    # of a child process (see extract_pdf_text).
+    if seconds <= 0:
+        return nullcontext()
+    if not hasattr(signal, "setitimer") or threading.current_thread() is not threading.main_thread():
+        logger.warning("PDF page budget cannot be enforced on this thread or platform; parsing unbudgeted")
+        return nullcontext()
+    return _alarm_budget(seconds)
+
+
+def _extract_page(page, budget: float) -> tuple[Optional[str], str]:
+    try:
+        with _time_budget(budget):
+            return page.extract_text(extraction_mode="layout") or "", "layout"
+    except (_PageBudgetExceeded, TypeError):
+        # TypeError: older pypdf without layout mode.
+        pass
+
+    try:
+        with _time_budget(budget * 2):
+            return page.extract_text() or "", "plain"
+    except _PageBudgetExceeded:
+        return None, "timeout"
+
+
+def _extract_page_range(reader: PdfReader, start: int, end: int, budget: float) -> list[tuple[int, Optional[str], str]]:
+    return [(idx, *_extract_page(reader.pages[idx], budget)) for idx in range(start, end)]
+
+
+def _extract_page_range_from_path(path: str, start: int, end: int, budget: float):
+    # Runs in a pool worker; each task opens its own reader on the shared temp file.
+    return _extract_page_range(PdfReader(path), start, end, budget)
+
+
+def _extract_in_child(path: str, page_count: int, budget: float, conn) -> None:
+    # One-off child process: pages are sent as they finish, so a kill keeps the earlier ones.
+    try:
+        reader = PdfReader(path)
+        for idx in range(page_count):
+            conn.send((idx, *_extract_page(reader.pages[idx], budget)))
+    finally:
+        conn.close()
+
+
+class _PdfStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.documents_total = 0
+        self.pages_total = 0
+        self.seconds_total = 0.0
+        self.layout_fallbacks_total = 0
+        self.page_timeouts_total = 0
+        self.parallel_documents_total = 0
+        self.last_pages_per_second = 0.0
+
+    def record(self, pages: int, seconds: float, modes: list[str], parallel: bool) -> None:
+        with self._lock:
+            self.documents_total += 1
+            self.pages_total += pages
+            self.seconds_total += seconds
+            self.layout_fallbacks_total += sum(1 for m in modes if m == "plain")
+            self.page_timeouts_total += sum(1 for m in modes if m == "timeout")
+            self.parallel_documents_total += int(parallel)
+            self.last_pages_per_second = pages / seconds if seconds > 0 else 0.0
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "workers": PDF_EXTRACT_WORKERS,
+                "documents_total": self.documents_total,
+                "parallel_documents_total": self.parallel_documents_total,
+                "pages_total": self.pages_total,
+                "layout_fallbacks_total": self.layout_fallbacks_total,
+                "page_timeouts_total": self.page_timeouts_total,
+                "avg_pages_per_second": round(self.pages_total / self.seconds_total, 2) if self.seconds_total else 0.0,
+                "last_pages_per_second": round(self.last_pages_per_second, 2),
+            }
+
+
+_stats = _PdfStats()
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # Spawned workers import only this module (pypdf), not the model stack.
+            _pool = ProcessPoolExecutor(
+                max_workers=PDF_EXTRACT_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _pool
+
+
+def _reset_pool() -> None:
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def shutdown_pdf_pool() -> None:
+    _reset_pool()
+
+
+def _page_ranges(page_count: int, workers: int) -> list[tuple[int, int]]:
+    # Two ranges per worker so one slow range doesn't leave the others idle.
+    size = max(math.ceil(page_count / (workers * 2)), 1)
+    return [(start, min(start + size, page_count)) for start in range(0, page_count, size)]
+
+
+@contextmanager
+def _stream_path(stream: BinaryIO):
+    """A filesystem path with the PDF's bytes, for child processes to open."""
+    path = getattr(stream, "name", None)
+    if isinstance(path, str) and os.path.isfile(path):
+        yield path
+        return
+    # Copy the upload to disk in chunks rather than pickling its bytes.
+    with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as tmp:
+        stream.seek(0)
+        shutil.copyfileobj(stream, tmp, 1024 * 1024)
+    try:
+        yield tmp.name
+    finally:
+        os.unlink(tmp.name)
+
+
+def _extract_pooled(path: str, page_count: int) -> list[tuple[int, Optional[str], str]]:
+    if page_count >= PDF_PARALLEL_MIN_PAGES:
+        ranges = _page_ranges(page_count, PDF_EXTRACT_WORKERS)
+    else:
+        ranges = [(0, page_count)]
+    pool = _get_pool()
+    futures = [pool.submit(_extract_page_range_from_path, path, start, end, PDF_PAGE_BUDGET_SECONDS) for start, end in ranges]
+    results = []
+    for future in futures:
+        results.extend(future.result())
+    return results
+
+
+def _extract_one_off(path: str, page_count: int) -> list[tuple[int, Optional[str], str]]:
+    """Parse in a fresh spawned process, killed if it overruns every page's budget combined."""
+    ctx = multiprocessing.get_context("spawn")
+    receiver, sender = ctx.Pipe(duplex=False)
+    child = ctx.Process(target=_extract_in_child, args=(path, page_count, PDF_PAGE_BUDGET_SECONDS, sender), daemon=True)
+    child.start()
+    sender.close()
+
+    # Layout mode gets one budget and the plain fallback two.
+    deadline = time.monotonic() + PDF_CHILD_STARTUP_SECONDS + page_count * PDF_PAGE_BUDGET_SECONDS * 3
+    results = []
+    try:
+        while len(results) < page_count:
+            remaining = deadline - time.monotonic()
+            if PDF_PAGE_BUDGET_SECONDS > 0 and (remaining <= 0 or not receiver.poll(remaining)):
+                logger.warning("PDF extraction child overran its deadline; killing it")
+                break
+            results.append(receiver.recv())
+    except EOFError:
+        # The child died; its missing pages are reported below.
+        pass
+    finally:
+        receiver.close()
+        if child.is_alive():
+            child.kill()
+        child.join()
+
+    done = {idx for idx, _text, _mode in results}
+    results.extend((idx, None, "timeout") for idx in range(page_count) if idx not in done)
+    return results
+
+
+def extract_pdf_text(stream: BinaryIO) -> str:
+    started_at = time.perf_counter()
+    reader = PdfReader(stream)
+    page_count = len(reader.pages)
+    if PDF_MAX_PAGES > 0 and page_count > PDF_MAX_PAGES:
+        # Imported here so spawned pool workers don't pull in the web stack.
+        from fastapi import HTTPException
+
+        raise HTTPException(
+            status_code=413,
+            detail=f"PDF has too many pages. Maximum allowed pages: {PDF_MAX_PAGES}",
+        )
+
+    # Pages are never parsed on the calling thread: callers are threadpool or job-worker
+    # threads, where the SIGALRM page budget cannot fire.
+    parallel = PDF_EXTRACT_WORKERS > 0 and page_count >= PDF_PARALLEL_MIN_PAGES
+    results = None
+    with _stream_path(stream) as path:
+        if PDF_EXTRACT_WORKERS > 0:
+            try:
+                results = _extract_pooled(path, page_count)
+            except BrokenProcessPool:
+                _reset_pool()
+                parallel = False
+        if results is None:
+            results = _extract_one_off(path, page_count)
+
+    pages = []
+    for idx, page_text, mode in sorted(results, key=lambda r: r[0]):
+        if mode == "timeout":
+            pages.append(f"[Page {idx + 1}: text extraction timed out]")
+        elif page_text and page_text.strip():
+            pages.append(page_text.strip())
+        else:
+            pages.append(f"[Page {idx + 1}: no readable text]")
+
+    modes = [r[2] for r in results]
+    if "timeout" in modes:
+        mark_partial_result()
+    _stats.record(page_count, time.perf_counter() - started_at, modes, parallel)
+    return "\n\n".join(pages)
+
+
+def pdf_extraction_stats() -> dict:
+    return _stats.snapshot()
@@ -0,0 +1,144 @@
+from dataclasses import dataclass, field
+import importlib
+import logging
+import os
+import threading
+import time
+from typing import BinaryIO, Callable, Optional
+
+from fastapi import HTTPException
+
+logger = logging.getLogger("uvicorn.error")
+
+# Comma-separated plugin names to import at startup instead of on first upload.
+EXTRACTOR_PRELOAD = [name.strip() for name in os.getenv("EXTRACTOR_PRELOAD", "").split(",") if name.strip()]
+
+
+def _current_rss_bytes() -> int:
+    try:
+        with open("/proc/self/statm") as fh:
+            return int(fh.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+@dataclass
+class ExtractorPlugin:
+    """A file format whose parser library is imported on first use.
+
+    ``module`` is imported lazily; ``function`` takes a binary stream and returns raw text.
+    ``stats`` and ``shutdown`` name optional module-level hooks.
+    """
+
+    name: str
+    extensions: tuple[str, ...]
+    module: str
+    function: str
+    aliases: tuple[str, ...] = ()
+    stats: Optional[str] = None
+    shutdown: Optional[str] = None
+    _module: object = field(default=None, repr=False)
+    load_seconds: Optional[float] = None
+    load_rss_bytes: Optional[int] = None
+    calls: int = 0
+
+    @property
+    def loaded(self) -> bool:
+        return self._module is not None
+
+
+class ExtractorRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._plugins: dict[str, ExtractorPlugin] = {}
+        self._by_extension: dict[str, ExtractorPlugin] = {}
+        self._rejected: dict[str, str] = {}
+
+    def register(self, plugin: ExtractorPlugin) -> None:
+        self._plugins[plugin.name] = plugin
+        for ext in plugin.extensions + plugin.aliases:
+            self._by_extension[ext] = plugin
+
+    def reject(self, ext: str, detail: str) -> None:
+        """Answer uploads with ``ext`` with a 400 carrying ``detail`` instead of a generic error."""
+        self._rejected[ext] = detail
+
+    def _load(self, plugin: ExtractorPlugin):
+        if plugin._module is not None:
+            return plugin._module
+        with self._lock:
+            if plugin._module is None:
+                rss_before = _current_rss_bytes()
+                started_at = time.perf_counter()
+                module = importlib.import_module(plugin.module)
+                plugin.load_seconds = time.perf_counter() - started_at
+                plugin.load_rss_bytes = max(_current_rss_bytes() - rss_before, 0)
+                plugin._module = module
+                logger.info(
+                    "Loaded %s extractor in %.0f ms (+%.1f MB RSS)",
+                    plugin.name,
+                    plugin.load_seconds * 1000,
+                    plugin.load_rss_bytes / (1024 * 1024),
+                )
+        return plugin._module
+
+    def get(self, ext: str) -> Callable[[BinaryIO], str]:
+        plugin = self._by_extension.get(ext)
+        if plugin is None:
+            if ext in self._rejected:
+                raise HTTPException(status_code=400, detail=self._rejected[ext])
+            supported = [e.lstrip(".") for p in self._plugins.values() for e in p.extensions]
+            listed = ", ".join(supported[:-1]) + f", or {supported[-1]}" if len(supported) > 1 else "".join(supported)
+            raise HTTPException(status_code=400, detail=f"Unsupported file type. Use {listed}.")
+
+        function = getattr(self._load(plugin), plugin.function)
+        plugin.calls += 1
+        return function
+
+    def preload(self, names: list[str]) -> None:
+        for name in names:
+            plugin = self._plugins.get(name)
+            if plugin is None:
+                logger.warning("Unknown extractor in EXTRACTOR_PRELOAD: %s", name)
+                continue
+            self._load(plugin)
+
+    def stats(self) -> dict:
+        report = {}
+        for plugin in self._plugins.values():
+            entry = {
+                "extensions": list(plugin.extensions + plugin.aliases),
+                "loaded": plugin.loaded,
+                "calls": plugin.calls,
+                "load_ms": round(plugin.load_seconds * 1000, 1) if plugin.load_seconds is not None else None,
+                "load_rss_bytes": plugin.load_rss_bytes,
+            }
+            if plugin.loaded and plugin.stats:
+                entry["stats"] = getattr(plugin._module, plugin.stats)()
+            report[plugin.name] = entry
+        return report
+
+    def shutdown(self) -> None:
+        # Plugins never loaded have nothing to shut down, and importing them now would defeat the point.
+        for plugin in self._plugins.values():
+            if plugin.loaded and plugin.shutdown:
+                getattr(plugin._module, plugin.shutdown)()
+
+
+extractor_registry = ExtractorRegistry()
+extractor_registry.register(ExtractorPlugin("txt", (".txt",), "extraction.text", "extract_plain_text"))
+extractor_registry.register(
+    ExtractorPlugin(
+        "pdf",
+        (".pdf",),
+        "extraction.pdf",
+        "extract_pdf_text",
+        stats="pdf_extraction_stats",
+        shutdown="shutdown_pdf_pool",
+    )
+)
+extractor_registry.register(
+    ExtractorPlugin("docx", (".docx",), "extraction.docx_text", "extract_docx_text", aliases=(".word",))
+)
+extractor_registry.register(ExtractorPlugin("pptx", (".pptx", ".ppt"), "extraction.pptx_text", "extract_pptx_text"))
+extractor_registry.reject(".doc", "Legacy .doc is not supported directly. Please convert to .docx.")
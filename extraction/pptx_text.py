@@ -0,0 +1,32 @@
+from typing import BinaryIO
+
+from fastapi import HTTPException
+from pptx import Presentation
+
+
+def extract_pptx_text(stream: BinaryIO) -> str:
+    try:
+        presentation = Presentation(stream)
+    except Exception:
+        raise HTTPException(
+            status_code=400,
+            detail="Unable to read .ppt file. Please convert it to .pptx and retry.",
+        )
+
+    lines = []
+    for slide_idx, slide in enumerate(presentation.slides, start=1):
+        lines.append(f"Slide {slide_idx}")
+        for shape in slide.shapes:
+            if not hasattr(shape, "text_frame") or shape.text_frame is None:
+                continue
+            for para in shape.text_frame.paragraphs:
+                text = "".join(run.text for run in para.runs).strip() if para.runs else (para.text or "").strip()
+                if not text:
+                    continue
+                level = getattr(para, "level", 0) or 0
+                indent = "  " * min(level, 4)
+                bullet = "- " if level >= 0 else ""
+                lines.append(f"{indent}{bullet}{text}")
+        lines.append("")
+
+    return "\n".join(lines)
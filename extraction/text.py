@@ -0,0 +1,9 @@
+from typing import BinaryIO
+
+
+def extract_plain_text(stream: BinaryIO) -> str:
+    content = stream.read()
+    try:
+        return content.decode("utf-8")
+    except UnicodeDecodeError:
+        return content.decode("latin-1", errors="ignore")
@@ -0,0 +1,97 @@
+import logging
+import os
+from pathlib import Path
+import pickle
+import threading
+from typing import Optional
+
+import numpy as np
+
+logger = logging.getLogger("uvicorn.error")
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+CASCADE_ENABLED = os.getenv("CASCADE_ENABLED", "0").strip().lower() in {"1", "true", "yes", "on"}
+LIGHT_MODEL_PATH = Path(os.getenv("LIGHT_MODEL_PATH", str(PROJECT_ROOT / "models" / "xgb_light.pkl")))
+# A chunk skips BERT only if every sentence's top class probability reaches this.
+CASCADE_CONFIDENCE = float(os.getenv("CASCADE_CONFIDENCE", "0.85"))
+# Fraction of chunks the light model settled that are also run through the full model,
+# purely to measure agreement.
+CASCADE_AUDIT_RATE = float(os.getenv("CASCADE_AUDIT_RATE", "0.02"))
+
+
+def read_light_model(path: Path, expected_features: int, expected_classes: int):
+    """Unpickle a light model; ValueError if it does not fit the full model's inputs and classes."""
+    with path.open("rb") as fh:
+        light_model = pickle.load(fh)
+
+    n_features = getattr(light_model, "n_features_in_", expected_features)
+    n_classes = len(getattr(light_model, "classes_", range(expected_classes)))
+    if n_features != expected_features or n_classes != expected_classes:
+        raise ValueError(
+            f"Light model expects {n_features} features/{n_classes} classes, need {expected_features}/{expected_classes}"
+        )
+    return light_model
+
+
+def load_light_model(expected_features: int, expected_classes: int):
+    """Load the builtin model's stylometry-only model, or None (cascade off) if it is missing or mismatched."""
+    if not CASCADE_ENABLED:
+        return None
+    if not LIGHT_MODEL_PATH.exists():
+        logger.warning("CASCADE_ENABLED is set but %s does not exist; scoring every chunk with BERT", LIGHT_MODEL_PATH)
+        return None
+    try:
+        return read_light_model(LIGHT_MODEL_PATH, expected_features, expected_classes)
+    except ValueError as exc:
+        logger.warning("%s; cascade disabled", exc)
+        return None
+
+
+def uncertain_rows(probs: np.ndarray, confidence: float = CASCADE_CONFIDENCE) -> np.ndarray:
+    return probs.max(axis=1) < confidence
+
+
+class CascadeStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.chunks_total = 0
+        self.chunks_escalated = 0
+        self.sentences_total = 0
+        self.sentences_escalated = 0
+        self.audited_sentences = 0
+        self.audited_agreements = 0
+
+    def record(self, chunks: int, chunks_escalated: int, sentences: int, sentences_escalated: int) -> None:
+        with self._lock:
+            self.chunks_total += chunks
+            self.chunks_escalated += chunks_escalated
+            self.sentences_total += sentences
+            self.sentences_escalated += sentences_escalated
+
+    def record_audit(self, sentences: int, agreements: int) -> None:
+        with self._lock:
+            self.audited_sentences += sentences
+            self.audited_agreements += agreements
+
+    def snapshot(self, enabled: bool) -> dict:
+        """``enabled``: whether the serving bundle has a light model."""
+        with self._lock:
+            return {
+                "enabled": enabled,
+                "confidence": CASCADE_CONFIDENCE,
+                "audit_rate": CASCADE_AUDIT_RATE,
+                "chunks_total": self.chunks_total,
+                "chunks_escalated": self.chunks_escalated,
+                "chunk_escalation_rate": _ratio(self.chunks_escalated, self.chunks_total),
+                "sentences_total": self.sentences_total,
+                "sentences_escalated": self.sentences_escalated,
+                "audited_sentences": self.audited_sentences,
+                "audit_label_agreement": _ratio(self.audited_agreements, self.audited_sentences),
+            }
+
+
+def _ratio(part: int, whole: int) -> Optional[float]:
+    return round(part / whole, 4) if whole else None
+
+
+cascade_stats = CascadeStats()
@@ -1,9 +1,16 @@
 import re
 import string
+from contextlib import contextmanager
+from contextvars import ContextVar
 from functools import lru_cache
+import hashlib
+import itertools
+import json
 import os
 import sys
+import threading
 from pathlib import Path
+from typing import Optional
 import numpy as np
 import nltk
 import textstat
@@ -19,12 +26,32 @@ from urllib.request import Request, urlopen
 # ===============================
 MAX_TOKENS = 512
 BERT_EMBED_DIM = 768
+STYLE_FEATURE_DIM = 14
+# Column order after the BERT block: stylometric_analysis_no_perplexity, then perplexity.
+STYLE_FEATURE_NAMES = (
+    "num_words",
+    "num_sentences",
+    "avg_sent_len",
+    "sent_len_var",
+    "burstiness",
+    "stopword_ratio",
+    "unigram_rep",
+    "bigram_rep",
+    "noun_ratio",
+    "verb_ratio",
+    "adj_ratio",
+    "punct_ratio",
+    "readability",
+    "perplexity",
+)
 
 # Avoid loading large models at import time. This module is imported during app startup,
 # so heavyweight initialization here can OOM on small deploy instances.
 BERT_BACKEND = os.getenv("BERT_BACKEND", "onnx").strip().lower()  # "onnx" or "hf"
 BERT_TOKENIZER_NAME = os.getenv("BERT_TOKENIZER_NAME", "bert-base-uncased").strip()
 BERT_ONNX_PATH = os.getenv("BERT_ONNX_PATH", "models/onnx/bert/model.onnx").strip()
+# CLS-only variant written by scripts/prune_onnx_cls.py; used instead of the full graph when present.
+BERT_ONNX_CLS_PATH = os.getenv("BERT_ONNX_CLS_PATH", "models/onnx/bert/model_cls.onnx").strip()
 BERT_ONNX_URL = os.getenv("BERT_ONNX_URL", "").strip()
 BERT_ONNX_DATA_URL = os.getenv("BERT_ONNX_DATA_URL", "").strip()
 ONNX_DATA_REQUIRED = os.getenv("ONNX_DATA_REQUIRED", "1").strip().lower() in {"1", "true", "yes", "on"}
@@ -125,14 +152,7 @@ def _warn(msg: str) -> None:
     print(f"[feature_extractor] {msg}", file=sys.stderr)
 
 
-@lru_cache(maxsize=1)
-def _get_bert_tokenizer():
-    # Tokenizer is relatively small; safe to keep cached.
-    return AutoTokenizer.from_pretrained(BERT_TOKENIZER_NAME)
-
-
-@lru_cache(maxsize=1)
-def _get_onnx_session():
+def _new_onnx_session(onnx_path: Path):
     try:
         import onnxruntime as ort
     except Exception as e:
@@ -140,8 +160,6 @@ def _get_onnx_session():
             "onnxruntime is required for BERT_BACKEND=onnx. Install onnxruntime and redeploy."
         ) from e
 
-    onnx_path, _data_path = _ensure_onnx_present()
-
     # Prefer CPU provider for maximum deploy compatibility.
     sess_options = ort.SessionOptions()
     # Reduce memory spikes; on constrained instances this helps avoid transient OOM.
@@ -154,25 +172,170 @@ def _get_onnx_session():
     return ort.InferenceSession(str(onnx_path), sess_options=sess_options, providers=["CPUExecutionProvider"])
 
 
+def _load_onnx_cls_session(cls_path: Path):
+    """Session for the CLS-only graph, or None when it has not been built."""
+    if not cls_path.exists():
+        return None
+    try:
+        sess = _new_onnx_session(cls_path)
+    except Exception as e:
+        _warn(f"CLS-only ONNX graph failed to load; using the full graph. Error: {e!r}")
+        return None
+
+    outputs = sess.get_outputs()
+    if len(outputs) != 1 or len(outputs[0].shape) != 2:
+        _warn(f"{cls_path} does not have a single (batch, hidden) output; using the full graph.")
+        return None
+    return sess
+
+
+_UNLOADED = object()
+
+
+class BertEncoder:
+    """Tokenizer and ONNX graphs for one model version, each loaded on first use.
+
+    With ``onnx_path=None`` the deployment's own graphs are used (BERT_ONNX_PATH, fetched
+    if configured to, and BERT_ONNX_CLS_PATH). Registry bundles pass explicit paths; their
+    ``onnx_cls_path=None`` means the bundle has no CLS-only graph.
+    """
+
+    _ids = itertools.count()
+
+    def __init__(self, tokenizer_name: str, onnx_path: Optional[Path] = None, onnx_cls_path: Optional[Path] = None):
+        self.tokenizer_name = tokenizer_name
+        self.onnx_path = onnx_path
+        self.onnx_cls_path = onnx_cls_path
+        # Separates this encoder's entries in the embedding caches.
+        self.cache_key = next(self._ids)
+        self._lock = threading.Lock()
+        self._tokenizer = None
+        self._session = None
+        self._cls_session = _UNLOADED
+
+    def tokenizer(self):
+        if self._tokenizer is None:
+            with self._lock:
+                if self._tokenizer is None:
+                    self._tokenizer = AutoTokenizer.from_pretrained(self.tokenizer_name)
+        return self._tokenizer
+
+    def session(self):
+        if self._session is None:
+            with self._lock:
+                if self._session is None:
+                    onnx_path = self.onnx_path if self.onnx_path is not None else _ensure_onnx_present()[0]
+                    self._session = _new_onnx_session(onnx_path)
+        return self._session
+
+    def cls_session(self):
+        if self._cls_session is _UNLOADED:
+            with self._lock:
+                if self._cls_session is _UNLOADED:
+                    if self.onnx_path is None:
+                        self._cls_session = _load_onnx_cls_session(_resolve_project_path(BERT_ONNX_CLS_PATH))
+                    elif self.onnx_cls_path is not None:
+                        self._cls_session = _load_onnx_cls_session(self.onnx_cls_path)
+                    else:
+                        self._cls_session = None
+        return self._cls_session
+
+    def warm(self) -> None:
+        """Load everything get_bert_embedding will need under the current settings."""
+        if BERT_DISABLED:
+            return
+        self.tokenizer()
+        if BERT_BACKEND == "onnx" and self.cls_session() is None:
+            self.session()
+
+
+_default_encoder = BertEncoder(BERT_TOKENIZER_NAME)
+# Set for the duration of a scan so every embedding in it comes from one model version.
+_active_encoder: ContextVar[Optional[BertEncoder]] = ContextVar("active_bert_encoder", default=None)
+
+
+def current_bert_encoder() -> BertEncoder:
+    return _active_encoder.get() or _default_encoder
+
+
+@contextmanager
+def use_bert_encoder(encoder: Optional[BertEncoder]):
+    """Embed with ``encoder`` inside the block; None means the deployment's default graphs."""
+    token = _active_encoder.set(encoder)
+    try:
+        yield
+    finally:
+        _active_encoder.reset(token)
+
+
+def _get_bert_tokenizer():
+    return current_bert_encoder().tokenizer()
+
+
+def _get_onnx_session():
+    return current_bert_encoder().session()
+
+
+def _get_onnx_cls_session():
+    return current_bert_encoder().cls_session()
+
+
 def warmup_inference_stack() -> None:
     """Preload heavy inference dependencies at app startup."""
-    if BERT_DISABLED:
-        return
-    _get_bert_tokenizer()
-    if BERT_BACKEND == "onnx":
-        _get_onnx_session()
+    current_bert_encoder().warm()
 
 
-def _onnx_forward(tokenized: dict) -> np.ndarray:
-    sess = _get_onnx_session()
+def _onnx_inputs(sess, tokenized: dict) -> dict:
     input_names = {i.name for i in sess.get_inputs()}
 
     ort_inputs = {}
     for k, v in tokenized.items():
         if k not in input_names:
             continue
-        # ORT expects numpy arrays (usually int64 for ids/masks).
-        ort_inputs[k] = np.asarray(v, dtype=np.int64)
+        # ORT expects contiguous numpy arrays (usually int64 for ids/masks).
+        ort_inputs[k] = np.ascontiguousarray(v, dtype=np.int64)
+    return ort_inputs
+
+
+_onnx_buffers = threading.local()
+
+
+def _onnx_cls_forward(sess, tokenized: dict) -> np.ndarray:
+    """Run the CLS-only graph with bound buffers. Returns (batch, hidden) float32.
+
+    Inputs are bound straight from the tokenizer arrays and the output is written into a
+    per-thread buffer reused across calls, so nothing sequence-sized is copied back.
+    """
+    ort_inputs = _onnx_inputs(sess, tokenized)
+    batch = next(iter(ort_inputs.values())).shape[0]
+    output = sess.get_outputs()[0]
+    hidden = output.shape[1] if isinstance(output.shape[1], int) else BERT_EMBED_DIM
+
+    out = getattr(_onnx_buffers, "cls", None)
+    if out is None or out.shape[0] < batch or out.shape[1] != hidden:
+        out = np.empty((batch, hidden), dtype=np.float32)
+        _onnx_buffers.cls = out
+    out_view = out[:batch]
+
+    binding = sess.io_binding()
+    for name, arr in ort_inputs.items():
+        binding.bind_cpu_input(name, arr)
+    binding.bind_output(
+        output.name,
+        "cpu",
+        0,
+        np.float32,
+        list(out_view.shape),
+        out_view.ctypes.data,
+    )
+    sess.run_with_iobinding(binding)
+    # The buffer is reused by the next call on this thread.
+    return out_view.copy()
+
+
+def _onnx_forward(tokenized: dict) -> np.ndarray:
+    sess = _get_onnx_session()
+    ort_inputs = _onnx_inputs(sess, tokenized)
 
     outputs = sess.run(None, ort_inputs)
     out_meta = sess.get_outputs()
@@ -227,16 +390,19 @@ def get_bert_embedding(text: str) -> np.ndarray:
         )
 
         try:
-            if BERT_BACKEND == "hf":
-                last_hidden = _hf_forward(tokenized)
+            cls_session = _get_onnx_cls_session() if BERT_BACKEND == "onnx" else None
+            if cls_session is not None:
+                cls_batch = _onnx_cls_forward(cls_session, tokenized)
+            elif BERT_BACKEND == "hf":
+                cls_batch = _hf_forward(tokenized)[:, 0, :]
             else:
-                last_hidden = _onnx_forward(tokenized)
+                cls_batch = _onnx_forward(tokenized)[:, 0, :]
         except Exception as e:
             _warn(f"BERT embedding failed ({BERT_BACKEND}); returning zeros. Error: {e!r}")
             return np.zeros(BERT_EMBED_DIM, dtype=np.float32)
 
         # CLS token embedding: (batch, hidden)
-        cls_embedding = np.asarray(last_hidden[:, 0, :], dtype=np.float32).squeeze()
+        cls_embedding = np.asarray(cls_batch, dtype=np.float32).squeeze()
         if cls_embedding.ndim != 1:
             cls_embedding = np.ravel(cls_embedding)
 
@@ -352,19 +518,55 @@ def stylometric_analysis(text):
     return np.concatenate([base, np.array([perplexity], dtype=np.float32)])
 
 
+_chunk_embed_state = threading.local()
+
+
 @lru_cache(maxsize=512)
-def _get_chunk_heavy_features_cached(chunk_text: str):
-    bert_features = get_bert_embedding(chunk_text).astype(np.float32)
-    perplexity = compute_perplexity(chunk_text)
-    return bert_features, perplexity
+def _get_chunk_bert_features_cached(encoder_key: int, chunk_text: str) -> np.ndarray:
+    # Only runs on a cache miss; lets get_chunk_bert_features_traced tell the two apart.
+    _chunk_embed_state.computed = True
+    return get_bert_embedding(chunk_text).astype(np.float32)
 
 
-def build_features_with_chunk_context(sentence_text: str, chunk_text: str) -> np.ndarray:
-    chunk_bert, chunk_perplexity = _get_chunk_heavy_features_cached(chunk_text)
+def get_chunk_bert_features(chunk_text: str) -> np.ndarray:
+    return _get_chunk_bert_features_cached(current_bert_encoder().cache_key, chunk_text)
+
+
+def get_chunk_bert_features_traced(chunk_text: str) -> tuple[np.ndarray, bool]:
+    """get_chunk_bert_features plus whether the result came from the cache."""
+    _chunk_embed_state.computed = False
+    features = get_chunk_bert_features(chunk_text)
+    return features, not _chunk_embed_state.computed
+
+
+@lru_cache(maxsize=512)
+def _get_chunk_perplexity_cached(chunk_text: str) -> float:
+    return compute_perplexity(chunk_text)
+
+
+def build_style_features_with_chunk_context(sentence_text: str, chunk_text: str) -> np.ndarray:
+    """The 14 non-BERT features: sentence stylometry plus the chunk's perplexity."""
+    chunk_perplexity = _get_chunk_perplexity_cached(chunk_text)
     sentence_style = stylometric_analysis_no_perplexity(sentence_text).astype(np.float32)
-    style_with_perplexity = np.concatenate(
+    return np.concatenate(
         [sentence_style, np.array([chunk_perplexity], dtype=np.float32)]
     )
+
+
+def fill_style_features_with_chunk_context(out: np.ndarray, sentences: list[str], chunk_text: str) -> None:
+    """Write build_style_features_with_chunk_context for each sentence into the rows of ``out``.
+
+    ``out`` is a (len(sentences), STYLE_FEATURE_DIM) float32 view, usually into a larger
+    feature matrix; values are cast exactly as the row-by-row builder casts them.
+    """
+    for row, sentence_text in zip(out, sentences):
+        row[:-1] = stylometric_analysis_no_perplexity(sentence_text)
+    out[:, -1] = _get_chunk_perplexity_cached(chunk_text)
+
+
+def build_features_with_chunk_context(sentence_text: str, chunk_text: str) -> np.ndarray:
+    chunk_bert = get_chunk_bert_features(chunk_text)
+    style_with_perplexity = build_style_features_with_chunk_context(sentence_text, chunk_text)
     return np.concatenate([chunk_bert, style_with_perplexity]).astype(np.float32)
 
 
@@ -372,7 +574,7 @@ def build_features_with_chunk_context(sentence_text: str, chunk_text: str) -> np
 # FINAL FEATURE VECTOR
 # ===============================
 @lru_cache(maxsize=2048)
-def _extract_features_cached(text: str):
+def _extract_features_cached(encoder_key: int, text: str):
     bert_features = get_bert_embedding(text)
     style_features = stylometric_analysis(text)
     return np.concatenate([bert_features, style_features]).astype(np.float32)
@@ -384,4 +586,20 @@ def extract_features(text: str) -> np.ndarray:
     Shape = (768 + 14,) = (782,)
     MUST MATCH TRAINING
     """
-    return _extract_features_cached(text).copy()
+    return _extract_features_cached(current_bert_encoder().cache_key, text).copy()
+
+
+def feature_config_fingerprint(chunk_sentence_size: int) -> str:
+    """Short hash of the settings that shape a feature row.
+
+    A model bundle records the fingerprint it was trained with and is only loaded where
+    it matches, so a model never scores rows laid out differently from its training data.
+    """
+    config = {
+        "bert_embed_dim": BERT_EMBED_DIM,
+        "max_tokens": MAX_TOKENS,
+        "style_features": list(STYLE_FEATURE_NAMES),
+        "perplexity_model": PERPLEXITY_MODEL_NAME if ENABLE_PERPLEXITY else None,
+        "chunk_sentence_size": chunk_sentence_size,
+    }
+    return hashlib.sha256(json.dumps(config, sort_keys=True).encode("utf-8")).hexdigest()[:16]
@@ -0,0 +1,384 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+import json
+import logging
+import os
+from pathlib import Path
+import pickle
+import re
+import threading
+from typing import Optional
+
+import numpy as np
+
+from backend.metrics import register, scalar
+from features.cascade import CASCADE_ENABLED, load_light_model, read_light_model
+from features.feature_extractor import (
+    BERT_DISABLED,
+    BERT_EMBED_DIM,
+    BERT_TOKENIZER_NAME,
+    STYLE_FEATURE_DIM,
+    BertEncoder,
+    get_bert_embedding,
+    use_bert_encoder,
+)
+
+logger = logging.getLogger("uvicorn.error")
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+MODEL_REGISTRY_DIR = Path(os.getenv("MODEL_REGISTRY_DIR", str(PROJECT_ROOT / "models" / "registry")))
+# Served until an admin activates another version (the ACTIVE pointer then takes over).
+MODEL_VERSION = os.getenv("MODEL_VERSION", "builtin").strip() or "builtin"
+# How often each worker checks the ACTIVE pointer for a version activated elsewhere; 0 disables.
+MODEL_REGISTRY_POLL_SECONDS = max(float(os.getenv("MODEL_REGISTRY_POLL_SECONDS", "30")), 0.0)
+
+BUILTIN_VERSION = "builtin"
+BUILTIN_MODEL_PATH = PROJECT_ROOT / "models" / "xgb_model_.pkl"
+MANIFEST_NAME = "manifest.json"
+ACTIVE_POINTER_NAME = "ACTIVE"
+FEATURE_COUNT = BERT_EMBED_DIM + STYLE_FEATURE_DIM
+WARMUP_TEXT = "This sentence only warms up the model."
+VERSION_NAME = re.compile(r"^[A-Za-z0-9][A-Za-z0-9._-]{0,63}$")
+
+# The bundle a scan started with; it keeps it even if another version is activated meanwhile.
+_pinned_bundle: ContextVar[Optional["ModelBundle"]] = ContextVar("pinned_model_bundle", default=None)
+
+
+class ModelBundleError(Exception):
+    """A bundle that is malformed, incomplete or built for a different feature layout."""
+
+
+class ModelRegistryBusyError(Exception):
+    """Another version is still loading."""
+
+
+class ModelBundle:
+    def __init__(
+        self,
+        version: str,
+        model,
+        encoder: Optional[BertEncoder],
+        fingerprint: Optional[str],
+        path: Path,
+        light_model=None,
+    ):
+        self.version = version
+        self.model = model
+        # The cascade's stylometry-only model distilled from ``model``; None scores every chunk in full.
+        self.light_model = light_model
+        # None scores with the deployment's own BERT_* graphs and tokenizer.
+        self.encoder = encoder
+        self.fingerprint = fingerprint
+        self.path = path
+        self.loaded_at = datetime.utcnow()
+
+    def describe(self) -> dict:
+        return {
+            "version": self.version,
+            "path": str(self.path),
+            "feature_fingerprint": self.fingerprint,
+            "own_bert": self.encoder is not None,
+            "light_model": self.light_model is not None,
+            "loaded_at": self.loaded_at.isoformat(),
+        }
+
+
+def _bundle_file(bundle_dir: Path, manifest: dict, key: str, required: bool = False) -> Optional[Path]:
+    name = manifest.get(key)
+    if not name:
+        if required:
+            raise ModelBundleError(f"{MANIFEST_NAME} has no '{key}'")
+        return None
+    path = (bundle_dir / name).resolve()
+    if bundle_dir.resolve() not in path.parents:
+        raise ModelBundleError(f"'{key}' points outside the bundle: {name}")
+    if not path.exists():
+        raise ModelBundleError(f"'{key}' not found: {name}")
+    return path
+
+
+def _class_count(model) -> int:
+    return len(getattr(model, "classes_", range(3)))
+
+
+class ModelRegistry:
+    """Versioned model bundles under MODEL_REGISTRY_DIR, switched without a restart.
+
+    Each ``<version>/manifest.json`` names the XGBoost pickle and optionally its own ONNX
+    graphs and tokenizer and the cascade's light model, plus the feature fingerprint it
+    was trained with. Activating a
+    version loads and warms it on the caller's thread, then swaps one reference: scans
+    already running finish on the bundle they pinned, new scans get the new one. The
+    chosen version is written to the ACTIVE pointer so other workers follow it.
+    """
+
+    def __init__(self, directory: Path):
+        self.directory = directory if directory.is_absolute() else PROJECT_ROOT / directory
+        self.fingerprint = None
+        self._active: Optional[ModelBundle] = None
+        self._load_lock = threading.Lock()
+        self.loading = None
+        self.last_error = None
+        self.switches_total = 0
+        self._failed_pointer = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    # ---- bundles on disk ----
+    def _bundle_dir(self, version: str) -> Path:
+        if not VERSION_NAME.match(version):
+            raise LookupError(version)
+        bundle_dir = self.directory / version
+        if not (bundle_dir / MANIFEST_NAME).is_file():
+            raise LookupError(version)
+        return bundle_dir
+
+    def _manifest(self, bundle_dir: Path) -> dict:
+        try:
+            manifest = json.loads((bundle_dir / MANIFEST_NAME).read_text(encoding="utf-8"))
+        except (OSError, ValueError) as exc:
+            raise ModelBundleError(f"Unreadable {MANIFEST_NAME}: {exc}") from exc
+        if not isinstance(manifest, dict):
+            raise ModelBundleError(f"{MANIFEST_NAME} must be a JSON object")
+        return manifest
+
+    def list_versions(self) -> list[dict]:
+        active = self.current_version
+        versions = [{"version": BUILTIN_VERSION, "compatible": True, "active": active == BUILTIN_VERSION}]
+        if not self.directory.is_dir():
+            return versions
+        for bundle_dir in sorted(self.directory.iterdir()):
+            if not (bundle_dir / MANIFEST_NAME).is_file() or not VERSION_NAME.match(bundle_dir.name):
+                continue
+            entry = {"version": bundle_dir.name, "active": active == bundle_dir.name}
+            try:
+                manifest = self._manifest(bundle_dir)
+            except ModelBundleError as exc:
+                versions.append({**entry, "compatible": False, "error": str(exc)})
+                continue
+            versions.append(
+                {
+                    **entry,
+                    "created_at": manifest.get("created_at"),
+                    "feature_fingerprint": manifest.get("feature_fingerprint"),
+                    "compatible": manifest.get("feature_fingerprint") == self.fingerprint,
+                    "own_bert": bool(manifest.get("onnx")),
+                    "light_model": bool(manifest.get("light_model")),
+                }
+            )
+        return versions
+
+    def _load(self, version: str) -> ModelBundle:
+        if version == BUILTIN_VERSION:
+            if not BUILTIN_MODEL_PATH.exists():
+                raise FileNotFoundError(f"Model not found at {BUILTIN_MODEL_PATH}")
+            with BUILTIN_MODEL_PATH.open("rb") as fh:
+                model = pickle.load(fh)
+            light_model = load_light_model(STYLE_FEATURE_DIM, _class_count(model))
+            return ModelBundle(BUILTIN_VERSION, model, None, self.fingerprint, BUILTIN_MODEL_PATH, light_model)
+
+        bundle_dir = self._bundle_dir(version)
+        manifest = self._manifest(bundle_dir)
+        fingerprint = manifest.get("feature_fingerprint")
+        if fingerprint != self.fingerprint:
+            raise ModelBundleError(
+                f"Bundle was built for feature fingerprint {fingerprint}, this deployment computes {self.fingerprint}"
+            )
+
+        model_path = _bundle_file(bundle_dir, manifest, "xgb_model", required=True)
+        onnx_path = _bundle_file(bundle_dir, manifest, "onnx")
+        onnx_cls_path = _bundle_file(bundle_dir, manifest, "onnx_cls")
+        tokenizer_path = _bundle_file(bundle_dir, manifest, "tokenizer")
+        light_model_path = _bundle_file(bundle_dir, manifest, "light_model")
+        if onnx_cls_path is not None and onnx_path is None:
+            raise ModelBundleError("'onnx_cls' needs the full graph under 'onnx' as well")
+
+        encoder = None
+        if onnx_path is not None or tokenizer_path is not None:
+            encoder = BertEncoder(str(tokenizer_path or BERT_TOKENIZER_NAME), onnx_path, onnx_cls_path)
+
+        try:
+            with model_path.open("rb") as fh:
+                model = pickle.load(fh)
+        except Exception as exc:
+            raise ModelBundleError(f"Could not load {model_path.name}: {exc!r}") from exc
+        n_features = getattr(model, "n_features_in_", FEATURE_COUNT)
+        if n_features != FEATURE_COUNT:
+            raise ModelBundleError(f"Model expects {n_features} features, the pipeline produces {FEATURE_COUNT}")
+
+        # The light model is only valid for the model it was distilled from, so a bundle
+        # without one runs with the cascade off rather than with another version's.
+        light_model = None
+        if CASCADE_ENABLED and light_model_path is not None:
+            try:
+                light_model = read_light_model(light_model_path, STYLE_FEATURE_DIM, _class_count(model))
+            except Exception as exc:
+                raise ModelBundleError(f"Could not load {light_model_path.name}: {exc}") from exc
+        elif CASCADE_ENABLED:
+            logger.warning("Model version %s has no light model; the cascade is off while it serves", version)
+        return ModelBundle(version, model, encoder, fingerprint, bundle_dir, light_model)
+
+    def _warm(self, bundle: ModelBundle) -> None:
+        """Load the bundle's graphs and run one row through it, so its first scan is not cold."""
+        row = np.zeros((1, FEATURE_COUNT), dtype=np.float32)
+        try:
+            with use_bert_encoder(bundle.encoder):
+                if bundle.encoder is not None:
+                    bundle.encoder.warm()
+                if not BERT_DISABLED:
+                    row[0, :BERT_EMBED_DIM] = get_bert_embedding(WARMUP_TEXT)
+            bundle.model.predict_proba(row)
+            if bundle.light_model is not None:
+                bundle.light_model.predict_proba(row[:, BERT_EMBED_DIM:])
+        except Exception as exc:
+            raise ModelBundleError(f"Warmup failed: {exc!r}") from exc
+        if not BERT_DISABLED and not row[0, :BERT_EMBED_DIM].any():
+            # get_bert_embedding logs ONNX and tokenizer errors and returns zeros; serving
+            # that would score every sentence without BERT.
+            raise ModelBundleError("Warmup failed: the BERT embedding is all zeros (broken or mismatched graph/tokenizer)")
+
+    # ---- serving ----
+    @property
+    def current_version(self) -> Optional[str]:
+        bundle = self.current()
+        return bundle.version if bundle else None
+
+    def current(self) -> Optional[ModelBundle]:
+        """The bundle pinned by the running scan, else the active one."""
+        return _pinned_bundle.get() or self._active
+
+    @contextmanager
+    def pinned(self):
+        """Serve everything inside (model and BERT) from one bundle; nesting keeps the outer one.
+
+        Also usable as a decorator.
+        """
+        bundle = _pinned_bundle.get()
+        if bundle is not None:
+            yield bundle
+            return
+        bundle = self._active
+        token = _pinned_bundle.set(bundle)
+        try:
+            with use_bert_encoder(bundle.encoder):
+                yield bundle
+        finally:
+            _pinned_bundle.reset(token)
+
+    def load_initial(self, fingerprint: str, warm: bool = False) -> ModelBundle:
+        """Load the ACTIVE pointer's version (else MODEL_VERSION) at startup.
+
+        A bundle that fails to load is logged and the builtin model is served instead, so a
+        bad pointer cannot keep workers from starting.
+        """
+        self.fingerprint = fingerprint
+        version = self._read_pointer() or MODEL_VERSION
+        try:
+            bundle = self._load(version)
+            if warm:
+                self._warm(bundle)
+        except (LookupError, ModelBundleError) as exc:
+            if version == BUILTIN_VERSION:
+                raise
+            self.last_error = f"{version}: {'no such bundle' if isinstance(exc, LookupError) else exc}"
+            self._failed_pointer = version
+            logger.error("Model version %s could not be loaded (%s); serving %s", version, self.last_error, BUILTIN_VERSION)
+            bundle = self._load(BUILTIN_VERSION)
+        self._active = bundle
+        return bundle
+
+    def load_candidate(self, version: str) -> ModelBundle:
+        """Load and warm ``version`` without serving it (shadow evaluation)."""
+        bundle = self._load(version)
+        self._warm(bundle)
+        return bundle
+
+    def activate(self, version: str, persist: bool = True) -> dict:
+        """Load, warm and switch to ``version``; blocks for the load, so call it off the event loop."""
+        if not self._load_lock.acquire(blocking=False):
+            raise ModelRegistryBusyError(self.loading)
+        try:
+            self.loading = version
+            bundle = self._load(version)
+            self._warm(bundle)
+            previous = self._active
+            self._active = bundle
+            self.switches_total += 1
+            self.last_error = None
+            self._failed_pointer = None
+            if persist:
+                self._write_pointer(version)
+            logger.info("Model version %s is now serving (was %s)", version, previous.version if previous else None)
+            return bundle.describe()
+        except ModelBundleError as exc:
+            self.last_error = f"{version}: {exc}"
+            raise
+        finally:
+            self.loading = None
+            self._load_lock.release()
+
+    # ---- cross-worker pointer ----
+    def _read_pointer(self) -> Optional[str]:
+        try:
+            version = (self.directory / ACTIVE_POINTER_NAME).read_text(encoding="utf-8").strip()
+        except OSError:
+            return None
+        return version or None
+
+    def _write_pointer(self, version: str) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        tmp = self.directory / f".{ACTIVE_POINTER_NAME}.{os.getpid()}"
+        tmp.write_text(version + "\n", encoding="utf-8")
+        os.replace(tmp, self.directory / ACTIVE_POINTER_NAME)
+
+    def start(self) -> None:
+        if MODEL_REGISTRY_POLL_SECONDS <= 0 or (self._thread and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="model-registry", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+
+    def _run(self) -> None:
+        while not self._stop.wait(MODEL_REGISTRY_POLL_SECONDS):
+            version = self._read_pointer()
+            if not version or version in {self._active.version, self._failed_pointer}:
+                continue
+            try:
+                self.activate(version, persist=False)
+            except ModelRegistryBusyError:
+                continue
+            except (LookupError, ModelBundleError, OSError) as exc:
+                # Not retried until the pointer changes again.
+                self._failed_pointer = version
+                logger.warning("Could not follow the ACTIVE pointer to %s: %r", version, exc)
+
+    def snapshot(self) -> dict:
+        return {
+            "active": self._active.describe() if self._active else None,
+            "loading": self.loading,
+            "last_error": self.last_error,
+            "switches_total": self.switches_total,
+            "directory": str(self.directory),
+            "pointer": self._read_pointer(),
+            "feature_fingerprint": self.fingerprint,
+            "poll_seconds": MODEL_REGISTRY_POLL_SECONDS,
+        }
+
+    def render(self) -> list[str]:
+        lines = [
+            "# HELP model_version_info The model version this worker serves.",
+            "# TYPE model_version_info gauge",
+        ]
+        if self._active is not None:
+            lines.append(f'model_version_info{{version="{self._active.version}"}} 1')
+        return lines + scalar("model_switches_total", "counter", "Model versions activated since start.", self.switches_total)
+
+
+model_registry = ModelRegistry(MODEL_REGISTRY_DIR)
+register(model_registry.render)
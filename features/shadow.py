@@ -0,0 +1,195 @@
+from collections import Counter
+import logging
+import os
+import queue
+import random
+import threading
+import time
+from typing import Callable, Optional
+
+import numpy as np
+
+from backend.metrics import register, scalar
+from features.model_registry import ModelBundle, ModelBundleError, model_registry
+
+logger = logging.getLogger("uvicorn.error")
+
+# Registry version scored in the background next to the serving model; empty disables shadowing.
+SHADOW_MODEL_VERSION = os.getenv("SHADOW_MODEL_VERSION", "").strip()
+SHADOW_SAMPLE_RATE = min(max(float(os.getenv("SHADOW_SAMPLE_RATE", "1")), 0.0), 1.0)
+# Feature matrices waiting for the shadow thread; anything past this is dropped, never waited on.
+SHADOW_QUEUE_MAX = max(int(os.getenv("SHADOW_QUEUE_MAX", "4")), 1)
+SHADOW_THREAD_NICE = 19
+DROP_REASONS = ("queue_full", "busy", "features_differ", "error")
+
+
+def _ratio(part: int, whole: int) -> Optional[float]:
+    return round(part / whole, 4) if whole else None
+
+
+class ShadowEvaluator:
+    """Scores production feature matrices with a candidate model on a background thread.
+
+    submit() hands over the matrix the serving model just scored, with no copy and no
+    wait: the batch is dropped when the queue is full or scans are queueing for inference
+    slots. A single thread at the lowest CPU priority runs the candidate and records how
+    often it agrees with the serving model. Only candidates that share the serving BERT
+    can reuse its features, so bundles with their own BERT are not shadowed.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._queue: queue.Queue = queue.Queue(maxsize=SHADOW_QUEUE_MAX)
+        self.bundle: Optional[ModelBundle] = None
+        self._label_fn: Optional[Callable] = None
+        self._busy: Optional[Callable[[], bool]] = None
+        self._stop = threading.Event()
+        self._thread = None
+        self.last_error = None
+        self.batches = 0
+        self.sentences = 0
+        self.label_agreements = 0
+        self.top_class_agreements = 0
+        self.verdict_batches = 0
+        self.verdict_agreements = 0
+        self.ai_abs_diff_total = 0.0
+        self.ai_abs_diff_max = 0.0
+        self.seconds_total = 0.0
+        self.label_changes: Counter = Counter()
+        self.dropped: Counter = Counter()
+
+    def start(self, version: str, label_fn: Callable, busy: Callable[[], bool]) -> None:
+        """Load ``version`` from the registry and start shadowing; errors are logged, not raised."""
+        try:
+            bundle = model_registry.load_candidate(version)
+            if bundle.encoder is not None:
+                raise ModelBundleError("it has its own BERT, so the serving features cannot be reused")
+        except (LookupError, ModelBundleError, OSError) as exc:
+            self.last_error = f"{version}: {'no such bundle' if isinstance(exc, LookupError) else exc}"
+            logger.error("Shadow model %s not started: %s", version, self.last_error)
+            return
+        try:
+            # One core at most; the serving model keeps the rest.
+            bundle.model.set_params(n_jobs=1)
+        except Exception:
+            pass
+        self.bundle = bundle
+        self._label_fn = label_fn
+        self._busy = busy
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="shadow-model", daemon=True)
+        self._thread.start()
+        logger.info("Shadow-scoring with model version %s", version)
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+
+    def _dropped(self, reason: str) -> None:
+        with self._lock:
+            self.dropped[reason] += 1
+
+    def submit(self, features: np.ndarray, probs: np.ndarray, production: ModelBundle, whole: bool) -> None:
+        """Queue rows the serving model scored; ``whole`` means they are a complete document."""
+        bundle = self.bundle
+        if bundle is None or production.version == bundle.version or random.random() >= SHADOW_SAMPLE_RATE:
+            return
+        if production.encoder is not bundle.encoder:
+            self._dropped("features_differ")
+            return
+        if self._busy is not None and self._busy():
+            self._dropped("busy")
+            return
+        try:
+            self._queue.put_nowait((features, probs, whole))
+        except queue.Full:
+            self._dropped("queue_full")
+
+    def _run(self) -> None:
+        try:
+            # Linux applies a thread id's nice value to that thread only.
+            os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), SHADOW_THREAD_NICE)
+        except (AttributeError, OSError):
+            pass
+        while not self._stop.is_set():
+            try:
+                features, probs, whole = self._queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            started_at = time.perf_counter()
+            try:
+                shadow_probs = self.bundle.model.predict_proba(features)
+            except Exception as exc:
+                self._dropped("error")
+                self.last_error = repr(exc)
+                logger.warning("Shadow model scoring failed: %r", exc)
+                continue
+            self._record(probs, shadow_probs, whole, time.perf_counter() - started_at)
+
+    def _record(self, probs: np.ndarray, shadow_probs: np.ndarray, whole: bool, seconds: float) -> None:
+        labels = [self._label_fn(row) for row in probs]
+        shadow_labels = [self._label_fn(row) for row in shadow_probs]
+        changes = Counter(f"{a}->{b}" for a, b in zip(labels, shadow_labels) if a != b)
+        # Model classes are (human, ai, over-polished).
+        ai_diff = np.abs(shadow_probs[:, 1] - probs[:, 1]) * 100
+        top_class = int((shadow_probs.argmax(axis=1) == probs.argmax(axis=1)).sum())
+        with self._lock:
+            self.batches += 1
+            self.sentences += len(labels)
+            self.label_agreements += len(labels) - sum(changes.values())
+            self.top_class_agreements += top_class
+            self.label_changes.update(changes)
+            self.ai_abs_diff_total += float(ai_diff.sum())
+            self.ai_abs_diff_max = max(self.ai_abs_diff_max, float(ai_diff.max(initial=0.0)))
+            self.seconds_total += seconds
+            if whole and len(labels):
+                verdict = probs[:, 1].mean() > probs[:, 0].mean()
+                shadow_verdict = shadow_probs[:, 1].mean() > shadow_probs[:, 0].mean()
+                self.verdict_batches += 1
+                self.verdict_agreements += int(verdict == shadow_verdict)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "enabled": self.bundle is not None,
+                "version": self.bundle.version if self.bundle else None,
+                "last_error": self.last_error,
+                "sample_rate": SHADOW_SAMPLE_RATE,
+                "queue_depth": self._queue.qsize(),
+                "queue_max": SHADOW_QUEUE_MAX,
+                "batches": self.batches,
+                "sentences": self.sentences,
+                "label_agreement": _ratio(self.label_agreements, self.sentences),
+                "top_class_agreement": _ratio(self.top_class_agreements, self.sentences),
+                "label_changes": dict(self.label_changes.most_common()),
+                "verdict_batches": self.verdict_batches,
+                "verdict_agreement": _ratio(self.verdict_agreements, self.verdict_batches),
+                "mean_abs_ai_diff": round(self.ai_abs_diff_total / self.sentences, 3) if self.sentences else None,
+                "max_abs_ai_diff": round(self.ai_abs_diff_max, 3),
+                "avg_ms_per_batch": round(1000 * self.seconds_total / self.batches, 3) if self.batches else None,
+                "dropped": {reason: self.dropped[reason] for reason in DROP_REASONS},
+            }
+
+    def render(self) -> list[str]:
+        with self._lock:
+            lines = scalar("shadow_sentences_total", "counter", "Sentences scored by the shadow model.", self.sentences)
+            lines += scalar(
+                "shadow_label_agreements_total",
+                "counter",
+                "Shadow-scored sentences whose label matched the serving model.",
+                self.label_agreements,
+            )
+            lines += [
+                "# HELP shadow_dropped_total Batches the shadow model skipped.",
+                "# TYPE shadow_dropped_total counter",
+            ]
+            for reason in DROP_REASONS:
+                lines.append(f'shadow_dropped_total{{reason="{reason}"}} {self.dropped[reason]}')
+        return lines
+
+
+shadow_evaluator = ShadowEvaluator()
+register(shadow_evaluator.render)
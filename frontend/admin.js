@@ -32,6 +32,8 @@ const maxUsersInput = document.getElementById("maxUsers");
 const emailInput = document.getElementById("email");
 const allocationSummaryCard = document.getElementById("allocationSummaryCard");
 const allocationSummary = document.getElementById("allocationSummary");
+const usageStatsCard = document.getElementById("usageStatsCard");
+const usageStats = document.getElementById("usageStats");
 const adminRequestsCard = document.getElementById("adminRequestsCard");
 const adminRequestsTable = document.getElementById("adminRequestsTable");
 const profileModal = document.getElementById("profileModal");
@@ -153,6 +155,10 @@ function setupRoleUi() {
     listTitle.innerHTML = "<span class='emoji'>&#128202;</span>Admin List";
     createHint.innerText = "Super admin can create admins and set user limit per admin.";
     createUserBtn.innerText = "Create Admin";
+    const bulkHint = document.getElementById("bulkHint");
+    if (bulkHint) {
+      bulkHint.innerText = "Bulk create admins from CSV with columns: email, password, tokens, max_users.";
+    }
     if (emailInput) {
       emailInput.placeholder = "Organization Email ID";
     }
@@ -261,6 +267,51 @@ async function loadAllocationSummary() {
   }
 }
 
+function sumUsage(daily) {
+  const totals = { scans: 0, tokens_used: 0, ai_weighted: 0 };
+  (daily || []).forEach((d) => {
+    totals.scans += d.scans || 0;
+    totals.tokens_used += d.tokens_used || 0;
+    totals.ai_weighted += (d.avg_ai_percent || 0) * (d.scans || 0);
+  });
+  totals.avg_ai_percent = totals.scans ? Math.round((totals.ai_weighted / totals.scans) * 100) / 100 : 0;
+  return totals;
+}
+
+function renderUsageSummary(stats) {
+  const today = new Date().toISOString().slice(0, 10);
+  const todayBucket = (stats.daily || []).find((d) => d.day === today) || {};
+  const recent = sumUsage(stats.daily);
+  const total = stats.total || {};
+  return [
+    summaryBox("Scans Today", todayBucket.scans || 0),
+    summaryBox("Scans (30 Days)", recent.scans),
+    summaryBox("Avg AI % (30 Days)", `${recent.avg_ai_percent}%`),
+    summaryBox("Tokens Used (30 Days)", recent.tokens_used),
+    summaryBox("Total Scans", total.scans || 0),
+    summaryBox("Avg AI % (All Time)", `${total.avg_ai_percent || 0}%`)
+  ].join("");
+}
+
+async function loadUsageStats() {
+  if (isSuperAdmin || !usageStatsCard || !usageStats) {
+    return;
+  }
+  usageStatsCard.style.display = "block";
+
+  const res = await fetch(`${API_BASE}/admin/usage-stats?days=30`, {
+    headers: { "Authorization": "Bearer " + token }
+  });
+  const data = await res.json();
+
+  if (!res.ok) {
+    usageStats.innerHTML = `<p>${escapeHtml(data.detail || "Unable to load usage")}</p>`;
+    return;
+  }
+
+  usageStats.innerHTML = renderUsageSummary(data);
+}
+
 async function createAccount() {
   const email = document.getElementById("email").value.trim();
   const password = document.getElementById("password").value;
@@ -313,6 +364,55 @@ async function createAccount() {
 
 document.getElementById("createUserBtn").onclick = createAccount;
 
+async function bulkCreateAccounts() {
+  const fileInput = document.getElementById("bulkCsv");
+  const reportBox = document.getElementById("bulkReport");
+  const file = fileInput && fileInput.files && fileInput.files[0];
+  if (!file) {
+    alert("Choose a CSV file first");
+    return;
+  }
+
+  if (!API_BASE) {
+    alert("Backend URL is not configured. Set it in frontend/config.js");
+    return;
+  }
+
+  const formData = new FormData();
+  formData.append("file", file);
+
+  const res = await fetch(`${API_BASE}/admin/bulk-create-users`, {
+    method: "POST",
+    headers: { "Authorization": "Bearer " + token },
+    body: formData
+  });
+  const data = await res.json();
+
+  if (!res.ok) {
+    alert("Error: " + (data.detail || "Unable to create accounts"));
+    return;
+  }
+
+  const problems = (data.rows || []).filter((r) => r.status !== "created");
+  if (reportBox) {
+    reportBox.innerHTML = `<p>${escapeHtml(data.message || "")}</p>` + problems.map((r) => `
+      <div class="log-card">
+        <b>Row ${r.row}:</b> ${escapeHtml(r.email || "-")} &mdash; ${escapeHtml(r.status)}${r.detail ? ": " + escapeHtml(r.detail) : ""}
+      </div>
+    `).join("");
+  }
+
+  if (!problems.length) {
+    alert(data.message || "Accounts created");
+    location.reload();
+  }
+}
+
+const bulkCreateBtn = document.getElementById("bulkCreateBtn");
+if (bulkCreateBtn) {
+  bulkCreateBtn.onclick = bulkCreateAccounts;
+}
+
 async function loadAdminRequests() {
   if (!isSuperAdmin || !adminRequestsCard || !adminRequestsTable) {
     return;
@@ -519,6 +619,14 @@ function attachActions() {
       logsBox.style.display = "block";
       logsBox.innerHTML = "<h2><span class='emoji'>&#128203;</span>Activity Logs</h2>";
 
+      const statsRes = await fetch(`${API_BASE}/admin/users/${uid}/usage-stats?days=30`, {
+        headers: { "Authorization": "Bearer " + token }
+      });
+      if (statsRes.ok) {
+        const stats = await statsRes.json();
+        logsBox.innerHTML += `<div class="usage-summary">${renderUsageSummary(stats)}</div>`;
+      }
+
       const res = await fetch(`${API_BASE}/admin/users/${uid}/logs`, {
         headers: { "Authorization": "Bearer " + token }
       });
@@ -635,10 +743,10 @@ function attachRequestActions() {
         alert(data.detail || "Failed to approve request");
         return;
       }
-      if (data.email_sent) {
-        alert("Request approved and email sent.");
+      if (data.email_sent || data.email_queued) {
+        alert("Request approved. Login details email is queued for delivery.");
       } else {
-        alert("Request approved, but email was not sent. Check SMTP settings.");
+        alert("Request approved, but no login details email was queued.");
       }
       location.reload();
     };
@@ -730,6 +838,7 @@ async function bootstrapAdminPage() {
 
   setupRoleUi();
   await loadAllocationSummary();
+  await loadUsageStats();
   await loadAdminRequests();
   await loadUsers();
 }
@@ -76,6 +76,8 @@ window.logout = logout;
 let lastPredictionData = null;
 let loadingInterval = null;
 let selectedFileBaseName = "";
+// Digest of the last extracted file; lets an unedited extraction be scanned without resending its text.
+let extractedFile = null;
 const loadingMessages = [
     "Reading sentence patterns...",
     "Comparing AI and human writing signals...",
@@ -329,7 +331,7 @@ function renderPrediction(data) {
         </article>
         <article class="summary-card">
             <h4>Sentences Reviewed</h4>
-            <p>${data.sentences && data.sentences.length ? data.sentences.length : 0}</p>
+            <p>${data.sentences_processed || (data.sentences ? data.sentences.length : 0)}</p>
         </article>
     `;
 
@@ -352,6 +354,13 @@ function renderPrediction(data) {
         textSpan.style.webkitBoxDecorationBreak = "clone";
         box.appendChild(textSpan);
     });
+    if (data.large_document && data.sentences_processed > (data.sentences || []).length) {
+        // Large documents only return a preview; the rest is paged from /scans/{id}/sentences.
+        const note = document.createElement("p");
+        note.className = "large-document-note";
+        note.innerText = `Showing the first ${(data.sentences || []).length} of ${data.sentences_processed} sentences.`;
+        box.appendChild(note);
+    }
 
     document.getElementById("results").style.display = "block";
     lastPredictionData = data;
@@ -372,6 +381,17 @@ function handlePredictionError(response, data) {
     setUxMessage((data && data.detail) ? data.detail : "Prediction failed", "error");
 }
 
+function postPrediction(path, payload) {
+    return fetch(API_BASE + path, {
+        method: "POST",
+        headers: {
+            "Content-Type": "application/json",
+            "Authorization": "Bearer " + token
+        },
+        body: JSON.stringify(payload)
+    });
+}
+
 async function analyzeText() {
     const text = document.getElementById("textInput").value.trim();
     if (!text) return alert("Please enter some text.");
@@ -381,14 +401,18 @@ async function analyzeText() {
     startLoading("Analyzing document...");
 
     try {
-        const response = await fetch(API_BASE + "/predict", {
-            method: "POST",
-            headers: {
-                "Content-Type": "application/json",
-                "Authorization": "Bearer " + token
-            },
-            body: JSON.stringify({ text: text })
-        });
+        let response = null;
+        if (extractedFile && extractedFile.text === text) {
+            response = await postPrediction("/predict-digest", { digest: extractedFile.digest });
+            if (response.status === 404) {
+                // Evicted from the server cache; fall back to sending the text.
+                extractedFile = null;
+                response = null;
+            }
+        }
+        if (!response) {
+            response = await postPrediction("/predict", { text: text });
+        }
 
         const data = await response.json();
         if (!response.ok) {
@@ -445,6 +469,7 @@ async function analyzeFile() {
         }
 
         textInput.value = data.text || "";
+        extractedFile = data.digest ? { digest: data.digest, text: textInput.value.trim() } : null;
         setUxMessage("Extracted " + (data.characters || 0) + " characters. Click Analyze to scan.", "info");
         if (selectedFileEl) {
             selectedFileEl.hidden = false;
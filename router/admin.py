@@ -1,19 +1,43 @@
+import csv
 from datetime import datetime
+import io
 from typing import Optional
 
 from bson import ObjectId
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse
 from pydantic import BaseModel
 from pymongo import ReturnDocument
-from pymongo.errors import DuplicateKeyError
-
-from backend.crypto import hash_password
-from backend.mailer import send_admin_approval_email
-from backend.mongo import admin_requests_collection, scan_logs_collection, users_collection
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+
+from backend.async_mongo import (
+    admin_requests_collection,
+    email_outbox_collection,
+    scan_job_items_collection,
+    scan_logs_collection,
+    scan_sentences_collection,
+    users_collection,
+)
+from backend.crypto import hash_passwords
+from backend.hashing import hash_password_async, password_hash_stats
+from backend.inference_queue import inference_queue
+from backend.memory import memory_admission
+from backend.mongo import pool_metrics_snapshot
+from backend.outbox import admin_approval_outbox_doc, outbox_sender
+from backend.profiling import request_profiler
+from backend.scan_jobs import scan_job_workers
 from backend.security import is_super_admin, normalize_role, require_admin_user
+from backend.usage import ADMIN_SCOPE, USER_SCOPE, delete_usage, get_usage_stats
+from extraction.cache import extraction_cache
+from extraction.plugins import extractor_registry
+from features.cascade import cascade_stats
+from features.model_registry import ModelBundleError, ModelRegistryBusyError, model_registry
+from features.shadow import shadow_evaluator
 
 admin_router = APIRouter(prefix="/admin", tags=["Admin Panel"])
 DEFAULT_MAX_USERS_PER_ADMIN = 5
+BULK_CREATE_MAX_ROWS = 500
 
 
 class CreateUserRequest(BaseModel):
@@ -46,8 +70,17 @@ class UpdateUserDetailsRequest(BaseModel):
     organization_name: Optional[str] = None
 
 
+def _admin_user_limit(admin_doc: dict) -> int:
+    max_users_allowed = admin_doc.get("max_users_allowed", DEFAULT_MAX_USERS_PER_ADMIN)
+    try:
+        max_users_allowed = int(max_users_allowed)
+    except Exception:
+        max_users_allowed = DEFAULT_MAX_USERS_PER_ADMIN
+    return max(max_users_allowed, 0)
+
+
 @admin_router.post("/create-user")
-def create_user(data: CreateUserRequest, current_admin=Depends(require_admin_user)):
+async def create_user(data: CreateUserRequest, current_admin=Depends(require_admin_user)):
     email = data.email.strip().lower()
     requested_role = normalize_role(data.role or "")
 
@@ -70,14 +103,8 @@ def create_user(data: CreateUserRequest, current_admin=Depends(require_admin_use
         if target_role != "user":
             raise HTTPException(status_code=403, detail="Admin can only create user accounts")
 
-        max_users_allowed = current_admin.get("max_users_allowed", DEFAULT_MAX_USERS_PER_ADMIN)
-        try:
-            max_users_allowed = int(max_users_allowed)
-        except Exception:
-            max_users_allowed = DEFAULT_MAX_USERS_PER_ADMIN
-        max_users_allowed = max(max_users_allowed, 0)
-
-        current_user_count = users_collection.count_documents({"role": "user", "created_by": creator_id})
+        max_users_allowed = _admin_user_limit(current_admin)
+        current_user_count = await users_collection.count_documents({"role": "user", "created_by": creator_id})
         if current_user_count >= max_users_allowed:
             raise HTTPException(
                 status_code=400,
@@ -86,9 +113,10 @@ def create_user(data: CreateUserRequest, current_admin=Depends(require_admin_use
     else:
         raise HTTPException(status_code=403, detail="Admin access required")
 
+    password_hash = await hash_password_async(data.password)
     user_doc = {
         "email": email,
-        "password_hash": hash_password(data.password),
+        "password_hash": password_hash,
         "password_plain": data.password,
         "tokens": int(data.tokens),
         "role": target_role,
@@ -103,7 +131,7 @@ def create_user(data: CreateUserRequest, current_admin=Depends(require_admin_use
     if creator_role == "admin":
         reserved_tokens = max(int(data.tokens), 0)
         if reserved_tokens > 0:
-            reserved = users_collection.find_one_and_update(
+            reserved = await users_collection.find_one_and_update(
                 {
                     "_id": current_admin["_id"],
                     "role": "admin",
@@ -116,10 +144,10 @@ def create_user(data: CreateUserRequest, current_admin=Depends(require_admin_use
                 raise HTTPException(status_code=400, detail="Insufficient admin token balance")
 
     try:
-        result = users_collection.insert_one(user_doc)
+        result = await users_collection.insert_one(user_doc)
     except DuplicateKeyError:
         if reserved_tokens > 0:
-            users_collection.update_one(
+            await users_collection.update_one(
                 {"_id": current_admin["_id"], "role": "admin"},
                 {"$inc": {"tokens": reserved_tokens}},
             )
@@ -133,14 +161,235 @@ def create_user(data: CreateUserRequest, current_admin=Depends(require_admin_use
     }
 
 
+def _parse_bulk_csv(raw: bytes) -> list[dict]:
+    try:
+        text = raw.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="CSV must be UTF-8 encoded")
+
+    reader = csv.DictReader(io.StringIO(text))
+    headers = {(h or "").strip().lower() for h in (reader.fieldnames or [])}
+    if not {"email", "password"} <= headers:
+        raise HTTPException(status_code=400, detail="CSV header must include email and password columns")
+
+    rows = []
+    for record in reader:
+        row = {
+            key.strip().lower(): value.strip()
+            for key, value in record.items()
+            if isinstance(key, str) and isinstance(value, str)
+        }
+        if any(row.values()):
+            rows.append(row)
+    return rows
+
+
+async def _read_bulk_rows(request: Request) -> list:
+    content_type = (request.headers.get("content-type") or "").lower()
+
+    if content_type.startswith("multipart/form-data"):
+        form = await request.form()
+        upload = form.get("file")
+        if upload is None or not hasattr(upload, "read"):
+            raise HTTPException(status_code=400, detail="Upload a CSV file in the 'file' field")
+        return _parse_bulk_csv(await upload.read())
+
+    if content_type.startswith("text/csv"):
+        return _parse_bulk_csv(await request.body())
+
+    try:
+        payload = await request.json()
+    except Exception:
+        raise HTTPException(status_code=400, detail="Body must be JSON or CSV")
+    if isinstance(payload, dict):
+        payload = payload.get("users")
+    if not isinstance(payload, list):
+        raise HTTPException(status_code=400, detail="JSON body must be a list of users or {\"users\": [...]}")
+    return payload
+
+
+def _parse_bulk_row(raw, target_role: str) -> tuple[dict, Optional[str]]:
+    if not isinstance(raw, dict):
+        return {"email": ""}, "Row must be an object with email and password"
+
+    entry = {
+        "email": str(raw.get("email") or "").strip().lower(),
+        "password": str(raw.get("password") or ""),
+    }
+    if not entry["email"]:
+        return entry, "Email is required"
+    if not entry["password"]:
+        return entry, "Password is required"
+
+    try:
+        entry["tokens"] = int(raw.get("tokens") or 0)
+    except (TypeError, ValueError):
+        return entry, "Tokens must be an integer"
+    if entry["tokens"] < 0:
+        return entry, "Tokens must be >= 0"
+
+    if target_role == "admin":
+        try:
+            entry["max_users"] = int(raw.get("max_users"))
+        except (TypeError, ValueError):
+            return entry, "max_users is required when creating admin"
+        if entry["max_users"] < 0:
+            return entry, "max_users must be >= 0"
+
+    return entry, None
+
+
+@admin_router.post("/bulk-create-users")
+async def bulk_create_users(request: Request, current_admin=Depends(require_admin_user)):
+    creator_role = normalize_role(current_admin.get("role"))
+    creator_id = str(current_admin["_id"])
+
+    if is_super_admin(current_admin):
+        target_role = "admin"
+    elif creator_role == "admin":
+        target_role = "user"
+    else:
+        raise HTTPException(status_code=403, detail="Admin access required")
+
+    raw_rows = await _read_bulk_rows(request)
+    if not raw_rows:
+        raise HTTPException(status_code=400, detail="No rows provided")
+    if len(raw_rows) > BULK_CREATE_MAX_ROWS:
+        raise HTTPException(status_code=400, detail=f"Too many rows. Maximum per request: {BULK_CREATE_MAX_ROWS}")
+
+    report = []
+    candidates = []
+    seen_emails = set()
+    for idx, raw in enumerate(raw_rows):
+        entry, error = _parse_bulk_row(raw, target_role)
+        if not error and entry["email"] in seen_emails:
+            error = "Duplicate email in upload"
+        report.append({"row": idx + 1, "email": entry["email"], "status": "error" if error else "pending"})
+        if error:
+            report[idx]["detail"] = error
+            continue
+        seen_emails.add(entry["email"])
+        candidates.append((idx, entry))
+
+    if candidates:
+        existing = await users_collection.find(
+            {"email": {"$in": [entry["email"] for _idx, entry in candidates]}},
+            {"email": 1},
+        ).to_list(None)
+        existing_emails = {doc.get("email") for doc in existing}
+        for idx, entry in candidates:
+            if entry["email"] in existing_emails:
+                report[idx].update({"status": "error", "detail": "Email already exists"})
+        candidates = [(idx, entry) for idx, entry in candidates if entry["email"] not in existing_emails]
+
+    # Quota is checked once for the whole batch; rows past the limit are skipped, not failed.
+    if target_role == "user" and candidates:
+        max_users_allowed = _admin_user_limit(current_admin)
+        current_user_count = await users_collection.count_documents({"role": "user", "created_by": creator_id})
+        remaining_slots = max(max_users_allowed - current_user_count, 0)
+        for idx, _entry in candidates[remaining_slots:]:
+            report[idx].update(
+                {
+                    "status": "skipped",
+                    "detail": f"User limit reached. This admin can create up to {max_users_allowed} users.",
+                }
+            )
+        candidates = candidates[:remaining_slots]
+
+    # Hash before reserving tokens: a hashing failure then has nothing to refund.
+    user_docs = []
+    if candidates:
+        password_hashes = await run_in_threadpool(hash_passwords, [entry["password"] for _idx, entry in candidates])
+        created_at = datetime.utcnow()
+        for (_idx, entry), password_hash in zip(candidates, password_hashes):
+            user_doc = {
+                "_id": ObjectId(),
+                "email": entry["email"],
+                "password_hash": password_hash,
+                "password_plain": entry["password"],
+                "tokens": entry["tokens"],
+                "role": target_role,
+                "created_by": creator_id,
+                "created_at": created_at,
+            }
+            if target_role == "admin":
+                user_doc["max_users_allowed"] = entry["max_users"]
+                user_doc["token_allocation_total"] = entry["tokens"]
+            user_docs.append(user_doc)
+
+    reserved_tokens = 0
+    if creator_role == "admin" and candidates:
+        reserved_tokens = sum(entry["tokens"] for _idx, entry in candidates)
+        if reserved_tokens > 0:
+            reserved = await users_collection.find_one_and_update(
+                {
+                    "_id": current_admin["_id"],
+                    "role": "admin",
+                    "tokens": {"$gte": reserved_tokens},
+                },
+                {"$inc": {"tokens": -reserved_tokens}},
+                return_document=ReturnDocument.AFTER,
+            )
+            if not reserved:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Insufficient admin token balance. This upload needs {reserved_tokens} tokens.",
+                )
+
+    inserted_count = 0
+    if candidates:
+        failed_position = None
+        failed_detail = None
+        try:
+            result = await users_collection.insert_many(user_docs, ordered=True)
+            inserted_count = len(result.inserted_ids)
+        except BulkWriteError as exc:
+            inserted_count = int(exc.details.get("nInserted", 0) or 0)
+            write_errors = exc.details.get("writeErrors") or []
+            failed_position = write_errors[0].get("index", inserted_count) if write_errors else inserted_count
+            if write_errors and write_errors[0].get("code") == 11000:
+                failed_detail = "Email already exists"
+            else:
+                failed_detail = write_errors[0].get("errmsg", "Insert failed") if write_errors else "Insert failed"
+        except Exception:
+            # Ordered inserts stop at the first failure, so the rows that landed are a prefix.
+            inserted_count = await users_collection.count_documents({"_id": {"$in": [doc["_id"] for doc in user_docs]}})
+            raise
+        finally:
+            # Tokens reserved for rows that were not created go back to the admin, even when
+            # the request fails.
+            refund_tokens = sum(entry["tokens"] for _idx, entry in candidates[inserted_count:])
+            if creator_role == "admin" and refund_tokens > 0:
+                await users_collection.update_one(
+                    {"_id": current_admin["_id"], "role": "admin"},
+                    {"$inc": {"tokens": refund_tokens}},
+                )
+
+        for position, ((idx, _entry), user_doc) in enumerate(zip(candidates, user_docs)):
+            if position < inserted_count:
+                report[idx].update({"status": "created", "id": str(user_doc["_id"])})
+            elif position == failed_position:
+                report[idx].update({"status": "error", "detail": failed_detail})
+            else:
+                report[idx].update({"status": "not_attempted", "detail": "Stopped after an earlier row failed"})
+
+    return {
+        "message": f"{inserted_count} of {len(raw_rows)} {target_role} account(s) created",
+        "role": target_role,
+        "created": inserted_count,
+        "failed": len(raw_rows) - inserted_count,
+        "rows": report,
+    }
+
+
 @admin_router.get("/users")
-def list_users(current_admin=Depends(require_admin_user)):
+async def list_users(current_admin=Depends(require_admin_user)):
     if is_super_admin(current_admin):
         query = {"role": "admin"}
     else:
         query = {"role": "user", "created_by": str(current_admin["_id"])}
 
-    users = users_collection.find(query).sort("email", 1)
+    users = await users_collection.find(query).sort("email", 1).to_list(None)
     return [
         {
             "id": str(u["_id"]),
@@ -167,7 +416,7 @@ def _resolve_target_query(user_id: str, current_admin: dict):
 
 
 @admin_router.patch("/users/{user_id}/tokens")
-def update_tokens(user_id: str, data: UpdateTokensRequest, current_admin=Depends(require_admin_user)):
+async def update_tokens(user_id: str, data: UpdateTokensRequest, current_admin=Depends(require_admin_user)):
     if data.tokens < 0:
         raise HTTPException(status_code=400, detail="Tokens must be >= 0")
 
@@ -175,7 +424,7 @@ def update_tokens(user_id: str, data: UpdateTokensRequest, current_admin=Depends
     is_super = is_super_admin(current_admin)
 
     if is_super:
-        target_admin = users_collection.find_one(target_query, {"_id": 1, "tokens": 1, "token_allocation_total": 1})
+        target_admin = await users_collection.find_one(target_query, {"_id": 1, "tokens": 1, "token_allocation_total": 1})
         if not target_admin:
             raise HTTPException(status_code=404, detail="User not found")
 
@@ -188,7 +437,7 @@ def update_tokens(user_id: str, data: UpdateTokensRequest, current_admin=Depends
         current_tokens = int(target_admin.get("tokens", 0))
         existing_total = int(target_admin.get("token_allocation_total", current_tokens))
 
-        users_collection.update_one(
+        await users_collection.update_one(
             {"_id": target_admin["_id"]},
             {
                 "$set": {
@@ -199,7 +448,7 @@ def update_tokens(user_id: str, data: UpdateTokensRequest, current_admin=Depends
         )
         return {"message": "Tokens updated"}
 
-    target_user = users_collection.find_one(target_query, {"_id": 1, "tokens": 1})
+    target_user = await users_collection.find_one(target_query, {"_id": 1, "tokens": 1})
     if not target_user:
         raise HTTPException(status_code=404, detail="User not found")
 
@@ -212,7 +461,7 @@ def update_tokens(user_id: str, data: UpdateTokensRequest, current_admin=Depends
     current_tokens = int(target_user.get("tokens", 0))
     new_tokens = current_tokens + add_tokens
 
-    reserved = users_collection.find_one_and_update(
+    reserved = await users_collection.find_one_and_update(
         {
             "_id": current_admin["_id"],
             "role": "admin",
@@ -224,9 +473,9 @@ def update_tokens(user_id: str, data: UpdateTokensRequest, current_admin=Depends
     if not reserved:
         raise HTTPException(status_code=400, detail="Insufficient admin token balance")
 
-    result = users_collection.update_one({"_id": target_user["_id"]}, {"$set": {"tokens": new_tokens}})
+    result = await users_collection.update_one({"_id": target_user["_id"]}, {"$set": {"tokens": new_tokens}})
     if result.matched_count == 0:
-        users_collection.update_one(
+        await users_collection.update_one(
             {"_id": current_admin["_id"], "role": "admin"},
             {"$inc": {"tokens": add_tokens}},
         )
@@ -236,33 +485,39 @@ def update_tokens(user_id: str, data: UpdateTokensRequest, current_admin=Depends
 
 
 @admin_router.delete("/users/{user_id}")
-def delete_user(user_id: str, current_admin=Depends(require_admin_user)):
+async def delete_user(user_id: str, current_admin=Depends(require_admin_user)):
     oid, target_query = _resolve_target_query(user_id, current_admin)
-    target_user = users_collection.find_one(target_query, {"_id": 1, "role": 1, "tokens": 1})
+    target_user = await users_collection.find_one(target_query, {"_id": 1, "role": 1, "tokens": 1})
     if not target_user:
         raise HTTPException(status_code=404, detail="User not found")
 
-    users_collection.delete_one({"_id": oid})
+    await users_collection.delete_one({"_id": oid})
 
     if target_user.get("role") == "admin":
-        child_users = list(users_collection.find({"role": "user", "created_by": user_id}, {"_id": 1}))
+        child_users = await users_collection.find({"role": "user", "created_by": user_id}, {"_id": 1}).to_list(None)
         child_user_ids = [str(u["_id"]) for u in child_users]
 
         if child_user_ids:
-            users_collection.delete_many({"role": "user", "created_by": user_id})
-            scan_logs_collection.delete_many({"uid": {"$in": child_user_ids}})
+            await users_collection.delete_many({"role": "user", "created_by": user_id})
+            await scan_logs_collection.delete_many({"uid": {"$in": child_user_ids}})
+            await scan_sentences_collection.delete_many({"uid": {"$in": child_user_ids}})
+            await delete_usage(USER_SCOPE, child_user_ids)
+
+        await delete_usage(ADMIN_SCOPE, [user_id])
 
-    scan_logs_collection.delete_many({"uid": user_id})
+    await scan_logs_collection.delete_many({"uid": user_id})
+    await scan_sentences_collection.delete_many({"uid": user_id})
+    await delete_usage(USER_SCOPE, [user_id])
     return {"message": "User deleted"}
 
 
 @admin_router.get("/users/{user_id}/logs")
-def get_user_logs(user_id: str, current_admin=Depends(require_admin_user)):
+async def get_user_logs(user_id: str, current_admin=Depends(require_admin_user)):
     _oid, target_query = _resolve_target_query(user_id, current_admin)
-    if not users_collection.find_one(target_query, {"_id": 1}):
+    if not await users_collection.find_one(target_query, {"_id": 1}):
         raise HTTPException(status_code=404, detail="User not found")
 
-    logs = scan_logs_collection.find({"uid": user_id}).sort("timestamp", -1)
+    logs = await scan_logs_collection.find({"uid": user_id}).sort("timestamp", -1).to_list(None)
 
     return [
         {
@@ -277,10 +532,24 @@ def get_user_logs(user_id: str, current_admin=Depends(require_admin_user)):
     ]
 
 
+@admin_router.get("/users/{user_id}/usage-stats")
+async def get_user_usage_stats(
+    user_id: str,
+    days: int = Query(30, ge=0, le=366),
+    current_admin=Depends(require_admin_user),
+):
+    _oid, target_query = _resolve_target_query(user_id, current_admin)
+    if not await users_collection.find_one(target_query, {"_id": 1}):
+        raise HTTPException(status_code=404, detail="User not found")
+
+    scope = ADMIN_SCOPE if is_super_admin(current_admin) else USER_SCOPE
+    return await get_usage_stats(scope, user_id, days=days)
+
+
 @admin_router.get("/users/{user_id}/password-plain")
-def get_user_plain_password(user_id: str, current_admin=Depends(require_admin_user)):
+async def get_user_plain_password(user_id: str, current_admin=Depends(require_admin_user)):
     _oid, target_query = _resolve_target_query(user_id, current_admin)
-    target_user = users_collection.find_one(target_query, {"_id": 1, "password_plain": 1})
+    target_user = await users_collection.find_one(target_query, {"_id": 1, "password_plain": 1})
     if not target_user:
         raise HTTPException(status_code=404, detail="User not found")
 
@@ -292,9 +561,9 @@ def get_user_plain_password(user_id: str, current_admin=Depends(require_admin_us
 
 
 @admin_router.get("/users/{user_id}/details")
-def get_user_details(user_id: str, current_admin=Depends(require_admin_user)):
+async def get_user_details(user_id: str, current_admin=Depends(require_admin_user)):
     _oid, target_query = _resolve_target_query(user_id, current_admin)
-    target_user = users_collection.find_one(
+    target_user = await users_collection.find_one(
         target_query,
         {
             "_id": 1,
@@ -321,9 +590,9 @@ def get_user_details(user_id: str, current_admin=Depends(require_admin_user)):
 
 
 @admin_router.patch("/users/{user_id}/details")
-def update_user_details(user_id: str, data: UpdateUserDetailsRequest, current_admin=Depends(require_admin_user)):
+async def update_user_details(user_id: str, data: UpdateUserDetailsRequest, current_admin=Depends(require_admin_user)):
     _oid, target_query = _resolve_target_query(user_id, current_admin)
-    target_user = users_collection.find_one(target_query, {"_id": 1, "role": 1})
+    target_user = await users_collection.find_one(target_query, {"_id": 1, "role": 1})
     if not target_user:
         raise HTTPException(status_code=404, detail="User not found")
 
@@ -331,7 +600,7 @@ def update_user_details(user_id: str, data: UpdateUserDetailsRequest, current_ad
 
     new_email = (data.email or "").strip().lower()
     if new_email:
-        duplicate = users_collection.find_one({"email": new_email, "_id": {"$ne": target_user["_id"]}})
+        duplicate = await users_collection.find_one({"email": new_email, "_id": {"$ne": target_user["_id"]}})
         if duplicate:
             raise HTTPException(status_code=400, detail="Email already exists")
         updates["email"] = new_email
@@ -340,7 +609,7 @@ def update_user_details(user_id: str, data: UpdateUserDetailsRequest, current_ad
     if new_password:
         if len(new_password) < 6:
             raise HTTPException(status_code=400, detail="Password must be at least 6 characters")
-        updates["password_hash"] = hash_password(new_password)
+        updates["password_hash"] = await hash_password_async(new_password)
         updates["password_plain"] = new_password
 
     if data.organization_name is not None:
@@ -349,30 +618,31 @@ def update_user_details(user_id: str, data: UpdateUserDetailsRequest, current_ad
     if not updates:
         return {"message": "No changes provided"}
 
-    users_collection.update_one({"_id": target_user["_id"]}, {"$set": updates})
+    await users_collection.update_one({"_id": target_user["_id"]}, {"$set": updates})
     return {"message": "Details updated"}
 
 
 @admin_router.patch("/users/{user_id}/password")
-def update_user_password(user_id: str, data: UpdatePasswordRequest, current_admin=Depends(require_admin_user)):
+async def update_user_password(user_id: str, data: UpdatePasswordRequest, current_admin=Depends(require_admin_user)):
     new_password = (data.password or "").strip()
     if len(new_password) < 6:
         raise HTTPException(status_code=400, detail="Password must be at least 6 characters")
 
     _oid, target_query = _resolve_target_query(user_id, current_admin)
-    target_user = users_collection.find_one(target_query, {"_id": 1})
+    target_user = await users_collection.find_one(target_query, {"_id": 1})
     if not target_user:
         raise HTTPException(status_code=404, detail="User not found")
 
-    users_collection.update_one(
+    password_hash = await hash_password_async(new_password)
+    await users_collection.update_one(
         {"_id": target_user["_id"]},
-        {"$set": {"password_hash": hash_password(new_password), "password_plain": new_password}},
+        {"$set": {"password_hash": password_hash, "password_plain": new_password}},
     )
     return {"message": "Password updated"}
 
 
 @admin_router.patch("/users/{user_id}/max-users")
-def update_admin_max_users(user_id: str, data: UpdateMaxUsersRequest, current_admin=Depends(require_admin_user)):
+async def update_admin_max_users(user_id: str, data: UpdateMaxUsersRequest, current_admin=Depends(require_admin_user)):
     if not is_super_admin(current_admin):
         raise HTTPException(status_code=403, detail="Super admin access required")
     if data.max_users < 0:
@@ -383,14 +653,14 @@ def update_admin_max_users(user_id: str, data: UpdateMaxUsersRequest, current_ad
     except Exception:
         raise HTTPException(status_code=400, detail="Invalid user id")
 
-    target_admin = users_collection.find_one({"_id": oid, "role": "admin"}, {"_id": 1, "max_users_allowed": 1})
+    target_admin = await users_collection.find_one({"_id": oid, "role": "admin"}, {"_id": 1, "max_users_allowed": 1})
     if not target_admin:
         raise HTTPException(status_code=404, detail="Admin not found")
 
     current_limit = int(target_admin.get("max_users_allowed", DEFAULT_MAX_USERS_PER_ADMIN) or 0)
     new_limit = current_limit + int(data.max_users)
 
-    users_collection.update_one(
+    await users_collection.update_one(
         {"_id": oid, "role": "admin"},
         {"$set": {"max_users_allowed": new_limit}},
     )
@@ -399,7 +669,7 @@ def update_admin_max_users(user_id: str, data: UpdateMaxUsersRequest, current_ad
 
 
 @admin_router.get("/me-summary")
-def get_admin_summary(current_admin=Depends(require_admin_user)):
+async def get_admin_summary(current_admin=Depends(require_admin_user)):
     role = normalize_role(current_admin.get("role"))
     base = {
         "role": role,
@@ -413,7 +683,7 @@ def get_admin_summary(current_admin=Depends(require_admin_user)):
 
     max_users_allowed = int(current_admin.get("max_users_allowed", DEFAULT_MAX_USERS_PER_ADMIN) or 0)
     total_tokens_allocated = int(current_admin.get("token_allocation_total", base["tokens"]) or 0)
-    current_users_count = users_collection.count_documents({"role": "user", "created_by": str(current_admin["_id"])})
+    current_users_count = await users_collection.count_documents({"role": "user", "created_by": str(current_admin["_id"])})
     remaining_user_slots = max(max_users_allowed - current_users_count, 0)
 
     base.update(
@@ -429,12 +699,99 @@ def get_admin_summary(current_admin=Depends(require_admin_user)):
     return base
 
 
+@admin_router.get("/usage-stats")
+async def get_admin_usage_stats(days: int = Query(30, ge=0, le=366), current_admin=Depends(require_admin_user)):
+    return await get_usage_stats(ADMIN_SCOPE, str(current_admin["_id"]), days=days)
+
+
+@admin_router.get("/db-pool-stats")
+async def get_db_pool_stats(current_admin=Depends(require_admin_user)):
+    if not is_super_admin(current_admin):
+        raise HTTPException(status_code=403, detail="Super admin access required")
+    return pool_metrics_snapshot()
+
+
+@admin_router.get("/password-hash-stats")
+async def get_password_hash_stats(current_admin=Depends(require_admin_user)):
+    if not is_super_admin(current_admin):
+        raise HTTPException(status_code=403, detail="Super admin access required")
+    return password_hash_stats()
+
+
+@admin_router.get("/memory-stats")
+async def get_memory_stats(current_admin=Depends(require_admin_user)):
+    if not is_super_admin(current_admin):
+        raise HTTPException(status_code=403, detail="Super admin access required")
+    return memory_admission.snapshot()
+
+
+@admin_router.get("/models")
+async def list_models(current_admin=Depends(require_admin_user)):
+    if not is_super_admin(current_admin):
+        raise HTTPException(status_code=403, detail="Super admin access required")
+    return {"registry": model_registry.snapshot(), "versions": await run_in_threadpool(model_registry.list_versions)}
+
+
+@admin_router.post("/models/{version}/activate")
+async def activate_model(version: str, current_admin=Depends(require_admin_user)):
+    if not is_super_admin(current_admin):
+        raise HTTPException(status_code=403, detail="Super admin access required")
+    try:
+        # Loading and warming can take a while; scans keep running on the current version.
+        active = await run_in_threadpool(model_registry.activate, version)
+    except (LookupError, FileNotFoundError):
+        raise HTTPException(status_code=404, detail="Model version not found")
+    except ModelBundleError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    except ModelRegistryBusyError:
+        raise HTTPException(status_code=409, detail="Another model version is still loading")
+    return {"message": f"Model version {version} is now serving", "active": active}
+
+
+@admin_router.get("/shadow-stats")
+async def get_shadow_stats(current_admin=Depends(require_admin_user)):
+    if not is_super_admin(current_admin):
+        raise HTTPException(status_code=403, detail="Super admin access required")
+    return shadow_evaluator.snapshot()
+
+
+@admin_router.get("/inference-queue-stats")
+async def get_inference_queue_stats(current_admin=Depends(require_admin_user)):
+    if not is_super_admin(current_admin):
+        raise HTTPException(status_code=403, detail="Super admin access required")
+    return inference_queue.snapshot()
+
+
+@admin_router.get("/profiles")
+async def list_profiles(current_admin=Depends(require_admin_user)):
+    if not is_super_admin(current_admin):
+        raise HTTPException(status_code=403, detail="Super admin access required")
+    return {"profiler": request_profiler.stats(), "profiles": request_profiler.list_dumps()}
+
+
+@admin_router.get("/profiles/{name}")
+async def download_profile(name: str, current_admin=Depends(require_admin_user)):
+    if not is_super_admin(current_admin):
+        raise HTTPException(status_code=403, detail="Super admin access required")
+    path = request_profiler.dump_path(name)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(path, media_type="text/plain; charset=utf-8", filename=name)
+
+
+@admin_router.get("/extraction-stats")
+async def get_extraction_stats(current_admin=Depends(require_admin_user)):
+    if not is_super_admin(current_admin):
+        raise HTTPException(status_code=403, detail="Super admin access required")
+    return {"extractors": extractor_registry.stats(), "cache": extraction_cache.stats()}
+
+
 @admin_router.get("/admin-requests")
-def list_admin_requests(current_admin=Depends(require_admin_user)):
+async def list_admin_requests(current_admin=Depends(require_admin_user)):
     if not is_super_admin(current_admin):
         raise HTTPException(status_code=403, detail="Super admin access required")
 
-    requests = admin_requests_collection.find({"status": "pending"}).sort("requested_at", -1)
+    requests = await admin_requests_collection.find({"status": "pending"}).sort("requested_at", -1).to_list(None)
     return [
         {
             "id": str(r["_id"]),
@@ -450,7 +807,7 @@ def list_admin_requests(current_admin=Depends(require_admin_user)):
 
 
 @admin_router.post("/admin-requests/{request_id}/approve")
-def approve_admin_request(request_id: str, current_admin=Depends(require_admin_user)):
+async def approve_admin_request(request_id: str, current_admin=Depends(require_admin_user)):
     if not is_super_admin(current_admin):
         raise HTTPException(status_code=403, detail="Super admin access required")
 
@@ -459,7 +816,7 @@ def approve_admin_request(request_id: str, current_admin=Depends(require_admin_u
     except Exception:
         raise HTTPException(status_code=400, detail="Invalid request id")
 
-    request_doc = admin_requests_collection.find_one({"_id": oid})
+    request_doc = await admin_requests_collection.find_one({"_id": oid})
     if not request_doc:
         raise HTTPException(status_code=404, detail="Request not found")
     if request_doc.get("status") != "pending":
@@ -468,11 +825,11 @@ def approve_admin_request(request_id: str, current_admin=Depends(require_admin_u
     email = (request_doc.get("email") or "").strip().lower()
     if not email:
         raise HTTPException(status_code=400, detail="Invalid request email")
-    if users_collection.find_one({"email": email}):
+    if await users_collection.find_one({"email": email}):
         raise HTTPException(status_code=400, detail="Account already exists for this email")
 
     try:
-        users_collection.insert_one(
+        await users_collection.insert_one(
             {
                 "email": email,
                 "password_hash": request_doc.get("password_hash", ""),
@@ -489,43 +846,88 @@ def approve_admin_request(request_id: str, current_admin=Depends(require_admin_u
     except DuplicateKeyError:
         raise HTTPException(status_code=400, detail="Account already exists for this email")
 
+    # Delivery happens on the outbox sender thread so a slow SMTP server never holds this request.
     plain_password = request_doc.get("password_plain", "")
-    email_sent = False
-    email_error = None
+    email_queued = False
     if plain_password:
-        try:
-            send_admin_approval_email(
+        await email_outbox_collection.insert_one(
+            admin_approval_outbox_doc(
+                request_id=oid,
                 to_email=email,
                 login_email=email,
                 login_password=plain_password,
             )
-            email_sent = True
-        except Exception as exc:
-            email_error = str(exc)
+        )
+        email_queued = True
 
-    admin_requests_collection.update_one(
+    await admin_requests_collection.update_one(
         {"_id": oid},
         {
             "$set": {
                 "status": "approved",
                 "reviewed_at": datetime.utcnow(),
                 "reviewed_by": str(current_admin["_id"]),
-                "approval_email_sent": email_sent,
-                "approval_email_error": email_error,
-            }
-            ,
+                "approval_email_sent": False,
+                "approval_email_status": "queued" if email_queued else "skipped",
+                "approval_email_error": None,
+            },
             "$unset": {"password_plain": ""},
         },
     )
+    if email_queued:
+        outbox_sender.wake()
+
+    return {
+        "message": "Request approved and admin account created",
+        "email_sent": False,
+        "email_queued": email_queued,
+    }
+
+
+@admin_router.get("/scan-job-stats")
+async def get_scan_job_stats(current_admin=Depends(require_admin_user)):
+    if not is_super_admin(current_admin):
+        raise HTTPException(status_code=403, detail="Super admin access required")
+
+    cursor = await scan_job_items_collection.aggregate([{"$group": {"_id": "$status", "count": {"$sum": 1}}}])
+    by_status = await cursor.to_list(None)
+    return {
+        "workers": scan_job_workers.stats(),
+        "items_by_status": {row["_id"]: row["count"] for row in by_status},
+    }
+
+
+@admin_router.get("/cascade-stats")
+async def get_cascade_stats(current_admin=Depends(require_admin_user)):
+    if not is_super_admin(current_admin):
+        raise HTTPException(status_code=403, detail="Super admin access required")
+    return cascade_stats.snapshot(enabled=model_registry.current().light_model is not None)
 
-    response = {"message": "Request approved and admin account created", "email_sent": email_sent}
-    if email_error:
-        response["email_error"] = email_error
-    return response
+
+@admin_router.get("/email-outbox")
+async def list_email_outbox(limit: int = Query(50, ge=1, le=500), current_admin=Depends(require_admin_user)):
+    if not is_super_admin(current_admin):
+        raise HTTPException(status_code=403, detail="Super admin access required")
+
+    cursor = email_outbox_collection.find({}, {"payload": 0}).sort("created_at", -1).limit(limit)
+    return [
+        {
+            "id": str(m["_id"]),
+            "kind": m.get("kind"),
+            "to_email": m.get("to_email"),
+            "status": m.get("status"),
+            "attempts": int(m.get("attempts", 0) or 0),
+            "last_error": m.get("last_error"),
+            "created_at": m.get("created_at").isoformat() if m.get("created_at") else None,
+            "next_attempt_at": m.get("next_attempt_at").isoformat() if m.get("next_attempt_at") else None,
+            "sent_at": m.get("sent_at").isoformat() if m.get("sent_at") else None,
+        }
+        async for m in cursor
+    ]
 
 
 @admin_router.post("/admin-requests/{request_id}/reject")
-def reject_admin_request(
+async def reject_admin_request(
     request_id: str,
     data: Optional[AdminRequestDecision] = None,
     current_admin=Depends(require_admin_user),
@@ -538,7 +940,7 @@ def reject_admin_request(
     except Exception:
         raise HTTPException(status_code=400, detail="Invalid request id")
 
-    result = admin_requests_collection.update_one(
+    result = await admin_requests_collection.update_one(
         {"_id": oid, "status": "pending"},
         {
             "$set": {
@@ -1,11 +1,12 @@
 from datetime import datetime
 from typing import Optional
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request
 from pydantic import BaseModel
 
-from backend.crypto import hash_password, verify_password
-from backend.mongo import admin_requests_collection, users_collection
+from backend.async_mongo import admin_requests_collection, users_collection
+from backend.hashing import hash_password_async, verify_password_async
+from backend.rate_limit import client_ip, enforce_login_attempt_limits, login_email_limiter
 from backend.security import create_access_token, normalize_role
 
 auth_router = APIRouter(prefix="/auth", tags=["Auth"])
@@ -25,16 +26,19 @@ class AdminAccessRequest(BaseModel):
 
 
 @auth_router.post("/login")
-def login(data: LoginRequest):
+async def login(data: LoginRequest, request: Request):
     email = data.email.strip().lower()
-    user = users_collection.find_one({"email": email})
+    enforce_login_attempt_limits(email, client_ip(request))
+    user = await users_collection.find_one({"email": email})
 
     if not user:
         raise HTTPException(status_code=401, detail="Invalid email or password")
 
-    if not verify_password(data.password, user.get("password_hash", "")):
+    if not await verify_password_async(data.password, user.get("password_hash", "")):
         raise HTTPException(status_code=401, detail="Invalid email or password")
 
+    login_email_limiter.reset(email)
+
     normalized_role = normalize_role(user.get("role", "user"))
     token = create_access_token(str(user["_id"]), normalized_role)
 
@@ -51,7 +55,7 @@ def login(data: LoginRequest):
 
 
 @auth_router.post("/request-admin-access")
-def request_admin_access(data: AdminAccessRequest):
+async def request_admin_access(data: AdminAccessRequest):
     email = data.email.strip().lower()
 
     if data.tokens < 0:
@@ -59,17 +63,18 @@ def request_admin_access(data: AdminAccessRequest):
     if data.max_users < 0:
         raise HTTPException(status_code=400, detail="max_users must be >= 0")
 
-    if users_collection.find_one({"email": email}):
+    if await users_collection.find_one({"email": email}):
         raise HTTPException(status_code=400, detail="Account already exists with this email")
 
-    existing_pending = admin_requests_collection.find_one({"email": email, "status": "pending"})
+    existing_pending = await admin_requests_collection.find_one({"email": email, "status": "pending"})
     if existing_pending:
         raise HTTPException(status_code=400, detail="A pending request already exists for this email")
 
-    admin_requests_collection.insert_one(
+    password_hash = await hash_password_async(data.password)
+    await admin_requests_collection.insert_one(
         {
             "email": email,
-            "password_hash": hash_password(data.password),
+            "password_hash": password_hash,
             "password_plain": data.password,
             "requested_tokens": int(data.tokens),
             "requested_max_users": int(data.max_users),
@@ -0,0 +1,247 @@
+import asyncio
+from datetime import datetime
+import json
+import os
+from typing import BinaryIO, Optional
+import zipfile
+
+from bson import ObjectId
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+
+from backend.async_mongo import scan_job_items_collection, scan_jobs_collection
+from backend.scan_jobs import (
+    ITEM_FINAL_STATUSES,
+    JOB_FINAL_STATUSES,
+    SCAN_JOB_MAX_ITEMS,
+    cancel_job_items,
+    new_job_docs,
+    scan_job_workers,
+    store_job_archive,
+)
+from backend.security import get_current_user
+from backend.uploads import MAX_UPLOAD_BYTES, open_upload
+from backend.usage import usage_owner_ids
+
+jobs_router = APIRouter(prefix="/scan-jobs", tags=["Scan Jobs"])
+SCAN_JOB_MAX_UNCOMPRESSED_BYTES = int(os.getenv("SCAN_JOB_MAX_UNCOMPRESSED_BYTES", str(100 * 1024 * 1024)))
+SCAN_JOB_EVENTS_INTERVAL_SECONDS = 1.0
+
+
+def _iso(value: Optional[datetime]) -> Optional[str]:
+    return value.isoformat() if value else None
+
+
+def _job_summary(job: dict) -> dict:
+    finished = job["completed"] + job["failed"] + job["cancelled"]
+    return {
+        "job_id": str(job["_id"]),
+        "status": job["status"],
+        "source": job.get("source"),
+        "total": job["total"],
+        "completed": job["completed"],
+        "failed": job["failed"],
+        "cancelled": job["cancelled"],
+        "progress": round(finished / job["total"], 4) if job["total"] else 1.0,
+        "created_at": _iso(job.get("created_at")),
+        "started_at": _iso(job.get("started_at")),
+        "finished_at": _iso(job.get("finished_at")),
+    }
+
+
+def _item_summary(item: dict) -> dict:
+    result = item.get("result") or {}
+    return {
+        "index": item["index"],
+        "name": item.get("name"),
+        "status": item["status"],
+        "characters": item.get("characters"),
+        "error": item.get("error"),
+        "overall_ai_probability": result.get("overall_ai_probability"),
+        "overall_human_probability": result.get("overall_human_probability"),
+        "final_document_label": result.get("final_document_label"),
+    }
+
+
+def _is_hidden_entry(name: str) -> bool:
+    parts = name.replace("\\", "/").split("/")
+    return parts[0] == "__MACOSX" or any(part.startswith(".") for part in parts)
+
+
+def _read_zip_entries(stream: BinaryIO) -> list[dict]:
+    """List the archive's files from its central directory; nothing is extracted here.
+
+    Workers read and extract each entry from the stored archive (backend/scan_jobs.py), so
+    one unreadable file only fails its own item.
+    """
+    try:
+        archive = zipfile.ZipFile(stream)
+    except zipfile.BadZipFile:
+        raise HTTPException(status_code=400, detail="Upload must be a .zip archive")
+
+    with archive:
+        entries = [info for info in archive.infolist() if not info.is_dir() and not _is_hidden_entry(info.filename)]
+        if not entries:
+            raise HTTPException(status_code=400, detail="Zip archive has no files")
+        if len(entries) > SCAN_JOB_MAX_ITEMS:
+            raise HTTPException(status_code=400, detail=f"Too many files. Maximum per job: {SCAN_JOB_MAX_ITEMS}")
+        # Declared sizes are checked up front; the workers cap their reads in case they lie.
+        if sum(info.file_size for info in entries) > SCAN_JOB_MAX_UNCOMPRESSED_BYTES:
+            raise HTTPException(
+                status_code=413,
+                detail=f"Archive too large when uncompressed. Maximum: {SCAN_JOB_MAX_UNCOMPRESSED_BYTES} bytes",
+            )
+
+        items = []
+        for info in entries:
+            name = info.filename.replace("\\", "/").rsplit("/", 1)[-1]
+            if info.file_size > MAX_UPLOAD_BYTES:
+                items.append({"name": name, "error": f"File too large. Maximum allowed size: {MAX_UPLOAD_BYTES} bytes"})
+                continue
+            items.append({"name": name, "entry": info.filename})
+        return items
+
+
+def _parse_text_items(payload) -> list[dict]:
+    if isinstance(payload, dict) and isinstance(payload.get("texts"), list):
+        raw_items = [{"text": text} for text in payload["texts"]]
+    elif isinstance(payload, dict) and isinstance(payload.get("items"), list):
+        raw_items = payload["items"]
+    else:
+        raise HTTPException(
+            status_code=400,
+            detail='JSON body must be {"texts": [...]} or {"items": [{"name": ..., "text": ...}]}',
+        )
+
+    if not raw_items:
+        raise HTTPException(status_code=400, detail="No items provided")
+    if len(raw_items) > SCAN_JOB_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f"Too many items. Maximum per job: {SCAN_JOB_MAX_ITEMS}")
+
+    items = []
+    for idx, raw in enumerate(raw_items):
+        if not isinstance(raw, dict) or not isinstance(raw.get("text"), str):
+            items.append({"name": f"item-{idx + 1}", "error": "Item must have a text string"})
+            continue
+        name = str(raw.get("name") or f"item-{idx + 1}")[:200]
+        text = raw["text"].strip()
+        items.append({"name": name, "text": text} if text else {"name": name, "error": "Text is empty"})
+    return items
+
+
+async def _read_job_items(request: Request) -> tuple[str, list[dict], Optional[ObjectId]]:
+    """Returns (source, items, id of the stored zip archive or None)."""
+    content_type = (request.headers.get("content-type") or "").lower()
+
+    if content_type.startswith("multipart/form-data"):
+        form = await request.form()
+        upload = form.get("file")
+        if upload is None or not hasattr(upload, "read"):
+            raise HTTPException(status_code=400, detail="Upload a .zip file in the 'file' field")
+        stream = open_upload(upload, MAX_UPLOAD_BYTES)
+        items = await run_in_threadpool(_read_zip_entries, stream)
+        archive_id = None
+        if any("entry" in item for item in items):
+            archive_id = await run_in_threadpool(store_job_archive, stream)
+        return "zip", items, archive_id
+
+    try:
+        payload = await request.json()
+    except Exception:
+        raise HTTPException(status_code=400, detail="Body must be JSON or a multipart .zip upload")
+    return "texts", _parse_text_items(payload), None
+
+
+async def _get_own_job(job_id: str, current_user) -> dict:
+    try:
+        oid = ObjectId(job_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid job id")
+
+    job = await scan_jobs_collection.find_one({"_id": oid, "uid": str(current_user["_id"])})
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@jobs_router.post("")
+async def create_scan_job(request: Request, current_user=Depends(get_current_user)):
+    if int(current_user.get("tokens", 0) or 0) <= 0:
+        raise HTTPException(status_code=402, detail="TOKEN_FINISHED")
+
+    source, items, archive_id = await _read_job_items(request)
+    user_id, admin_id = usage_owner_ids(current_user)
+    job, item_docs = new_job_docs(user_id, admin_id, source, items, archive_id)
+
+    # Job first: a worker that claims an item must be able to find its job.
+    await scan_jobs_collection.insert_one(job)
+    await scan_job_items_collection.insert_many(item_docs)
+    scan_job_workers.wake()
+
+    summary = _job_summary(job)
+    summary["items"] = [_item_summary(item) for item in item_docs]
+    return summary
+
+
+@jobs_router.get("")
+async def list_scan_jobs(current_user=Depends(get_current_user)):
+    jobs = await scan_jobs_collection.find({"uid": str(current_user["_id"])}).sort("created_at", -1).limit(20).to_list(None)
+    return {"jobs": [_job_summary(job) for job in jobs]}
+
+
+@jobs_router.get("/{job_id}")
+async def get_scan_job(job_id: str, current_user=Depends(get_current_user)):
+    job = await _get_own_job(job_id, current_user)
+    items = await scan_job_items_collection.find(
+        {"job_id": job["_id"]},
+        {"text": 0, "result.sentences": 0},
+    ).sort("index", 1).to_list(None)
+
+    summary = _job_summary(job)
+    summary["items"] = [_item_summary(item) for item in items]
+    return summary
+
+
+@jobs_router.get("/{job_id}/events")
+async def stream_scan_job(job_id: str, request: Request, current_user=Depends(get_current_user)):
+    job = await _get_own_job(job_id, current_user)
+
+    async def events():
+        last = None
+        while True:
+            current = await scan_jobs_collection.find_one({"_id": job["_id"]})
+            if not current:
+                return
+            summary = _job_summary(current)
+            if summary != last:
+                yield f"data: {json.dumps(summary)}\n\n"
+                last = summary
+            if current["status"] in JOB_FINAL_STATUSES or await request.is_disconnected():
+                return
+            await asyncio.sleep(SCAN_JOB_EVENTS_INTERVAL_SECONDS)
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+
+@jobs_router.get("/{job_id}/items/{index}")
+async def get_scan_job_item(job_id: str, index: int, current_user=Depends(get_current_user)):
+    job = await _get_own_job(job_id, current_user)
+    item = await scan_job_items_collection.find_one({"job_id": job["_id"], "index": index}, {"text": 0})
+    if not item:
+        raise HTTPException(status_code=404, detail="Item not found")
+
+    response = _item_summary(item)
+    if item["status"] in ITEM_FINAL_STATUSES:
+        response["result"] = item.get("result")
+    return response
+
+
+@jobs_router.post("/{job_id}/cancel")
+async def cancel_scan_job(job_id: str, current_user=Depends(get_current_user)):
+    job = await _get_own_job(job_id, current_user)
+    if job["status"] in JOB_FINAL_STATUSES:
+        return {"message": f"Job already {job['status']}", "cancelled": 0}
+
+    cancelled = await run_in_threadpool(cancel_job_items, job["_id"])
+    return {"message": "Job cancelled", "cancelled": cancelled}
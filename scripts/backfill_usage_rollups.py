@@ -0,0 +1,73 @@
+import sys
+from datetime import datetime
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from backend.mongo import ensure_collections_and_indexes, scan_logs_collection, usage_rollups_collection, users_collection  # noqa: E402
+from backend.usage import ADMIN_SCOPE, TOTAL_DAY, USER_SCOPE, usage_owner_ids  # noqa: E402
+
+
+def _accumulate(buckets: dict, key: tuple, scans: int, ai_sum: float) -> None:
+    bucket = buckets.setdefault(key, {"scans": 0, "ai_percent_sum": 0.0, "tokens_used": 0})
+    bucket["scans"] += scans
+    bucket["ai_percent_sum"] += ai_sum
+    # Every logged scan consumed exactly one token.
+    bucket["tokens_used"] += scans
+
+
+def main() -> int:
+    ensure_collections_and_indexes()
+
+    owners = {}
+    for user in users_collection.find({}, {"_id": 1, "role": 1, "created_by": 1}):
+        user_id, admin_id = usage_owner_ids(user)
+        owners[user_id] = admin_id
+
+    pipeline = [
+        {
+            "$group": {
+                "_id": {
+                    "uid": "$uid",
+                    "day": {"$dateToString": {"format": "%Y-%m-%d", "date": "$timestamp"}},
+                },
+                "scans": {"$sum": 1},
+                "ai_percent_sum": {"$sum": {"$ifNull": ["$ai_percent", 0]}},
+            }
+        }
+    ]
+
+    buckets = {}
+    for row in scan_logs_collection.aggregate(pipeline, allowDiskUse=True):
+        uid = row["_id"].get("uid")
+        day = row["_id"].get("day")
+        if not uid or not day:
+            continue
+        scans = int(row["scans"])
+        ai_sum = float(row["ai_percent_sum"])
+
+        targets = [(USER_SCOPE, uid)]
+        admin_id = owners.get(uid)
+        if admin_id:
+            targets.append((ADMIN_SCOPE, admin_id))
+        for scope, owner_id in targets:
+            _accumulate(buckets, (scope, owner_id, day), scans, ai_sum)
+            _accumulate(buckets, (scope, owner_id, TOTAL_DAY), scans, ai_sum)
+
+    now = datetime.utcnow()
+    docs = [
+        {"scope": scope, "owner_id": owner_id, "day": day, **values, "updated_at": now}
+        for (scope, owner_id, day), values in buckets.items()
+    ]
+
+    usage_rollups_collection.delete_many({})
+    if docs:
+        usage_rollups_collection.insert_many(docs, ordered=False)
+
+    print(f"Rebuilt {len(docs)} usage rollup document(s) from scan_logs.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,98 @@
+import argparse
+import random
+import re
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from extraction.normalize import normalize_extracted_text  # noqa: E402
+
+VOCAB = (
+    "the of and to in a is that for it as was with be by on not this are or from at which but have an they "
+    "were there been one all their has would when if so what can more out up its about into them only time "
+    "could new some these two may then first any now like over such even most made after also did many before "
+    "through back years where much way well down should because each just those people how little state good "
+    "very make world still own see work long get here between both life being under never day same another"
+).split()
+
+
+def legacy_normalize(text: str) -> str:
+    """The previous multi-pass normalizer, kept here as the baseline."""
+    text = text.replace("\r\n", "\n").replace("\r", "\n").replace("\xa0", " ")
+    text = re.sub(r"([A-Za-z])-\n([A-Za-z])", r"\1\2", text)
+
+    lines = text.split("\n")
+    cleaned = []
+    blank_run = 0
+
+    for raw in lines:
+        line = re.sub(r"[ \t]+", " ", raw).strip()
+        if not line:
+            blank_run += 1
+            if blank_run <= 1:
+                cleaned.append("")
+            continue
+        blank_run = 0
+        cleaned.append(line)
+
+    return "\n".join(cleaned).strip()
+
+
+def build_corpus(chars: int, seed: int) -> str:
+    """PDF-like text: ~80 char lines, CRLF endings, indents, hyphen wraps, NBSP and blank runs."""
+    rng = random.Random(seed)
+    lines = []
+    size = 0
+    while size < chars:
+        line = " ".join(rng.choice(VOCAB) for _ in range(rng.randint(8, 14)))
+        roll = rng.random()
+        if roll < 0.08:
+            line += " exam-"
+        elif roll < 0.2:
+            line = "   " + line.replace(" ", "  ", 2) + "\t"
+        elif roll < 0.25:
+            line = line.replace(" ", "\xa0", 1)
+        lines.append(line)
+        size += len(line) + 2
+        if rng.random() < 0.08:
+            lines.extend([""] * rng.randint(1, 3))
+    return "\r\n".join(lines)[:chars]
+
+
+def measure(fn, text: str, repeat: int) -> tuple[float, int]:
+    best = float("inf")
+    for _ in range(repeat):
+        started_at = time.perf_counter()
+        fn(text)
+        best = min(best, time.perf_counter() - started_at)
+    tracemalloc.start()
+    fn(text)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return best, peak
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Micro-benchmark for extracted-text normalization.")
+    parser.add_argument("--chars", type=int, nargs="+", default=[30_000, 300_000, 3_000_000])
+    parser.add_argument("--repeat", type=int, default=15)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    print(f"{'chars':>10} {'impl':>8} {'best ms':>9} {'peak KB':>9}")
+    for chars in args.chars:
+        text = build_corpus(chars, args.seed)
+        identical = normalize_extracted_text(text) == legacy_normalize(text)
+        for name, fn in (("legacy", legacy_normalize), ("current", normalize_extracted_text)):
+            seconds, peak = measure(fn, text, args.repeat)
+            print(f"{chars:>10} {name:>8} {seconds * 1000:>9.2f} {peak // 1024:>9}")
+        print(f"{'':>10} identical output: {identical}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
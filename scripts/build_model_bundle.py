@@ -0,0 +1,111 @@
+import argparse
+from datetime import datetime
+import json
+import os
+import pickle
+import shutil
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from features.cascade import read_light_model  # noqa: E402
+from features.feature_extractor import BERT_EMBED_DIM, STYLE_FEATURE_DIM, feature_config_fingerprint  # noqa: E402
+from features.model_registry import (  # noqa: E402
+    BUILTIN_VERSION,
+    MANIFEST_NAME,
+    MODEL_REGISTRY_DIR,
+    VERSION_NAME,
+)
+
+
+def _copy_graph(src: Path, dst: Path) -> None:
+    shutil.copy2(src, dst)
+    # Graphs over 2GB keep their weights in <graph>.data next to them.
+    data = Path(str(src) + ".data")
+    if data.exists():
+        shutil.copy2(data, Path(str(dst) + ".data"))
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Package a trained model as a versioned bundle for the model registry.")
+    parser.add_argument("version", help="Bundle name, e.g. 2024-06-01 or v7")
+    parser.add_argument("--model", required=True, help="Trained XGBoost classifier (.pkl)")
+    parser.add_argument("--onnx", help="BERT ONNX graph, if this version changes BERT")
+    parser.add_argument("--onnx-cls", help="CLS-only graph from scripts/prune_onnx_cls.py (needs --onnx)")
+    parser.add_argument("--tokenizer", help="Tokenizer directory or Hugging Face name to save into the bundle")
+    parser.add_argument(
+        "--light-model",
+        help="Cascade light model distilled from --model (scripts/train_light_model.py); without it the cascade is off",
+    )
+    parser.add_argument(
+        "--chunk-sentence-size",
+        type=int,
+        default=int(os.getenv("CHUNK_SENTENCE_SIZE", "15")),
+        help="CHUNK_SENTENCE_SIZE the model was trained with",
+    )
+    parser.add_argument("--registry", default=str(MODEL_REGISTRY_DIR))
+    args = parser.parse_args()
+
+    if not VERSION_NAME.match(args.version) or args.version == BUILTIN_VERSION:
+        print(f"Invalid version name: {args.version!r}", file=sys.stderr)
+        return 2
+    if args.onnx_cls and not args.onnx:
+        print("--onnx-cls needs --onnx", file=sys.stderr)
+        return 2
+
+    with open(args.model, "rb") as fh:
+        model = pickle.load(fh)
+    expected = BERT_EMBED_DIM + STYLE_FEATURE_DIM
+    if getattr(model, "n_features_in_", expected) != expected:
+        print(f"Model expects {model.n_features_in_} features, the pipeline produces {expected}", file=sys.stderr)
+        return 1
+    if args.light_model:
+        try:
+            read_light_model(Path(args.light_model), STYLE_FEATURE_DIM, len(getattr(model, "classes_", range(3))))
+        except ValueError as exc:
+            print(exc, file=sys.stderr)
+            return 1
+
+    bundle_dir = Path(args.registry) / args.version
+    if bundle_dir.exists():
+        print(f"{bundle_dir} already exists; pick a new version", file=sys.stderr)
+        return 1
+    bundle_dir.mkdir(parents=True)
+
+    manifest = {
+        "version": args.version,
+        "created_at": datetime.utcnow().isoformat(),
+        "feature_fingerprint": feature_config_fingerprint(args.chunk_sentence_size),
+        "xgb_model": "xgb_model.pkl",
+    }
+    shutil.copy2(args.model, bundle_dir / manifest["xgb_model"])
+    if args.onnx:
+        manifest["onnx"] = "bert/model.onnx"
+        (bundle_dir / "bert").mkdir()
+        _copy_graph(Path(args.onnx), bundle_dir / manifest["onnx"])
+    if args.onnx_cls:
+        manifest["onnx_cls"] = "bert/model_cls.onnx"
+        _copy_graph(Path(args.onnx_cls), bundle_dir / manifest["onnx_cls"])
+    if args.light_model:
+        manifest["light_model"] = "xgb_light.pkl"
+        shutil.copy2(args.light_model, bundle_dir / manifest["light_model"])
+    if args.tokenizer:
+        manifest["tokenizer"] = "tokenizer"
+        if Path(args.tokenizer).is_dir():
+            shutil.copytree(args.tokenizer, bundle_dir / "tokenizer")
+        else:
+            from transformers import AutoTokenizer
+
+            AutoTokenizer.from_pretrained(args.tokenizer).save_pretrained(str(bundle_dir / "tokenizer"))
+
+    # Written last: the registry ignores directories without a manifest.
+    (bundle_dir / MANIFEST_NAME).write_text(json.dumps(manifest, indent=2) + "\n", encoding="utf-8")
+    print(f"Wrote {bundle_dir} (feature fingerprint {manifest['feature_fingerprint']})")
+    print(f"Activate it with POST /admin/models/{args.version}/activate")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
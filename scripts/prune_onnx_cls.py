@@ -0,0 +1,161 @@
+import argparse
+import os
+import sys
+from pathlib import Path
+
+import numpy as np
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+CLS_OUTPUT_NAME = "cls_embedding"
+
+
+def _resolve(p: str) -> Path:
+    path = Path(p)
+    return path if path.is_absolute() else PROJECT_ROOT / path
+
+
+def _hidden_state_output(graph):
+    """The (batch, seq, hidden) output; prefers the conventional last_hidden_state name."""
+    candidates = [o for o in graph.output if len(o.type.tensor_type.shape.dim) == 3]
+    for out in candidates:
+        if out.name == "last_hidden_state":
+            return out
+    if not candidates:
+        raise RuntimeError("Graph has no 3-D output to take the CLS vector from")
+    return candidates[0]
+
+
+def _node_inputs(node) -> set[str]:
+    # Control-flow nodes may read outer-scope values from inside their subgraphs.
+    names = set(node.input)
+    for attr in node.attribute:
+        subgraphs = list(attr.graphs) + ([attr.g] if attr.HasField("g") else [])
+        for sub in subgraphs:
+            for sub_node in sub.node:
+                names |= _node_inputs(sub_node)
+    return names
+
+
+def _prune_dead_nodes(graph) -> int:
+    needed = {o.name for o in graph.output}
+    keep = []
+    for node in reversed(graph.node):
+        if needed.intersection(node.output):
+            keep.append(node)
+            needed |= _node_inputs(node)
+
+    removed = len(graph.node) - len(keep)
+    del graph.node[:]
+    graph.node.extend(reversed(keep))
+
+    initializers = [init for init in graph.initializer if init.name in needed]
+    del graph.initializer[:]
+    graph.initializer.extend(initializers)
+
+    value_info = [vi for vi in graph.value_info if vi.name in needed]
+    del graph.value_info[:]
+    graph.value_info.extend(value_info)
+    return removed
+
+
+def build_cls_model(model):
+    """Rewrite ``model`` in place to return only ``last_hidden_state[:, 0, :]``."""
+    from onnx import TensorProto, helper, numpy_helper
+
+    graph = model.graph
+    hidden = _hidden_state_output(graph)
+    dims = hidden.type.tensor_type.shape.dim
+
+    graph.initializer.append(numpy_helper.from_array(np.array(0, dtype=np.int64), name="cls_token_index"))
+    # A scalar index drops the sequence axis: (batch, seq, hidden) -> (batch, hidden).
+    graph.node.append(
+        helper.make_node("Gather", [hidden.name, "cls_token_index"], [CLS_OUTPUT_NAME], name="cls_gather", axis=1)
+    )
+
+    out = helper.make_tensor_value_info(CLS_OUTPUT_NAME, TensorProto.FLOAT, None)
+    out_dims = out.type.tensor_type.shape.dim
+    for src in (dims[0], dims[2]):
+        out_dims.add().CopyFrom(src)
+
+    dropped = [o.name for o in graph.output]
+    del graph.output[:]
+    graph.output.append(out)
+    removed = _prune_dead_nodes(graph)
+    return hidden.name, dropped, removed
+
+
+def _sample_inputs(session, seq_len: int) -> dict:
+    rng = np.random.default_rng(7)
+    inputs = {}
+    for meta in session.get_inputs():
+        if meta.name == "input_ids":
+            # Low ids exist in any WordPiece vocabulary, including small test vocabularies.
+            ids = rng.integers(100, 600, size=(1, seq_len), dtype=np.int64)
+            ids[0, 0], ids[0, -1] = 2, 3
+            inputs[meta.name] = ids
+        elif meta.name == "attention_mask":
+            inputs[meta.name] = np.ones((1, seq_len), dtype=np.int64)
+        else:
+            inputs[meta.name] = np.zeros((1, seq_len), dtype=np.int64)
+    return inputs
+
+
+def verify(full_path: Path, cls_path: Path, hidden_name: str, seq_len: int) -> float:
+    import onnxruntime as ort
+
+    full = ort.InferenceSession(str(full_path), providers=["CPUExecutionProvider"])
+    cls = ort.InferenceSession(str(cls_path), providers=["CPUExecutionProvider"])
+    inputs = _sample_inputs(full, seq_len)
+
+    (hidden,) = full.run([hidden_name], inputs)
+    (cls_vec,) = cls.run([CLS_OUTPUT_NAME], inputs)
+    diff = float(np.max(np.abs(hidden[:, 0, :] - cls_vec)))
+    print(f"Output per call at {seq_len} tokens: {hidden.nbytes:,} bytes -> {cls_vec.nbytes:,} bytes")
+    print(f"Max abs difference vs full graph CLS: {diff:.3e}")
+    return diff
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Write a BERT ONNX variant that outputs only the CLS embedding.")
+    parser.add_argument("--input", default=os.getenv("BERT_ONNX_PATH", "models/onnx/bert/model.onnx"))
+    parser.add_argument("--output", default=os.getenv("BERT_ONNX_CLS_PATH", "models/onnx/bert/model_cls.onnx"))
+    parser.add_argument("--verify-tokens", type=int, default=128, help="Sequence length for the parity check (0 skips it)")
+    args = parser.parse_args()
+
+    try:
+        import onnx
+    except ImportError:
+        print("The onnx package is required for this tool: pip install onnx", file=sys.stderr)
+        return 2
+
+    src = _resolve(args.input)
+    dst = _resolve(args.output)
+    if not src.exists():
+        print(f"Missing source graph: {src}. Run scripts/fetch_onnx.py first.", file=sys.stderr)
+        return 2
+
+    model = onnx.load(str(src), load_external_data=True)
+    hidden_name, dropped, removed = build_cls_model(model)
+    print(f"Replaced outputs {dropped} with {CLS_OUTPUT_NAME} = {hidden_name}[:, 0, :]; pruned {removed} unused node(s)")
+
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    external = Path(str(src) + ".data").exists()
+    onnx.save_model(
+        model,
+        str(dst),
+        save_as_external_data=external,
+        all_tensors_to_one_file=True,
+        location=dst.name + ".data",
+    )
+    onnx.checker.check_model(str(dst))
+    print(f"Saved {dst}" + (f" (+ {dst.name}.data)" if external else ""))
+
+    if args.verify_tokens > 0:
+        if verify(src, dst, hidden_name, args.verify_tokens) > 1e-4:
+            print("CLS output does not match the full graph", file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,87 @@
+import argparse
+import socketserver
+import sys
+from datetime import datetime
+
+
+class SmtpSinkHandler(socketserver.StreamRequestHandler):
+    """Minimal SMTP stand-in: accepts every message and prints it instead of delivering.
+
+    Point the app at it with SMTP_HOST=127.0.0.1 SMTP_PORT=1025 SMTP_USE_TLS=false.
+    """
+
+    def _reply(self, line: str) -> None:
+        self.wfile.write((line + "\r\n").encode("ascii"))
+        self.wfile.flush()
+
+    def handle(self) -> None:
+        self._reply("220 smtp-sink ready")
+        mail_from, rcpt_to = None, []
+
+        while True:
+            raw = self.rfile.readline()
+            if not raw:
+                return
+            line = raw.decode("utf-8", errors="replace").rstrip("\r\n")
+            verb = line.split(" ", 1)[0].upper()
+
+            if verb == "EHLO":
+                self.wfile.write(b"250-smtp-sink\r\n250 8BITMIME\r\n")
+                self.wfile.flush()
+            elif verb == "HELO":
+                self._reply("250 smtp-sink")
+            elif verb == "MAIL":
+                mail_from, rcpt_to = line[10:].strip(), []
+                self._reply("250 OK")
+            elif verb == "RCPT":
+                rcpt_to.append(line[8:].strip())
+                self._reply("250 OK")
+            elif verb == "DATA":
+                self._reply("354 End data with <CR><LF>.<CR><LF>")
+                body = []
+                while True:
+                    data_line = self.rfile.readline()
+                    if not data_line or data_line in {b".\r\n", b".\n"}:
+                        break
+                    if data_line.startswith(b".."):
+                        data_line = data_line[1:]
+                    body.append(data_line.decode("utf-8", errors="replace"))
+                self.server.messages_received += 1
+                print(f"--- message {self.server.messages_received} at {datetime.utcnow().isoformat()}Z")
+                print(f"From: {mail_from}  To: {', '.join(rcpt_to)}")
+                print("".join(body), flush=True)
+                self._reply("250 OK: queued")
+            elif verb in {"RSET", "NOOP"}:
+                if verb == "RSET":
+                    mail_from, rcpt_to = None, []
+                self._reply("250 OK")
+            elif verb == "QUIT":
+                self._reply("221 Bye")
+                return
+            else:
+                self._reply("502 Command not implemented")
+
+
+class SmtpSinkServer(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+    messages_received = 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Local SMTP stand-in for testing outbox delivery.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=1025)
+    args = parser.parse_args()
+
+    with SmtpSinkServer((args.host, args.port), SmtpSinkHandler) as server:
+        print(f"SMTP sink listening on {args.host}:{args.port}", flush=True)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,152 @@
+import argparse
+import os
+import pickle
+import random
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+import numpy as np  # noqa: E402
+from nltk.tokenize import sent_tokenize  # noqa: E402
+from xgboost import XGBClassifier  # noqa: E402
+
+from features.cascade import LIGHT_MODEL_PATH  # noqa: E402
+from features.feature_extractor import (  # noqa: E402
+    STYLE_FEATURE_DIM,
+    build_features_with_chunk_context,
+    feature_config_fingerprint,
+    use_bert_encoder,
+)
+from features.model_registry import (  # noqa: E402
+    BUILTIN_VERSION,
+    MODEL_REGISTRY_DIR,
+    ModelBundleError,
+    ModelRegistry,
+)
+
+THRESHOLDS = (0.6, 0.7, 0.8, 0.85, 0.9, 0.95)
+
+
+def _load_texts(args) -> list[str]:
+    if args.input:
+        paths = sorted(Path(args.input).rglob("*.txt"))
+        return [p.read_text(encoding="utf-8", errors="ignore") for p in paths]
+
+    from backend.mongo import scan_logs_collection
+
+    # Large-document logs only keep a preview of the text, so they are skipped.
+    cursor = scan_logs_collection.find(
+        {"large_document": {"$ne": True}, "scanned_text": {"$type": "string"}},
+        {"scanned_text": 1},
+    ).sort("timestamp", -1).limit(args.from_scan_logs)
+    return [doc["scanned_text"] for doc in cursor]
+
+
+def _document_features(text: str, chunk_sentence_size: int) -> np.ndarray:
+    sentences = sent_tokenize(text.strip())
+    rows = []
+    for i in range(0, len(sentences), chunk_sentence_size):
+        chunk_sentences = sentences[i:i + chunk_sentence_size]
+        chunk_text = " ".join(chunk_sentences)
+        rows.extend(build_features_with_chunk_context(sent, chunk_text) for sent in chunk_sentences)
+    return np.vstack(rows) if rows else np.empty((0, 0), dtype=np.float32)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Distil a stylometry-only model from the full model for the cheap-first cascade."
+    )
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--input", help="Directory of .txt documents")
+    source.add_argument("--from-scan-logs", type=int, metavar="N", help="Use the N most recent scanned texts")
+    parser.add_argument(
+        "--bundle",
+        default=BUILTIN_VERSION,
+        help="Registry version to imitate; its own BERT graphs and tokenizer are used for the features",
+    )
+    parser.add_argument(
+        "--chunk-sentence-size",
+        type=int,
+        default=int(os.getenv("CHUNK_SENTENCE_SIZE", "15")),
+        help="CHUNK_SENTENCE_SIZE of the deployment that will serve the light model",
+    )
+    parser.add_argument("--output", help=f"Where to save the light model (default {LIGHT_MODEL_PATH} for {BUILTIN_VERSION})")
+    parser.add_argument("--registry", default=str(MODEL_REGISTRY_DIR))
+    parser.add_argument("--holdout", type=float, default=0.2, help="Fraction of documents held out for evaluation")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    if args.output is None and args.bundle != BUILTIN_VERSION:
+        # LIGHT_MODEL_PATH belongs to the builtin model; a bundle ships its own light model.
+        print("--output is required with --bundle; package the result with build_model_bundle.py --light-model", file=sys.stderr)
+        return 2
+    output = Path(args.output or LIGHT_MODEL_PATH)
+
+    registry = ModelRegistry(Path(args.registry))
+    registry.fingerprint = feature_config_fingerprint(args.chunk_sentence_size)
+    try:
+        bundle = registry.load_candidate(args.bundle)
+    except LookupError:
+        print(f"No such model version: {args.bundle}", file=sys.stderr)
+        return 1
+    except ModelBundleError as exc:
+        print(f"Could not load {args.bundle}: {exc}", file=sys.stderr)
+        return 1
+    full_model = bundle.model
+
+    texts = [t for t in _load_texts(args) if t.strip()]
+    if len(texts) < 5:
+        print(f"Need at least 5 documents, got {len(texts)}", file=sys.stderr)
+        return 1
+
+    random.Random(args.seed).shuffle(texts)
+    split = max(int(len(texts) * (1 - args.holdout)), 1)
+    parts = {"train": texts[:split], "holdout": texts[split:] or texts[-1:]}
+
+    data = {}
+    # Labels are the full model's own predictions, so its features must come from the BERT
+    # it was trained with: the bundle's encoder, or the deployment's default (None).
+    with use_bert_encoder(bundle.encoder):
+        for name, docs in parts.items():
+            features = np.vstack([f for f in (_document_features(t, args.chunk_sentence_size) for t in docs) if f.size])
+            # The light model learns to imitate the full model.
+            data[name] = (features[:, -STYLE_FEATURE_DIM:], full_model.predict(features))
+            print(f"{name}: {len(docs)} documents, {len(features)} sentences")
+
+    x_train, y_train = data["train"]
+    if len(np.unique(y_train)) != len(full_model.classes_):
+        print("Training sentences do not cover every class; add more varied documents", file=sys.stderr)
+        return 1
+
+    light_model = XGBClassifier(
+        n_estimators=300,
+        max_depth=4,
+        learning_rate=0.1,
+        subsample=0.9,
+        objective="multi:softprob",
+        random_state=args.seed,
+    )
+    light_model.fit(x_train, y_train)
+
+    x_holdout, y_holdout = data["holdout"]
+    probs = light_model.predict_proba(x_holdout)
+    agree = probs.argmax(axis=1) == y_holdout
+    print(f"\nHold-out agreement with full model: {agree.mean():.3f} over {len(y_holdout)} sentences")
+    print(f"{'confidence':>10} {'settled':>8} {'agreement':>10}")
+    for threshold in THRESHOLDS:
+        settled = probs.max(axis=1) >= threshold
+        agreement = agree[settled].mean() if settled.any() else float("nan")
+        print(f"{threshold:>10.2f} {settled.mean():>8.3f} {agreement:>10.3f}")
+    print("\n'settled' is the share of sentences that would skip BERT at that CASCADE_CONFIDENCE.")
+
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with output.open("wb") as fh:
+        pickle.dump(light_model, fh)
+    print(f"Saved light model to {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
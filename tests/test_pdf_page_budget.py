@@ -0,0 +1,97 @@
+import io
+import threading
+import time
+
+import pytest
+
+from extraction import pdf
+from extraction.cache import ExtractionCache
+
+
+def _build_pdf(page_streams: list[str]) -> bytes:
+    """A minimal PDF with one Helvetica content stream per page."""
+    objects = {3: b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"}
+    kids = []
+    for idx, ops in enumerate(page_streams):
+        page_id, content_id = 4 + 2 * idx, 5 + 2 * idx
+        kids.append(f"{page_id} 0 R")
+        stream = ops.encode("latin-1")
+        objects[content_id] = b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream)
+        objects[page_id] = (
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {content_id} 0 R >>"
+        ).encode()
+    objects[1] = b"<< /Type /Catalog /Pages 2 0 R >>"
+    objects[2] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(page_streams)} >>".encode()
+
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = {}
+    for obj_id in sorted(objects):
+        offsets[obj_id] = out.tell()
+        out.write(b"%d 0 obj\n%s\nendobj\n" % (obj_id, objects[obj_id]))
+    xref_at = out.tell()
+    out.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+    for obj_id in sorted(objects):
+        out.write(b"%010d 00000 n \n" % offsets[obj_id])
+    out.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref_at))
+    return out.getvalue()
+
+
+def _page(text: str, lines: int = 1) -> str:
+    return "BT /F1 10 Tf 12 TL 50 760 Td\n" + f"({text}) Tj T*\n" * lines + "ET"
+
+
+# Thousands of text runs: layout mode takes tens of seconds on this page, plain mode about one.
+SLOW_PAGE = _page("slow page line", lines=8000)
+
+
+def _extract_off_main_thread(data: bytes) -> tuple[str, float]:
+    # HTTP uploads and scan-job items are extracted on worker threads, where SIGALRM cannot fire.
+    outcome = {}
+
+    def run():
+        started_at = time.monotonic()
+        outcome["text"] = pdf.extract_pdf_text(io.BytesIO(data))
+        outcome["seconds"] = time.monotonic() - started_at
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    thread.join(120)
+    assert not thread.is_alive(), "extraction ignored the page budget"
+    return outcome["text"], outcome["seconds"]
+
+
+@pytest.mark.parametrize("workers", [2, 0], ids=["pool", "one-off-child"])
+def test_slow_page_in_short_pdf_times_out(monkeypatch, workers):
+    monkeypatch.setattr(pdf, "PDF_EXTRACT_WORKERS", workers)
+    monkeypatch.setattr(pdf, "PDF_PAGE_BUDGET_SECONDS", 0.1)
+    data = _build_pdf([_page("first page"), SLOW_PAGE, _page("third page")])
+    assert 3 < pdf.PDF_PARALLEL_MIN_PAGES
+
+    try:
+        text, seconds = _extract_off_main_thread(data)
+    finally:
+        pdf.shutdown_pdf_pool()
+
+    assert "[Page 2: text extraction timed out]" in text
+    assert "first page" in text and "third page" in text
+    # Process start-up plus three budgets, far below the unbudgeted layout parse.
+    assert seconds < 15
+
+
+def test_timed_out_pages_are_not_cached(monkeypatch, tmp_path):
+    monkeypatch.setattr(pdf, "PDF_EXTRACT_WORKERS", 0)
+    monkeypatch.setattr(pdf, "PDF_PAGE_BUDGET_SECONDS", 0.1)
+    cache = ExtractionCache(1024 * 1024, disk_dir=str(tmp_path), disk_max_bytes=1024 * 1024)
+    slow = _build_pdf([_page("first page"), SLOW_PAGE])
+    fast = _build_pdf([_page("first page")])
+
+    text = cache.get_or_extract("a" * 64, ".pdf", lambda: pdf.extract_pdf_text(io.BytesIO(slow)))
+    assert "[Page 2: text extraction timed out]" in text
+    assert cache.get("a" * 64, ".pdf") is None
+    assert not list(tmp_path.iterdir())
+    assert cache.stats()["partial_skips"] == 1
+
+    cache.get_or_extract("b" * 64, ".pdf", lambda: pdf.extract_pdf_text(io.BytesIO(fast)))
+    assert cache.get("b" * 64, ".pdf") is not None